@@ -55,23 +55,9 @@ const checkPythonDependencies = async () => {
 // Run the dependency check when the server starts
 checkPythonDependencies();
 
-// Configure storage for uploaded files
-const storage = multer.diskStorage({
-  destination: function (req, file, cb) {
-    const uploadDir = path.join(__dirname, "../uploads");
-    // Create uploads directory if it doesn't exist
-    if (!fs.existsSync(uploadDir)) {
-      fs.mkdirSync(uploadDir, { recursive: true });
-    }
-    cb(null, uploadDir);
-  },
-  filename: function (req, file, cb) {
-    // Generate a unique filename with original extension
-    const uniqueSuffix = Date.now() + "-" + Math.round(Math.random() * 1e9);
-    const ext = path.extname(file.originalname);
-    cb(null, uniqueSuffix + ext);
-  },
-});
+// Keep uploaded files in memory: they are streamed to the analyzer over stdin,
+// so nothing needs to be written to (or cleaned up from) the uploads directory
+const storage = multer.memoryStorage();
 
 // Define file filter for supported resume formats
 const fileFilter = (req, file, cb) => {
@@ -100,99 +86,6 @@ exports.upload = multer({
   fileFilter: fileFilter,
 });
 
-// Helper function to sanitize job description text for command line
-const sanitizeJobDescription = (text) => {
-  if (!text) return "";
-
-  // Replace problematic characters with their safe alternatives
-  // These are especially important for command line passing
-  let sanitized = text
-    .replace(/"/g, '\\"') // Escape double quotes
-    .replace(/`/g, "\\`") // Escape backticks
-    .replace(/\$/g, "\\$") // Escape dollar signs
-    .replace(/\r\n|\n|\r/g, " ") // Replace newlines with spaces
-    .replace(/\t/g, " "); // Replace tabs with spaces
-
-  // Replace common problematic Unicode characters
-  const replacements = {
-    "\u2022": "-", // bullet
-    "\u2023": "-", // triangular bullet
-    "\u2043": "-", // hyphen bullet
-    "\u2219": "-", // bullet operator
-    "\u25CF": "-", // black circle
-    "\u25E6": "-", // white bullet
-    "\u25AA": "-", // black small square
-    "\u25AB": "-", // white small square
-    "\u2013": "-", // en dash
-    "\u2014": "-", // em dash
-    "\u2018": "'", // left single quote
-    "\u2019": "'", // right single quote
-    "\u201C": '"', // left double quote
-    "\u201D": '"', // right double quote
-    "\u2026": "...", // ellipsis
-    "\u00A0": " ", // non-breaking space
-    "\u00A9": "(c)", // copyright
-    "\u00AE": "(r)", // registered trademark
-    "\u2122": "(tm)", // trademark
-    "\u00B1": "+/-", // plus-minus sign
-    "\u2212": "-", // minus sign
-    "\u00D7": "x", // multiplication sign
-    "\u00F7": "/", // division sign
-    "\u20AC": "EUR", // euro sign
-    "\u00A3": "GBP", // pound sign
-    "\u00A5": "JPY", // yen sign
-    "\u00A2": "c", // cent sign
-    "\u2713": "√", // check mark
-    "\u2714": "√", // heavy check mark
-    "\u2716": "x", // heavy multiplication x
-    "\u2717": "x", // ballot x
-    "\u2718": "x", // heavy ballot x
-    "\u271A": "+", // heavy plus sign
-    "\u271B": "+", // open centre cross
-    "\u271C": "+", // heavy open centre cross
-    "\u271D": "+", // latin cross
-    "\u271E": "+", // shadowed white latin cross
-    "\u271F": "+", // outlined latin cross
-    "\u00B6": "¶", // pilcrow sign (paragraph)
-    "\u00A7": "§", // section sign
-    "\u2020": "†", // dagger
-    "\u2021": "‡", // double dagger
-    "\u2248": "~", // almost equal to
-    "\u2260": "!=", // not equal to
-    "\u226E": "<", // less-than
-    "\u226F": ">", // greater-than
-    // Use Unicode escape sequences for problematic characters
-    "\u2022": "-", // bullet point (•)
-    "\u2013": "-", // en dash (–)
-    "\u2014": "-", // em dash (—)
-    "\u2018": "'", // left single quote (')
-    "\u2019": "'", // right single quote (')
-    "\u201C": '"', // left double quote (")
-    "\u201D": '"', // right double quote (")
-    "\u2026": "...", // ellipsis (…)
-  };
-
-  for (const [char, replacement] of Object.entries(replacements)) {
-    sanitized = sanitized.replace(new RegExp(char, "g"), replacement);
-  }
-
-  // Handle any remaining non-ASCII characters
-  sanitized = sanitized.replace(/[^\x00-\x7F]/g, (match) => {
-    console.warn(
-      `Replacing non-ASCII character: ${match} (Unicode: ${match
-        .charCodeAt(0)
-        .toString(16)})`
-    );
-    return " ";
-  });
-
-  // Final cleanup - ensure there are no invalid sequences
-  sanitized = sanitized.replace(/\\+(?![ntr$"`])/g, "\\"); // Fix multiple escapes not followed by special chars
-  sanitized = sanitized.replace(/\s+/g, " ").trim(); // Normalize whitespace
-
-  return sanitized;
-};
-
 // Check Python environment
 const checkPythonEnvironment = () => {
   return new Promise((resolve) => {
@@ -225,12 +118,24 @@ const checkPythonEnvironment = () => {
   });
 };
 
-// Helper function to run Python script with improved error handling
+// Time budgets for the analyzer. The budget is passed to the Python script,
+// whose slow stages (OCR, similarity scoring, report rendering) stop once it
+// runs out and return a partial, keyword-only result instead. The process is
+// only killed if it is still running after the hard timeout.
+const ANALYSIS_BUDGET_SECONDS = 150;
+const BATCH_BUDGET_SECONDS = 150;
+const PYTHON_TIMEOUT_MS = 180000; // 3 minutes
+
+// Helper function to run Python script with improved error handling.
+// The resume bytes and job description are sent over stdin (see
+// ml-models/resume_matcher/protocol.py), so no temporary file is written and
+// the job description keeps its newlines regardless of its length.
 const runPythonScript = async (
   scriptPath,
-  filePath,
+  fileBuffer,
   jobDescription,
-  originalFilename = null
+  originalFilename = null,
+  userId = null
 ) => {
   return new Promise(async (resolve, reject) => {
     try {
@@ -258,34 +163,30 @@ const runPythonScript = async (
         console.error(`Error: Reports directory is not writeable`);
       }
 
-      // Sanitize job description for command line
-      const sanitizedJobDescription = sanitizeJobDescription(jobDescription);
-
       // Sanitize original filename if provided
       let safeOriginalFilename = "";
       if (originalFilename) {
         // Replace problematic characters
         safeOriginalFilename = originalFilename
-          .replace(/"/g, '\\"') // Escape double quotes
           .replace(/[<>:"|?*]/g, "_") // Replace Windows invalid filename chars
           .replace(/\r\n|\r|\n/g, " ") // Replace newlines with spaces
           .replace(/\t/g, " "); // Replace tabs with spaces
       }
 
-      // Add original filename as an additional parameter if provided
-      const filenameArg = originalFilename
-        ? ` --original-filename "${safeOriginalFilename}"`
-        : "";
-
-      // Add output directory parameter to redirect output to backend/reports
       // Convert backslashes to forward slashes for Python compatibility
+      const normalizedScriptPath = scriptPath.replace(/\\/g, "/");
       const safeReportsDir = reportsDir.replace(/\\/g, "/");
-      const outputDirArg = ` --output-dir "${safeReportsDir}"`;
+
+      // Arguments are passed directly (no shell), so they need no escaping
+      const args = [
+        normalizedScriptPath,
+        "--stdin",
+        "--output-dir",
+        safeReportsDir,
+      ];
 
       // Set encoding for proper handling of special characters
       const options = {
-        encoding: "utf8",
-        maxBuffer: 1024 * 1024 * 10, // 10MB buffer for large outputs
         windowsHide: true, // Hide command window on Windows
         env: {
           ...process.env,
@@ -295,18 +196,42 @@ const runPythonScript = async (
         },
       };
 
-      // Run the Python script with the file path and job description as arguments
-      // Normalize file paths for consistent handling
-      const normalizedScriptPath = scriptPath.replace(/\\/g, "/");
-      const normalizedFilePath = filePath.replace(/\\/g, "/");
-
-      const command = `${pythonCommand} "${normalizedScriptPath}" "${normalizedFilePath}" "${sanitizedJobDescription}"${filenameArg}${outputDirArg}`;
+      const pythonProcess = spawn(pythonCommand, args, options);
 
-      // Reduced logging - don't log the full command
-      // console.log(`Executing: ${command}`);
+      let stdout = "";
+      let stderr = "";
+      pythonProcess.stdout.setEncoding("utf8");
+      pythonProcess.stderr.setEncoding("utf8");
+      pythonProcess.stdout.on("data", (chunk) => {
+        stdout += chunk;
+      });
+      pythonProcess.stderr.on("data", (chunk) => {
+        stderr += chunk;
+      });
+      pythonProcess.on("error", (spawnError) => {
+        console.error(`Python script error: ${spawnError.message}`);
+        reject(spawnError);
+      });
 
-      const pythonProcess = exec(command, options, (error, stdout, stderr) => {
-        if (error) {
+      // Send the request: the resume as base64 plus the raw job description
+      pythonProcess.stdin.on("error", (stdinError) => {
+        console.error(`Error writing to Python script: ${stdinError.message}`);
+      });
+      pythonProcess.stdin.end(
+        JSON.stringify({
+          resume_base64: fileBuffer.toString("base64"),
+          job_description: jobDescription,
+          original_filename: safeOriginalFilename || undefined,
+          budget_seconds: ANALYSIS_BUDGET_SECONDS,
+          user_id: userId || undefined,
+        })
+      );
+
+      pythonProcess.on("close", (code) => {
+        if (code !== 0) {
+          const error = new Error(
+            `Python script exited with code ${code}: ${stderr.trim()}`
+          );
           console.error(`Python script error: ${error.message}`);
           return reject(error);
         }
@@ -394,7 +319,7 @@ const runPythonScript = async (
             process.env.DEBUG === "true"
           ) {
             jsonResult._debug = {
-              command: command,
+              command: [pythonCommand, ...args].join(" "),
               pythonVersion: pythonEnv.version,
               scriptPath: scriptPath,
             };
@@ -407,12 +332,11 @@ const runPythonScript = async (
         }
       });
 
-      // Add timeout to prevent hanging
-      const timeoutMs = 180000; // 3 minutes
+      // Last resort if the script overruns its budget
       const timeout = setTimeout(() => {
         pythonProcess.kill();
         reject(new Error(`Python script execution timed out after 3 minutes`));
-      }, timeoutMs);
+      }, PYTHON_TIMEOUT_MS);
 
       pythonProcess.on("exit", () => {
         clearTimeout(timeout);
@@ -481,14 +405,13 @@ exports.analyzeResume = async (req, res) => {
     // Process each resume file
     for (const file of req.files) {
       try {
-        const filePath = file.path;
-
         // Run the Python script and get the analysis result
         const result = await runPythonScript(
           scriptPath,
-          filePath,
+          file.buffer,
           jobDescription,
-          file.originalname
+          file.originalname,
+          req.user ? String(req.user._id) : null
         );
 
         // Add the result to the array with proper error handling
@@ -513,7 +436,6 @@ exports.analyzeResume = async (req, res) => {
             ...result,
             filename: file.originalname || result.filename,
             displayName: file.originalname,
-            tempFilename: file.filename,
             success: true,
           });
         }
@@ -546,20 +468,221 @@ exports.analyzeResume = async (req, res) => {
   }
 };
 
-exports.atsReport = async (req, res) => {
+// Analyze multiple resumes, streaming each result as a server-sent event as
+// soon as it is scored (see ml-models/resume_matcher/batch_analyzer.py).
+// Events: "result" per resume, "report" once its PDF is rendered, then
+// "summary" with the ranking, and finally "end".
+exports.analyzeResumeStream = async (req, res) => {
+  if (!req.files || req.files.length === 0) {
+    return res.status(400).json({
+      success: false,
+      message: "Please upload at least one resume file.",
+    });
+  }
+
+  if (!req.body.jobDescription) {
+    return res.status(400).json({
+      success: false,
+      message: "Please provide a job description.",
+    });
+  }
+
+  const scriptPath = path.join(
+    __dirname,
+    "../../ml-models/resume_matcher/batch_analyzer.py"
+  );
+
+  if (!fs.existsSync(scriptPath)) {
+    return res.status(500).json({
+      success: false,
+      message: "Batch analyzer script not found. Please check the installation.",
+    });
+  }
+
+  let pythonEnv;
   try {
-    const reportPath = path.join(__dirname, "../reports");
+    pythonEnv = await checkPythonEnvironment();
+  } catch (error) {
+    return res.status(500).json({
+      success: false,
+      message: "Python environment is not available",
+      error: error.message,
+    });
+  }
 
-    // Check if directory exists
-    if (!fs.existsSync(reportPath)) {
-      return res.status(404).json({ error: "Reports directory not found" });
+  res.writeHead(200, {
+    "Content-Type": "text/event-stream",
+    "Cache-Control": "no-cache",
+    Connection: "keep-alive",
+  });
+
+  const sendEvent = (type, data) => {
+    res.write(`event: ${type}\ndata: ${JSON.stringify(data)}\n\n`);
+  };
+
+  const pythonProcess = spawn(
+    pythonEnv.command,
+    [scriptPath.replace(/\\/g, "/"), "--stdin"],
+    {
+      windowsHide: true,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: "utf-8",
+        PYTHONLEGACYWINDOWSFSENCODING: "0",
+        PYTHONWARNINGS: "ignore",
+      },
     }
+  );
 
-    // Read directory and filter out non-PDF files
-    const allFiles = fs.readdirSync(reportPath);
-    const reports = allFiles.filter((file) => file.endsWith(".pdf"));
+  // Stop the analysis if the client goes away
+  let finished = false;
+  res.on("close", () => {
+    if (!finished) {
+      pythonProcess.kill();
+    }
+  });
 
-    res.json({ reports });
+  const timeout = setTimeout(() => {
+    sendEvent("error", {
+      success: false,
+      error: "Python script execution timed out after 3 minutes",
+    });
+    pythonProcess.kill();
+  }, PYTHON_TIMEOUT_MS);
+
+  // Each stdout line is one JSON event
+  let buffered = "";
+  let stderr = "";
+  pythonProcess.stdout.setEncoding("utf8");
+  pythonProcess.stderr.setEncoding("utf8");
+  pythonProcess.stdout.on("data", (chunk) => {
+    buffered += chunk;
+    let newline;
+    while ((newline = buffered.indexOf("\n")) !== -1) {
+      const line = buffered.slice(0, newline).trim();
+      buffered = buffered.slice(newline + 1);
+      if (!line) {
+        continue;
+      }
+      try {
+        const event = JSON.parse(line);
+        const { type = "error", ...data } = event;
+        if (type === "result") {
+          // Match the display names used by the non-streaming endpoint
+          const file = req.files[data.index];
+          if (file) {
+            data.filename = file.originalname || data.filename;
+            data.displayName = file.originalname;
+          }
+        }
+        sendEvent(type, data);
+      } catch (parseError) {
+        console.warn(`Skipping invalid analyzer output: ${parseError.message}`);
+      }
+    }
+  });
+  pythonProcess.stderr.on("data", (chunk) => {
+    stderr += chunk;
+  });
+
+  pythonProcess.on("error", (spawnError) => {
+    console.error(`Python script error: ${spawnError.message}`);
+  });
+
+  pythonProcess.on("close", (code) => {
+    clearTimeout(timeout);
+    finished = true;
+    if (code !== 0 && stderr.includes("Error")) {
+      console.error(`Python critical error: ${stderr}`);
+    }
+    sendEvent("end", { success: code === 0 });
+    res.end();
+  });
+
+  pythonProcess.stdin.on("error", (stdinError) => {
+    console.error(`Error writing to Python script: ${stdinError.message}`);
+  });
+  pythonProcess.stdin.end(
+    JSON.stringify({
+      job_description: req.body.jobDescription,
+      budget_seconds: BATCH_BUDGET_SECONDS,
+      user_id: req.user ? String(req.user._id) : undefined,
+      comparison_report: req.body.comparisonReport === "true" || undefined,
+      resumes: req.files.map((file) => ({
+        resume_base64: file.buffer.toString("base64"),
+        original_filename: file.originalname,
+      })),
+    })
+  );
+};
+
+// Reports are listed from the report catalog (see
+// ml-models/resume_matcher/report_catalog.py), newest first, one page at a
+// time: ?limit=N&cursor=<next_cursor of the previous page>. Only the signed-in
+// user's reports are listed; ?resumeHash=<hash> narrows them to one resume.
+const REPORT_PAGE_SIZE = 50;
+
+const queryReportCatalog = async (args) => {
+  const pythonEnv = await checkPythonEnvironment();
+  const scriptPath = path.join(
+    __dirname,
+    "../../ml-models/resume_matcher/report_catalog.py"
+  );
+
+  return new Promise((resolve, reject) => {
+    const pythonProcess = spawn(
+      pythonEnv.command,
+      [scriptPath.replace(/\\/g, "/"), ...args],
+      { windowsHide: true, env: { ...process.env, PYTHONIOENCODING: "utf-8" } }
+    );
+
+    let stdout = "";
+    let stderr = "";
+    pythonProcess.stdout.setEncoding("utf8");
+    pythonProcess.stderr.setEncoding("utf8");
+    pythonProcess.stdout.on("data", (chunk) => {
+      stdout += chunk;
+    });
+    pythonProcess.stderr.on("data", (chunk) => {
+      stderr += chunk;
+    });
+    pythonProcess.on("error", reject);
+    pythonProcess.on("close", (code) => {
+      if (code !== 0) {
+        return reject(new Error(`Report catalog query failed: ${stderr.trim()}`));
+      }
+      try {
+        resolve(JSON.parse(stdout));
+      } catch (parseError) {
+        reject(new Error(`Invalid report catalog output: ${parseError.message}`));
+      }
+    });
+  });
+};
+
+exports.atsReport = async (req, res) => {
+  try {
+    if (!req.user) {
+      return res.status(401).json({ message: "Not authorized to access this route" });
+    }
+    const limit = parseInt(req.query.limit, 10) || REPORT_PAGE_SIZE;
+    const args = ["list", "--limit", String(limit)];
+    if (req.query.cursor) {
+      args.push("--cursor", String(req.query.cursor));
+    }
+    args.push("--user", String(req.user._id));
+    if (req.query.resumeHash) {
+      args.push("--resume-hash", String(req.query.resumeHash));
+    }
+
+    const page = await queryReportCatalog(args);
+
+    // `reports` keeps its original shape (file names); `items` has the details
+    res.json({
+      reports: page.reports.map((report) => report.report_id),
+      items: page.reports,
+      next_cursor: page.next_cursor,
+    });
   } catch (error) {
     console.error("Error retrieving reports:", error.message);
     res.status(500).json({ error: error.message });
@@ -581,7 +704,7 @@ exports.atsScoreValue = async (req, res) => {
 
     const result = await runPythonScript(
       pythonScriptPath,
-      req.file.path,
+      req.file.buffer,
       req.body.jobDescription
     );
 
@@ -611,7 +734,7 @@ exports.keyMissingValues = async (req, res) => {
 
     const result = await runPythonScript(
       pythonScriptPath,
-      req.file.path,
+      req.file.buffer,
       req.body.jobDescription
     );
 
@@ -5,12 +5,14 @@ const {
   atsScoreValue,
   keyMissingValues,
   analyzeResume,
+  analyzeResumeStream,
   upload,
   getReport,
 } = require("../controllers/atsController");
+const { protect } = require("../middlewares/auth");
 
-// Get all ATS reports
-router.get("/report", atsReport);
+// Get the signed-in user's ATS reports
+router.get("/report", protect, atsReport);
 
 // Get a specific PDF report by filename
 router.get("/reports/:filename", getReport);
@@ -22,6 +24,9 @@ router.post("/score", upload.single("resume"), atsScoreValue);
 router.post("/missing", upload.single("resume"), keyMissingValues);
 
 // Analyze multiple resumes
-router.post("/analyze", upload.array("resumes", 10), analyzeResume);
+router.post("/analyze", protect, upload.array("resumes", 10), analyzeResume);
+
+// Analyze multiple resumes, streaming results as server-sent events
+router.post("/analyze/stream", protect, upload.array("resumes", 10), analyzeResumeStream);
 
 module.exports = router;
@@ -143,6 +143,7 @@ const ATS_Score = () => {
 
       const response = await fetch(`${API_BASE_URL}/api/ats/analyze`, {
         method: "POST",
+        headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
         body: formData,
       });
 
@@ -8,6 +8,7 @@ export const analyzeResume = async (resumeFile, jobDescription) => {
 
     const response = await fetch(`${API_URL}/analyze`, {
       method: "POST",
+      headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
       body: formData,
     });
 
@@ -86,7 +87,9 @@ export const getMissingKeywords = async (resumeFile, jobDescription) => {
 
 export const getReports = async () => {
   try {
-    const response = await fetch(`${API_URL}/report`);
+    const response = await fetch(`${API_URL}/report`, {
+      headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+    });
     const data = await response.json();
 
     if (!response.ok) {
@@ -0,0 +1,396 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# Local imports
+from enhanced_analyzer import (
+    error_response,
+    analysis_cache_key,
+    job_hash,
+    get_cached_analysis,
+    score_resume_text,
+    build_result,
+    cache_entry,
+    report_url,
+    generate_pdf_report
+)
+from comparison_report import generate_comparison_report
+from deadline import Deadline, deadline_expired
+from metrics import METRICS, REPORT_RENDER_SECONDS, ANALYSES, FAILURES
+from ocr import DEFAULT_OCR_DPI
+from protocol import ProtocolError, read_batch_request
+from report_catalog import record_report
+from result_cache import RESULT_CACHE
+from snapshot import load_pipeline
+from text_extraction import content_hash, extract_document_text
+
+# Batch analysis with progressive output.
+#
+# Every resume in a batch is scored against the same job description and its
+# result is written to stdout as one JSON line as soon as it is ready, so the
+# first result arrives after a single resume's cost instead of the whole batch:
+#
+#   {"type": "result", "index": 0, ...}      analysis result, without report fields
+#   {"type": "report", "index": 0, ...}      report_path/report_url once rendered
+#   {"type": "comparison_report", ...}       report_path/report_url of the single
+#                                            comparison PDF, when requested
+#   {"type": "summary", ...}                 counts, ranking and elapsed time, always last
+#
+# `index` is the position of the resume in the request. Cached results are
+# emitted first, then the rest are scored smallest file first, so
+# the quick ones are not held up behind a large scan. With a time budget,
+# resumes still being scored when it runs out get keyword-only results marked
+# "partial" and reports not yet started are skipped.
+
+# Per-worker spaCy model, loaded once by _init_worker
+_worker_nlp = None
+
+# Worker pool kept across the batches of one process, see _worker_pool
+_pool = None
+_pool_lock = threading.Lock()
+
+def _init_worker():
+    global _worker_nlp
+    _worker_nlp = load_pipeline()
+    # Forked workers start with a copy of the parent's metrics, which the parent already counts
+    METRICS.reset()
+
+def _worker_pool(workers):
+    """Return a process pool with at least `workers` workers.
+
+    The pool outlives the batch, so a process that streams several batches
+    loads the spaCy model once per worker instead of once per batch. It is
+    replaced when a worker has died, even between batches, or a batch needs
+    more workers; the old pool finishes the work already submitted to it.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and (
+            _pool._broken
+            or _pool._max_workers < workers
+            or not all(process.is_alive() for process in _pool._processes.values())
+        ):
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        return _pool
+
+def _analyze_entry(index, resume_bytes, job_description, display_filename, ocr, ocr_dpi, expires_at=None):
+    deadline = Deadline(expires_at=expires_at) if expires_at else None
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            resume_text = extract_document_text(resume_bytes, ocr=ocr, ocr_dpi=ocr_dpi, deadline=deadline)
+        except ValueError as e:
+            FAILURES.inc(type="unsupported_format")
+            return index, error_response(str(e)), None
+        if not resume_text:
+            FAILURES.inc(type="no_text")
+            return index, error_response("Failed to extract text from resume"), None
+
+        analysis_result, resume_text, job_text = score_resume_text(
+            resume_text, job_description, _worker_nlp, deadline=deadline
+        )
+        result = build_result(analysis_result, display_filename)
+        if deadline is not None and deadline.partial:
+            result["partial"] = True
+            result["skipped_stages"] = list(deadline.skipped)
+        ANALYSES.inc(outcome="partial" if result.get("partial") else "complete")
+        # The parent renders the report from the same analysis
+        return index, result, (analysis_result, resume_text, job_text)
+
+def _score_entry(*args):
+    # Runs in worker processes; stdout is reserved for the result stream, and
+    # the metrics recorded for this resume go back to the parent with its result
+    index, result, report_input = _analyze_entry(*args)
+    return index, result, report_input, METRICS.snapshot(reset=True)
+
+def _render_report(display_filename, report_input, deadline=None):
+    # Reports still queued when the batch budget runs out are skipped
+    if deadline_expired(deadline):
+        return None
+    analysis_result, resume_text, job_text = report_input
+    with contextlib.redirect_stdout(sys.stderr), REPORT_RENDER_SECONDS.time(format="pdf"):
+        return generate_pdf_report(
+            display_filename,
+            analysis_result,
+            resume_text,
+            job_text,
+            original_filename=display_filename
+        )
+
+def _render_comparison(entries, deadline=None):
+    if deadline_expired(deadline):
+        return None
+    with contextlib.redirect_stdout(sys.stderr), REPORT_RENDER_SECONDS.time(format="comparison"):
+        return generate_comparison_report(entries)
+
+def stream_batch(resumes, job_description, emit, workers=None, ocr=True, ocr_dpi=DEFAULT_OCR_DPI,
+                 use_cache=True, generate_report=True, deadline=None, user_id=None, comparison_report=False):
+    """Analyze several resumes against one job description, emitting results as they complete.
+
+    `resumes` is a list of dicts with "resume_bytes" and optionally
+    "original_filename". `emit` is called with each event dict (see the module
+    comment) in completion order. `deadline` (see deadline.py) is the budget of
+    the whole batch. Rendered reports are recorded in the report catalog under
+    `user_id`. With `comparison_report` the successful results are also rendered
+    into one comparison PDF (see comparison_report.py) once all are scored.
+    Returns the summary event, which is also emitted.
+    """
+    start = time.perf_counter()
+    expires_at = deadline.expires_at if deadline is not None else None
+    # Report events come from the renderer thread
+    emit_lock = threading.Lock()
+    scores = {}
+    failed = 0
+    cached = 0
+    partial = 0
+    first_result = None
+    # Successful results for the comparison report, by index
+    comparison_entries = {}
+
+    def send(event):
+        with emit_lock:
+            emit(event)
+
+    def emit_result(index, result):
+        nonlocal failed, partial, first_result
+        if first_result is None:
+            first_result = time.perf_counter() - start
+        if result.get("success"):
+            scores[index] = result["score"]
+            partial += bool(result.get("partial"))
+        else:
+            failed += 1
+        send(dict(result, type="result", index=index))
+
+    def finish_report(index, result, analysis_result, future):
+        # Runs on the renderer thread
+        try:
+            report_path = future.result()
+        except Exception as e:
+            print(f"Report error for {names[index]}: {str(e)}", file=sys.stderr)
+            report_path = None
+        url = report_url(report_path)
+        if report_path:
+            record_report(
+                report_path,
+                resume_hash=content_hash(resumes[index]["resume_bytes"]),
+                job_hash=batch_job_hash,
+                score=result["score"],
+                filename=names[index],
+                user_id=user_id
+            )
+        send({"type": "report", "index": index, "report_path": url, "report_url": url, "success": report_path is not None})
+        if use_cache and report_path and not result.get("partial"):
+            RESULT_CACHE.put(cache_keys[index], cache_entry(analysis_result, report_path))
+
+    names = [entry.get("original_filename") or f"resume_{index + 1}.pdf" for index, entry in enumerate(resumes)]
+    batch_job_hash = job_hash(job_description)
+
+    # Cached results go out before anything is scored
+    pending = []
+    cache_keys = {}
+    for index, entry in enumerate(resumes):
+        if use_cache:
+            cache_keys[index] = analysis_cache_key(entry["resume_bytes"], job_description, ocr=ocr, ocr_dpi=ocr_dpi)
+            hit = get_cached_analysis(cache_keys[index], names[index], need_report=generate_report, with_analysis=True)
+            if hit is not None:
+                cached_result, cached_analysis = hit
+                cached += 1
+                ANALYSES.inc(outcome="cached")
+                report_fields = {"report_path": cached_result["report_path"], "report_url": cached_result["report_url"]}
+                emit_result(index, dict(cached_result, report_path=None, report_url=None))
+                comparison_entries[index] = {
+                    "filename": names[index],
+                    "result": cached_result,
+                    "found_skills": cached_analysis.found_skills()
+                }
+                if generate_report:
+                    send(dict(report_fields, type="report", index=index, success=True))
+                continue
+        pending.append(index)
+
+    # Smallest files first, which minimizes the mean time to each result. The
+    # file size stands in for the extraction and scoring work: it costs nothing
+    # to read, and scanned pages, the slowest to process, are also the largest
+    pending.sort(key=lambda index: len(resumes[index]["resume_bytes"]))
+
+    def finish_comparison(future):
+        # Runs on the renderer thread
+        try:
+            report_path = future.result()
+        except Exception as e:
+            print(f"Comparison report error: {str(e)}", file=sys.stderr)
+            report_path = None
+        url = report_url(report_path)
+        if report_path:
+            record_report(
+                report_path,
+                job_hash=batch_job_hash,
+                filename=f"Comparison of {len(comparison_entries)} resumes",
+                user_id=user_id
+            )
+        send({"type": "comparison_report", "report_path": url, "report_url": url, "success": report_path is not None})
+
+    with ThreadPoolExecutor(max_workers=1) as renderer:
+        if pending:
+            workers = min(workers or os.cpu_count() or 1, len(pending))
+            executor = _worker_pool(workers)
+            futures = {
+                executor.submit(
+                    _score_entry, index, resumes[index]["resume_bytes"], job_description, names[index], ocr, ocr_dpi,
+                    expires_at
+                ): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    index, result, report_input, worker_metrics = future.result()
+                except Exception as e:
+                    # A worker crash only loses the resume it was scoring, which still gets its result event
+                    print(f"Worker error: {str(e)}", file=sys.stderr)
+                    FAILURES.inc(type="worker_crash")
+                    emit_result(futures[future], error_response(f"Error analyzing resume: {str(e)}"))
+                    continue
+                METRICS.merge(worker_metrics)
+                emit_result(index, result)
+                if report_input is None:
+                    continue
+                comparison_entries[index] = {
+                    "filename": names[index],
+                    "result": result,
+                    "found_skills": report_input[0].found_skills()
+                }
+                if generate_report:
+                    # Rendering runs alongside the remaining scoring and is reported when done
+                    report = renderer.submit(_render_report, names[index], report_input, deadline)
+                    report.add_done_callback(
+                        lambda report, index=index, result=result, analysis_result=report_input[0]:
+                            finish_report(index, result, analysis_result, report)
+                    )
+                elif use_cache and not result.get("partial"):
+                    RESULT_CACHE.put(cache_keys[index], cache_entry(report_input[0]))
+
+        if comparison_report and comparison_entries:
+            # Queued behind the per-resume reports; every result has already been emitted
+            entries = [comparison_entries[index] for index in sorted(comparison_entries)]
+            renderer.submit(_render_comparison, entries, deadline).add_done_callback(finish_comparison)
+
+    ranking = sorted(scores, key=lambda index: scores[index], reverse=True)
+    elapsed = time.perf_counter() - start
+    summary = {
+        "type": "summary",
+        "total": len(resumes),
+        "completed": len(scores),
+        "failed": failed,
+        "cached": cached,
+        "partial": partial,
+        "ranking": [{"index": index, "filename": names[index], "score": scores[index]} for index in ranking],
+        "first_result_seconds": round(first_result, 3) if first_result is not None else None,
+        "elapsed_seconds": round(elapsed, 3),
+        "success": True
+    }
+    send(summary)
+    return summary
+
+def main():
+    # Keep stray prints from libraries out of the result stream
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    def emit(event):
+        out.write(json.dumps(event, ensure_ascii=True) + "\n")
+        out.flush()
+
+    try:
+        parser = argparse.ArgumentParser(description="Analyze several resumes against one job description, streaming results")
+        parser.add_argument("--resumes", nargs="+", help="Paths to resume files")
+        parser.add_argument("--job", dest="job_description", help="Job description text")
+        parser.add_argument("--job-file", help="Path to a file containing the job description")
+        parser.add_argument("--stdin", action="store_true",
+                            help="Read the resumes and job description from stdin (see protocol.py)")
+        parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+        parser.add_argument("--no-ocr", action="store_true", help="Disable OCR of image-only pages")
+        parser.add_argument("--ocr-dpi", type=int, default=DEFAULT_OCR_DPI, help="Resolution used to rasterize pages for OCR")
+        parser.add_argument("--no-reports", action="store_true", help="Do not render PDF reports")
+        parser.add_argument("--comparison-report", action="store_true",
+                            help="Also render one comparison PDF of the whole batch")
+        parser.add_argument("--no-cache", action="store_true", help="Always re-run the analysis instead of using cached results")
+        parser.add_argument("--metrics-file", help="Write the batch's metrics (Prometheus text format) to this file")
+        parser.add_argument("--user-id", help="Owner of the generated reports in the report catalog")
+        parser.add_argument("--budget-seconds", type=float,
+                            help="Time budget of the whole batch; resumes still being scored when it runs out get partial results")
+
+        args = parser.parse_args()
+        # The budget counts from process start
+        started_at = time.time()
+        budget_seconds = args.budget_seconds
+        user_id = args.user_id
+        comparison_report = args.comparison_report
+
+        job_description = args.job_description
+        if args.job_file:
+            with open(args.job_file, "r", encoding="utf-8") as f:
+                job_description = f.read()
+
+        resumes = []
+        if args.stdin:
+            try:
+                request = read_batch_request(sys.stdin.buffer)
+            except ProtocolError as e:
+                emit(error_response(f"Invalid request: {str(e)}"))
+                return 1
+            if request is None:
+                emit(error_response("No request received on stdin"))
+                return 1
+            resumes = request["resumes"]
+            job_description = request.get("job_description") or job_description
+            budget_seconds = request.get("budget_seconds") or budget_seconds
+            user_id = request.get("user_id") or user_id
+            comparison_report = request.get("comparison_report") or comparison_report
+        for resume_path in args.resumes or []:
+            if not os.path.exists(resume_path):
+                emit(error_response(f"Resume file not found: {resume_path}"))
+                return 1
+            with open(resume_path, "rb") as f:
+                resumes.append({"resume_bytes": f.read(), "original_filename": os.path.basename(resume_path)})
+
+        if not resumes:
+            emit(error_response("At least one resume is required"))
+            return 1
+
+        if not job_description:
+            emit(error_response("Job description is required"))
+            return 1
+
+        stream_batch(
+            resumes,
+            job_description,
+            emit,
+            workers=args.workers,
+            ocr=not args.no_ocr,
+            ocr_dpi=args.ocr_dpi,
+            use_cache=not args.no_cache,
+            generate_report=not args.no_reports,
+            deadline=Deadline(expires_at=started_at + float(budget_seconds)) if budget_seconds else None,
+            user_id=user_id,
+            comparison_report=comparison_report
+        )
+        if args.metrics_file:
+            METRICS.write_textfile(args.metrics_file)
+        return 0
+
+    except Exception as e:
+        emit(error_response(f"Application error: {str(e)}"))
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
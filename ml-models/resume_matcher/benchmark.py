@@ -0,0 +1,566 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import traceback
+import contextlib
+
+# Third-party imports
+import docx
+import numpy as np
+from fpdf import FPDF
+
+# Local imports
+import text_extraction
+from text_extraction import PARALLEL_PAGE_THRESHOLD, detect_format, extract_document_text
+from result_cache import ResultCache
+
+# Sample resume used when no input files are given
+SAMPLE_RESUME_LINES = [
+    "Jane Doe",
+    "jane.doe@example.com | +1 555 0100",
+    "SUMMARY",
+    "Full stack developer with 6 years of experience building web applications.",
+    "EXPERIENCE",
+    "Senior Software Engineer, Example Corp (2020 - Present)",
+    "- Built microservices in node.js and express backed by mongodb and redis",
+    "- Led a team of four engineers and mentored junior developers",
+    "- Set up ci/cd pipelines with github actions, docker and kubernetes on aws",
+    "Software Engineer, Sample Inc (2017 - 2020)",
+    "- Developed react and redux front ends with typescript and tailwind",
+    "- Wrote rest api endpoints in python with django and postgresql",
+    "SKILLS",
+    "javascript, typescript, python, react, node.js, express, django, sql, docker, aws",
+    "communication, teamwork, problem solving, time management",
+    "EDUCATION",
+    "B.Sc. Computer Science, State University (2017)",
+    "PROJECTS",
+    "Resume matcher - machine learning and nlp based ATS scoring tool",
+]
+
+def build_sample_pdf(lines, pages=1):
+    """Render sample resume lines into PDF bytes"""
+    pdf = FPDF()
+    pdf.set_font("Arial", size=11)
+    for _ in range(pages):
+        pdf.add_page()
+        for line in lines:
+            pdf.multi_cell(0, 6, txt=line)
+    return pdf.output(dest='S').encode('latin-1')
+
+def build_sample_docx(lines, pages=1):
+    """Render sample resume lines into DOCX bytes, with the skills in a table"""
+    document = docx.Document()
+    for _ in range(pages):
+        for line in lines:
+            document.add_paragraph(line)
+        table = document.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "Languages"
+        table.cell(0, 1).text = "javascript, python, sql"
+        table.cell(1, 0).text = "Tools"
+        table.cell(1, 1).text = "docker, git, jira"
+        document.add_page_break()
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def _time_calls(func, iterations):
+    """Call func `iterations` times and return the elapsed seconds"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter() - start
+
+def benchmark_extraction(samples, iterations=20, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Measure extraction throughput per format, without and with the text cache"""
+    results = {}
+    for name, data in samples.items():
+        file_format = detect_format(data)
+        cold = _time_calls(
+            lambda: extract_document_text(data, ocr=False, use_cache=False, parallel_threshold=parallel_threshold),
+            iterations
+        )
+        # Prime the cache, then measure hits
+        text = extract_document_text(data, ocr=False)
+        warm = _time_calls(lambda: extract_document_text(data, ocr=False), iterations)
+        results[name] = {
+            "format": file_format,
+            "bytes": len(data),
+            "chars": len(text),
+            "iterations": iterations,
+            "docs_per_sec": round(iterations / cold, 1) if cold else None,
+            "mb_per_sec": round(len(data) * iterations / cold / 1e6, 2) if cold else None,
+            "ms_per_doc": round(cold / iterations * 1000, 3),
+            "cached_ms_per_doc": round(warm / iterations * 1000, 4)
+        }
+    return results
+
+def build_sample_texts(count, seed=0):
+    """Vary the sample resume by shuffling and dropping lines, for corpus-level benchmarks"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        lines = [line for line in SAMPLE_RESUME_LINES if rng.random() > 0.2]
+        body = lines[3:]
+        rng.shuffle(body)
+        texts.append("\n".join(lines[:3] + body))
+    return texts
+
+def deep_sizeof(obj, seen):
+    """Bytes of an object and everything it references that is not in `seen` yet"""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, slot), seen) for slot in obj.__slots__ if hasattr(obj, slot))
+    return size
+
+def benchmark_profiles(texts, job_description, nlp):
+    """Memory per resume of the dict-based analysis artifacts versus the compact profile records"""
+    # Imported here so the extraction benchmark does not need the analyzer
+    from enhanced_analyzer import (
+        ALL_TECH_SKILLS, ALL_DOMAIN_SKILLS, SOFT_SKILLS, sanitize_text, clean_text, identify_resume_sections, extract_keywords,
+        calculate_term_frequency, extract_skills, categorize_skills, get_skill_lemmas, score_resume_text
+    )
+    from profiles import SKILL_REGISTRY, AnalysisResult, build_resume_profile
+
+    skill_lemmas = get_skill_lemmas(nlp)
+    texts = [sanitize_text(text) for text in texts]
+    docs = [nlp(clean_text(text)) for text in texts]
+    # As read back from the result cache, without the run's section reuse
+    analyses = [
+        AnalysisResult.from_record(score_resume_text(text, job_description, nlp)[0].to_record()) for text in texts
+    ]
+
+    def build_dicts():
+        artifacts = []
+        for text, doc, analysis in zip(texts, docs, analyses):
+            keywords = extract_keywords(doc)
+            skills = extract_skills(text, nlp, doc=doc, skill_lemmas=skill_lemmas)
+            artifacts.append({
+                "sections": identify_resume_sections(text),
+                "keywords": keywords,
+                "tf": calculate_term_frequency(keywords, max(1, len(doc))),
+                "skills": skills,
+                "domain_skills": extract_skills(text, nlp, ALL_DOMAIN_SKILLS, doc=doc, skill_lemmas=skill_lemmas),
+                "found_skills": categorize_skills(skills),
+                "analysis": json.loads(json.dumps(analysis.to_dict()))
+            })
+        return artifacts
+
+    def build_profiles():
+        return [
+            (build_resume_profile(text, nlp, skill_lemmas=skill_lemmas), analysis)
+            for text, analysis in zip(texts, analyses)
+        ]
+
+    # Objects that exist regardless of the artifacts (texts, skill names) are not counted
+    # (kept referenced while measuring so their ids are not reused)
+    shared_objects = [texts, ALL_TECH_SKILLS, ALL_DOMAIN_SKILLS, SOFT_SKILLS, SKILL_REGISTRY]
+    shared = set()
+    deep_sizeof(shared_objects, shared)
+
+    dict_artifacts = build_dicts()
+    profile_artifacts = build_profiles()
+    dict_bytes = deep_sizeof(dict_artifacts, set(shared))
+    profile_bytes = deep_sizeof(profile_artifacts, set(shared))
+    count = len(texts)
+    return {
+        "resumes": count,
+        "text_bytes_per_resume": round(sum(sys.getsizeof(text) for text in texts) / count),
+        "dict_bytes_per_resume": round(dict_bytes / count),
+        "profile_bytes_per_resume": round(profile_bytes / count),
+        "reduction": round(dict_bytes / profile_bytes, 2) if profile_bytes else None
+    }
+
+# Skills drawn from for the generated analyses of the report benchmark, by TECH_SKILLS category
+SAMPLE_SKILLS = {
+    "programming_languages": ["python", "javascript", "typescript", "java", "go"],
+    "frontend": ["react", "angular", "vue", "redux"],
+    "backend": ["node.js", "express", "django", "flask"],
+    "database": ["sql", "postgresql", "mongodb", "redis", "mysql"],
+    "devops": ["aws", "docker", "kubernetes", "terraform", "github actions"],
+}
+SAMPLE_SOFT_SKILLS = ["communication", "teamwork", "leadership", "problem solving", "time management"]
+
+def build_sample_analyses(count, seed=0):
+    """Generate (filename, AnalysisResult) pairs like the output of score_resume_text"""
+    from enhanced_analyzer import generate_suggestions
+    from profiles import AnalysisResult
+
+    rng = random.Random(seed)
+    analyses = []
+    for index in range(count):
+        technical = {category: rng.sample(skills, rng.randint(1, len(skills) - 1))
+                     for category, skills in SAMPLE_SKILLS.items()}
+        found = {skill for skills in technical.values() for skill in skills}
+        missing = [skill for skills in SAMPLE_SKILLS.values() for skill in skills if skill not in found]
+        score = round(rng.uniform(30, 95), 1)
+        analyses.append((f"candidate_{index + 1}.pdf", AnalysisResult.from_dict({
+            "score": score,
+            "keyword_match": round(rng.uniform(20, 100), 1),
+            "semantic_similarity": round(rng.uniform(20, 100), 1),
+            "domain_match": round(rng.uniform(0, 100), 1),
+            "section_scores": {section: round(rng.uniform(0, 100), 1) for section in ("skills", "experience", "education")},
+            "missing_skills": missing,
+            "found_skills": {"technical": technical, "domain": {}, "soft": rng.sample(SAMPLE_SOFT_SKILLS, 3)},
+            "suggestions": generate_suggestions(missing, {"skills": "", "experience": ""}, score),
+        })))
+    return analyses
+
+def _pdf_pages(paths):
+    import fitz
+    pages = 0
+    for path in paths:
+        with fitz.open(path) as document:
+            pages += document.page_count
+    return pages
+
+def benchmark_report_formats(analyses, iterations=3):
+    """Milliseconds per report of each step of the template renderer: preparing
+    (sanitizing) the fields, and rendering them as PDF, HTML and JSON"""
+    from enhanced_analyzer import REPORT_TEMPLATE, report_fields
+    from report_renderer import ReportTemplate
+
+    raw_fields = [report_fields(filename, analysis) for filename, analysis in analyses]
+    prepared = [REPORT_TEMPLATE.prepare(fields) for fields in raw_fields]
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        path = os.path.join(out_dir, "report.pdf")
+        steps = {
+            # A fresh template each round, so its sanitize memo starts cold
+            "prepare": lambda: [ReportTemplate(REPORT_TEMPLATE.title, REPORT_TEMPLATE.blocks, REPORT_TEMPLATE.sanitize)
+                                .prepare(fields) for fields in raw_fields],
+            "pdf": lambda: [REPORT_TEMPLATE.render(fields, "pdf", path, prepared=True) for fields in prepared],
+            "html": lambda: [REPORT_TEMPLATE.render(fields, "html", prepared=True) for fields in prepared],
+            "json": lambda: [REPORT_TEMPLATE.render(fields, "json", prepared=True) for fields in prepared],
+        }
+        for step, func in steps.items():
+            best = min(_time_calls(func, 1) for _ in range(iterations))
+            results[step] = {"ms_per_report": round(best / len(analyses) * 1000, 3)}
+    return results
+
+def benchmark_reports(analyses, iterations=3):
+    """Render the reports of a batch one PDF per resume versus one comparison PDF, in pages/sec,
+    with the time of each template renderer format"""
+    from enhanced_analyzer import build_result, generate_pdf_report
+    from comparison_report import generate_comparison_report
+
+    entries = [
+        {"filename": filename, "result": build_result(analysis, filename), "found_skills": analysis.found_skills()}
+        for filename, analysis in analyses
+    ]
+    variants = {
+        "per_file": lambda out_dir: [
+            generate_pdf_report(filename, analysis, "", "", out_dir=out_dir) for filename, analysis in analyses
+        ],
+        "comparison": lambda out_dir: [generate_comparison_report(entries, out_dir=out_dir)],
+    }
+    results = {}
+    for name, render in variants.items():
+        best = None
+        for _ in range(iterations):
+            with tempfile.TemporaryDirectory() as out_dir:
+                # The renderers log to stdout, which carries the results here
+                with contextlib.redirect_stdout(sys.stderr):
+                    start = time.perf_counter()
+                    paths = render(out_dir)
+                    elapsed = time.perf_counter() - start
+                pages = _pdf_pages(paths)
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {
+            "files": len(paths),
+            "pages": pages,
+            "seconds": round(best, 4),
+            "pages_per_sec": round(pages / best, 1) if best else None,
+            "resumes_per_sec": round(len(analyses) / best, 1) if best else None
+        }
+    results["formats"] = benchmark_report_formats(analyses, iterations=iterations)
+    results["resumes"] = len(analyses)
+    return results
+
+def build_sample_index_entries(count, dim=96, seed=0):
+    """Generate IndexEntry records with skewed skill frequencies and random vectors, for index benchmarks"""
+    from profiles import SKILL_REGISTRY
+    from resume_index import IndexEntry, _unit_vector, _skill_array
+
+    rng = np.random.default_rng(seed)
+    skills = len(SKILL_REGISTRY)
+    # Some skills are far more common than others, as in real resumes
+    popularity = 1.0 / np.arange(1, skills + 1)
+    popularity /= popularity.sum()
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    entries = []
+    for index in range(count):
+        skill_ids = rng.choice(skills, size=rng.integers(5, 25), replace=False, p=popularity)
+        entries.append(IndexEntry(
+            resume_id=f"resume-{index}",
+            skill_ids=_skill_array(skill_ids),
+            domain_skill_ids=_skill_array(skill_ids[:3]),
+            vector=_unit_vector(vectors[index])
+        ))
+    return entries
+
+def build_sample_index_queries(count, dim=96, seed=1):
+    """Generate IndexQuery records for index benchmarks"""
+    from enhanced_analyzer import SCORE_WEIGHTS
+    from profiles import SKILL_REGISTRY
+    from resume_index import IndexQuery, _unit_vector, _skill_array
+
+    rng = np.random.default_rng(seed)
+    weights = (SCORE_WEIGHTS["semantic"], SCORE_WEIGHTS["keyword"], SCORE_WEIGHTS["domain"])
+    queries = []
+    for _ in range(count):
+        skill_ids = rng.choice(len(SKILL_REGISTRY), size=rng.integers(6, 15), replace=False)
+        queries.append(IndexQuery(
+            skill_ids=_skill_array(skill_ids),
+            domain_skill_ids=_skill_array(skill_ids[:3]),
+            vector=_unit_vector(rng.standard_normal(dim, dtype=np.float32)),
+            weights=weights
+        ))
+    return queries
+
+def benchmark_shards(entries, queries, shard_counts=(1, 2, 4, 8), top_k=10):
+    """Query latency and throughput of the sharded resume index as the shard count grows"""
+    from resume_index import ShardedResumeIndex
+
+    results = {}
+    for shards in shard_counts:
+        with ShardedResumeIndex(shards) as index:
+            start = time.perf_counter()
+            index.add(entries)
+            # Warm up: the first query compacts each shard
+            index.query(queries[0], top_k=top_k)
+            load_seconds = time.perf_counter() - start
+
+            latencies = []
+            for job_query in queries:
+                start = time.perf_counter()
+                reply = index.query(job_query, top_k=top_k)
+                latencies.append(time.perf_counter() - start)
+            stats = index.stats()
+        latencies = np.array(latencies) * 1000
+        results[str(shards)] = {
+            "load_seconds": round(load_seconds, 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "mean_ms": round(float(latencies.mean()), 3),
+            "queries_per_sec": round(1000 / float(latencies.mean()), 1),
+            "candidates_per_query": reply["candidates"],
+            "rss_mb": round(stats["rss_bytes"] / (1024 * 1024), 1),
+            "max_shard_rss_mb": round(max(shard["rss_bytes"] for shard in stats["shards"]) / (1024 * 1024), 1)
+        }
+    return {"resumes": len(entries), "queries": len(queries), "top_k": top_k, "shards": results}
+
+def benchmark_pool(entries, job_skills, metrics=("jaccard", "cosine"), threshold=0.8, memory_mb=256):
+    """Time of each step of the applicant-pool analytics on a generated pool"""
+    from pool_analytics import analyze_pool
+
+    resume_ids = [entry.resume_id for entry in entries]
+    skill_lists = [entry.skill_ids for entry in entries]
+    results = {}
+    for metric in metrics:
+        start = time.perf_counter()
+        summary = analyze_pool(resume_ids, skill_lists, job_skills=job_skills, threshold=threshold,
+                               metric=metric, memory_mb=memory_mb)
+        results[metric] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "steps": summary["seconds"],
+            "similar_pairs": summary["similar_pairs"],
+            "clusters": len(summary["clusters"])
+        }
+    return {"resumes": len(entries), "threshold": threshold, "memory_mb": memory_mb, "metrics": results}
+
+def _first_result(mode, resume_path, job_description, snapshot_path):
+    """Runs in a fresh process: load the pipeline one way and analyze one resume"""
+    start = time.perf_counter()
+    from enhanced_analyzer import analyze_resume, get_skill_lemmas
+    import snapshot
+    imported = time.perf_counter()
+
+    if mode == "snapshot":
+        nlp = snapshot.load_snapshot(snapshot_path)
+    else:
+        nlp = snapshot.spacy.load(snapshot.DEFAULT_MODEL)
+        get_skill_lemmas(nlp)
+    loaded = time.perf_counter()
+
+    with open(resume_path, "rb") as f:
+        result = analyze_resume(None, job_description, nlp, resume_bytes=f.read(), use_cache=False, generate_report=False)
+    analyzed = time.perf_counter()
+    return {
+        "success": bool(result.get("success")),
+        "import_seconds": round(imported - start, 3),
+        "load_seconds": round(loaded - imported, 3),
+        "analysis_seconds": round(analyzed - loaded, 3)
+    }
+
+def benchmark_startup(resume_path, job_file, runs=3):
+    """Time-to-first-result of a fresh worker process, loading the model package versus a snapshot"""
+    import snapshot
+
+    results = {}
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        snapshot_path = os.path.join(snapshot_dir, "analyzer.snapshot")
+        snapshot_info = snapshot.build_snapshot(snapshot_path)
+        for mode in ("model", "snapshot"):
+            runs_data = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                child = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "first-result", mode,
+                     "--resume", resume_path, "--job-file", job_file, "--snapshot", snapshot_path],
+                    capture_output=True, text=True, check=True
+                )
+                elapsed = time.perf_counter() - start
+                timings = json.loads(child.stdout.strip().splitlines()[-1])
+                runs_data.append(dict(timings, total_seconds=round(elapsed, 3)))
+            results[mode] = {
+                "runs": runs_data,
+                "best_total_seconds": min(run["total_seconds"] for run in runs_data),
+                "best_load_seconds": min(run["load_seconds"] for run in runs_data)
+            }
+    results["snapshot_bytes"] = snapshot_info["bytes"]
+    return results
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Benchmarks for the resume analyzer")
+        subparsers = parser.add_subparsers(dest="command", required=True)
+
+        extraction = subparsers.add_parser("extraction", help="Text extraction throughput for PDF and DOCX")
+        extraction.add_argument("--files", nargs="*", help="Resume files to benchmark (default: generated samples)")
+        extraction.add_argument("--pages", type=int, default=2, help="Pages per generated sample")
+        extraction.add_argument("--iterations", type=int, default=20, help="Extractions per sample")
+        extraction.add_argument("--parallel-page-threshold", type=int, default=PARALLEL_PAGE_THRESHOLD,
+                                help="Extract PDFs with at least this many pages in parallel (0 disables)")
+
+        profiles = subparsers.add_parser("profiles", help="Memory per resume of dict artifacts versus profile records")
+        profiles.add_argument("--files", nargs="*", help="Resume files to profile (default: generated samples)")
+        profiles.add_argument("--count", type=int, default=200, help="Number of generated sample resumes")
+        profiles.add_argument("--job-file", help="Job description file (default: job_description.txt)")
+
+        startup = subparsers.add_parser("startup", help="Time-to-first-result of a fresh worker, with and without a snapshot")
+        startup.add_argument("--resume", help="Resume file to analyze (default: generated sample)")
+        startup.add_argument("--job-file", help="Job description file (default: job_description.txt)")
+        startup.add_argument("--runs", type=int, default=3, help="Fresh processes per variant")
+
+        reports = subparsers.add_parser("reports", help="Report render time: per-resume versus comparison PDFs, and each output format")
+        reports.add_argument("--count", type=int, default=10, help="Resumes in the batch")
+        reports.add_argument("--iterations", type=int, default=3, help="Renders per variant (the best is kept)")
+
+        shards = subparsers.add_parser("shards", help="Query latency of the sharded resume index by shard count")
+        shards.add_argument("--count", type=int, default=100000, help="Generated resumes in the index")
+        shards.add_argument("--dim", type=int, default=96, help="Document vector width")
+        shards.add_argument("--queries", type=int, default=50, help="Queries per shard count")
+        shards.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8], help="Shard counts to compare")
+        shards.add_argument("--top-k", type=int, default=10, help="Resumes returned per query")
+
+        pool = subparsers.add_parser("pool", help="Applicant-pool analytics time on a generated pool")
+        pool.add_argument("--count", type=int, default=50000, help="Generated resumes in the pool")
+        pool.add_argument("--threshold", type=float, default=0.8, help="Redundancy similarity threshold")
+        pool.add_argument("--memory-mb", type=int, default=256, help="Memory budget of one pairwise block")
+
+        first_result = subparsers.add_parser("first-result", help="Analyze one resume in this process (used by startup)")
+        first_result.add_argument("mode", choices=["model", "snapshot"])
+        first_result.add_argument("--resume", required=True)
+        first_result.add_argument("--job-file", required=True)
+        first_result.add_argument("--snapshot", required=True)
+
+        args = parser.parse_args()
+        default_job_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_description.txt")
+
+        if args.command == "extraction":
+            if args.files:
+                samples = {}
+                for path in args.files:
+                    with open(path, "rb") as f:
+                        samples[os.path.basename(path)] = f.read()
+            else:
+                samples = {
+                    "sample.pdf": build_sample_pdf(SAMPLE_RESUME_LINES, pages=args.pages),
+                    "sample.docx": build_sample_docx(SAMPLE_RESUME_LINES, pages=args.pages)
+                }
+            # Keep the benchmark from writing into the real text cache
+            with tempfile.TemporaryDirectory() as cache_dir:
+                text_extraction.TEXT_CACHE = ResultCache(
+                    memory_size=text_extraction.TEXT_MEMORY_CACHE_SIZE, cache_dir=cache_dir, name="text"
+                )
+                results = benchmark_extraction(
+                    samples,
+                    iterations=args.iterations,
+                    parallel_threshold=args.parallel_page_threshold
+                )
+
+        elif args.command == "profiles":
+            import spacy
+            if args.files:
+                texts = []
+                for path in args.files:
+                    with open(path, "rb") as f:
+                        texts.append(extract_document_text(f.read(), ocr=False, use_cache=False))
+            else:
+                texts = build_sample_texts(args.count)
+            with open(args.job_file or default_job_file, "r", encoding="utf-8") as f:
+                job_description = f.read()
+            results = benchmark_profiles(texts, job_description, spacy.load("en_core_web_sm"))
+
+        elif args.command == "startup":
+            with tempfile.TemporaryDirectory() as sample_dir:
+                resume_path = args.resume
+                if not resume_path:
+                    resume_path = os.path.join(sample_dir, "sample.pdf")
+                    with open(resume_path, "wb") as f:
+                        f.write(build_sample_pdf(SAMPLE_RESUME_LINES))
+                results = benchmark_startup(resume_path, args.job_file or default_job_file, runs=args.runs)
+
+        elif args.command == "reports":
+            results = benchmark_reports(build_sample_analyses(args.count), iterations=args.iterations)
+
+        elif args.command == "shards":
+            results = benchmark_shards(
+                build_sample_index_entries(args.count, dim=args.dim),
+                build_sample_index_queries(args.queries, dim=args.dim),
+                shard_counts=args.shards,
+                top_k=args.top_k
+            )
+
+        elif args.command == "pool":
+            results = benchmark_pool(
+                build_sample_index_entries(args.count, dim=1),
+                job_skills=["python", "react", "node.js", "docker", "aws", "sql", "communication"],
+                threshold=args.threshold,
+                memory_mb=args.memory_mb
+            )
+
+        elif args.command == "first-result":
+            with open(args.job_file, "r", encoding="utf-8") as f:
+                job_description = f.read()
+            # Only the timings go to stdout
+            stdout = sys.stdout
+            sys.stdout = sys.stderr
+            results = _first_result(args.mode, args.resume, job_description, args.snapshot)
+            sys.stdout = stdout
+            print(json.dumps(results))
+            return 0
+
+        print(json.dumps(results, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"Benchmark failed: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
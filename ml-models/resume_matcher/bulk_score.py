@@ -0,0 +1,279 @@
+import os
+import io
+import sys
+import csv
+import json
+import glob
+import time
+import argparse
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Local imports
+from enhanced_analyzer import analyze_resume
+from metrics import METRICS, FAILURES
+from snapshot import load_pipeline
+
+# File types picked up when a directory is given
+RESUME_EXTENSIONS = (".pdf", ".docx")
+
+# Columns written in CSV mode
+CSV_FIELDS = [
+    "resume", "job", "success", "score", "keyword_match", "semantic_similarity",
+    "domain_match", "missing_keywords", "report_path", "error"
+]
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+# Per-worker state, set up once by _init_worker
+_worker_nlp = None
+_worker_options = {}
+
+def collect_resumes(patterns):
+    """Expand directories and glob patterns into a sorted list of resume files"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                if name.lower().endswith(RESUME_EXTENSIONS):
+                    paths.add(os.path.join(pattern, name))
+        else:
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths)
+
+def load_jobs(job_files):
+    """Read job description files into a list of (job_id, text)"""
+    jobs = []
+    for job_file in job_files:
+        with open(job_file, "r", encoding="utf-8") as f:
+            jobs.append((os.path.basename(job_file), f.read()))
+    return jobs
+
+def task_key(resume_path, job_id):
+    """Checkpoint key of one (resume, job) pair"""
+    return f"{resume_path}\t{job_id}"
+
+def load_checkpoint(checkpoint_path):
+    """Return the set of task keys already completed by a previous run"""
+    done = set()
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line:
+                    done.add(line)
+    return done
+
+def _init_worker(options):
+    global _worker_nlp, _worker_options
+    _worker_options = options
+    _worker_nlp = load_pipeline()
+    # Forked workers start with a copy of the parent's metrics, which the parent already counts
+    METRICS.reset()
+
+def _score_task(resume_path, job_id, job_text):
+    # Runs in worker processes; the per-file log lines are only kept in verbose mode
+    output = io.StringIO()
+    redirect = contextlib.nullcontext() if _worker_options.get("verbose") else contextlib.redirect_stderr(output)
+    with redirect, contextlib.redirect_stdout(output):
+        result = analyze_resume(
+            resume_path,
+            job_text,
+            _worker_nlp,
+            generate_report=_worker_options.get("reports", False),
+            use_cache=_worker_options.get("use_cache", True)
+        )
+    # The metrics recorded for this pair go back to the parent with its result
+    return resume_path, job_id, result, METRICS.snapshot(reset=True)
+
+def to_row(resume_path, job_id, result):
+    """Flatten an analysis result into an output row"""
+    return {
+        "resume": resume_path,
+        "job": job_id,
+        "success": bool(result.get("success")),
+        "score": result.get("score"),
+        "keyword_match": result.get("keyword_match"),
+        "semantic_similarity": result.get("semantic_similarity"),
+        "domain_match": result.get("domain_match"),
+        "section_scores": result.get("section_scores"),
+        "missing_keywords": result.get("missing_keywords"),
+        "report_path": result.get("report_path"),
+        "error": result.get("error")
+    }
+
+class ResultWriter:
+    """Append result rows to a JSONL or CSV file (or stdout), flushing every row"""
+
+    def __init__(self, output_path, output_format):
+        self.output_format = output_format
+        if output_path in (None, "-"):
+            self.file = sys.stdout
+            new_file = True
+        else:
+            new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+            self.file = open(output_path, "a", encoding="utf-8", newline="")
+        if output_format == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self.csv.writeheader()
+
+    def write(self, row):
+        if self.output_format == "csv":
+            row = dict(row, missing_keywords=";".join(row.get("missing_keywords") or []))
+            self.csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=True) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def run_bulk(resume_paths, jobs, writer, checkpoint_path, workers=None, options=None):
+    """Score the cross-product of resumes and jobs with a worker pool.
+
+    Results are streamed to `writer` as they complete and every finished pair
+    is recorded in the checkpoint file, so an interrupted run can be resumed.
+    Returns a summary dict.
+    """
+    options = options or {}
+    done = load_checkpoint(checkpoint_path)
+    tasks = [
+        (resume_path, job_id, job_text)
+        for resume_path in resume_paths
+        for job_id, job_text in jobs
+        if task_key(resume_path, job_id) not in done
+    ]
+    total = len(tasks)
+    skipped = len(resume_paths) * len(jobs) - total
+    if skipped:
+        print(f"Resuming: {skipped} pair(s) already done according to {checkpoint_path}", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    completed = 0
+    failed = 0
+    start = time.perf_counter()
+    last_report = start
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as executor:
+        pending = set()
+        task_iter = iter(tasks)
+        # Keep a bounded number of tasks in flight instead of submitting everything up front
+        max_in_flight = workers * 4
+
+        while True:
+            while len(pending) < max_in_flight:
+                task = next(task_iter, None)
+                if task is None:
+                    break
+                pending.add(executor.submit(_score_task, *task))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                try:
+                    resume_path, job_id, result, worker_metrics = future.result()
+                except Exception as e:
+                    # The worker itself failed; the pair is retried on the next run
+                    print(f"Worker error: {str(e)}", file=sys.stderr)
+                    FAILURES.inc(type="worker_crash")
+                    failed += 1
+                    continue
+                METRICS.merge(worker_metrics)
+                writer.write(to_row(resume_path, job_id, result))
+                # Record the pair only after its row is written
+                checkpoint.write(task_key(resume_path, job_id) + "\n")
+                checkpoint.flush()
+                completed += 1
+                if not result.get("success"):
+                    failed += 1
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                rate = completed / (now - start)
+                eta = (total - completed) / rate if rate else 0
+                print(f"Progress: {completed}/{total} ({rate:.2f} resumes/sec, ETA {format_duration(eta)})", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total": total,
+        "completed": completed,
+        "failed": failed,
+        "skipped": skipped,
+        "elapsed_seconds": round(elapsed, 2),
+        "resumes_per_sec": round(completed / elapsed, 2) if elapsed else None
+    }
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Score many resumes against one or more job descriptions")
+        parser.add_argument("--resumes", nargs="+", required=True, help="Resume directories or glob patterns")
+        parser.add_argument("--jobs", nargs="+", required=True, help="Job description text files")
+        parser.add_argument("--output", default="-", help="Output file (default: stdout)")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format (default: from the output extension, else jsonl)")
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+        parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+        parser.add_argument("--reports", action="store_true", help="Also render a PDF report for every pair")
+        parser.add_argument("--no-cache", action="store_true", help="Do not use or fill the result cache")
+        parser.add_argument("--verbose", action="store_true", help="Show per-resume analyzer output")
+        parser.add_argument("--metrics-file", help="Write the run's metrics (Prometheus text format) to this file")
+
+        args = parser.parse_args()
+
+        output_format = args.format
+        if not output_format:
+            output_format = "csv" if args.output.lower().endswith(".csv") else "jsonl"
+
+        checkpoint_path = args.checkpoint
+        if not checkpoint_path:
+            if args.output == "-":
+                print("ERROR: --checkpoint is required when writing to stdout", file=sys.stderr)
+                return 1
+            checkpoint_path = args.output + ".checkpoint"
+
+        resume_paths = collect_resumes(args.resumes)
+        if not resume_paths:
+            print("ERROR: No resumes found", file=sys.stderr)
+            return 1
+        jobs = load_jobs(args.jobs)
+
+        print(f"Scoring {len(resume_paths)} resume(s) against {len(jobs)} job description(s)", file=sys.stderr)
+        writer = ResultWriter(args.output, output_format)
+        try:
+            summary = run_bulk(
+                resume_paths,
+                jobs,
+                writer,
+                checkpoint_path,
+                workers=args.workers,
+                options={"reports": args.reports, "use_cache": not args.no_cache, "verbose": args.verbose}
+            )
+        finally:
+            writer.close()
+            if args.metrics_file:
+                METRICS.write_textfile(args.metrics_file)
+
+        print(f"SUMMARY: {json.dumps(summary)}", file=sys.stderr)
+        return 0
+
+    except KeyboardInterrupt:
+        print("Interrupted, re-run the same command to resume", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import os
+import sys
+from datetime import datetime
+
+# Local imports
+from enhanced_analyzer import REPORTS_DIR, sanitize_text
+from report_renderer import GREEN, ORANGE, ReportTemplate, render_pdf
+
+# Comparison report of a batch.
+#
+# Instead of one PDF per resume, a batch can be rendered as a single document:
+# a ranked summary table followed by one page per resume. Both parts are
+# report_renderer templates whose resolved blocks are drawn into one PDF. The
+# templates memoize their sanitizing, so the strings that repeat across
+# resumes (headings, category and skill names) are cleaned once and the cost
+# per resume is only its own content.
+
+SUMMARY_TEMPLATE = ReportTemplate(
+    "ATS Resume Comparison Report",
+    (
+        {"kind": "title", "text": "ATS Resume Comparison Report"},
+        {"kind": "space", "height": 10},
+        {"kind": "rule"},
+        {"kind": "text", "text": "Resumes: {count}", "height": 8},
+        {"kind": "text", "text": "Analysis Date: {report_time}", "height": 8},
+        {"kind": "space", "height": 4},
+        # (heading, width in mm, align)
+        {"kind": "table", "field": "rows", "columns": (
+            ("#", 10, "C"),
+            ("Resume", 90, "L"),
+            ("Score", 22, "C"),
+            ("Keywords", 22, "C"),
+            ("Semantic", 22, "C"),
+            ("Domain", 24, "C"),
+        )},
+    ),
+    sanitize_text
+)
+
+RESUME_TEMPLATE = ReportTemplate(
+    "ATS Resume Comparison Report",
+    (
+        {"kind": "page"},
+        {"kind": "heading", "text": "{rank}. {filename}", "size": 14, "height": 8, "wrap": True},
+        {"kind": "score", "text": "ATS Match Score: {score}%", "field": "score",
+         "thresholds": ((75, GREEN), (60, ORANGE))},
+        {"kind": "space", "height": 2},
+        {"kind": "section", "when": "section_scores", "blocks": (
+            {"kind": "heading", "text": "Section Match Scores:", "height": 8},
+            {"kind": "list", "field": "section_scores", "join": ", ", "wrap": True, "height": 6},
+            {"kind": "space", "height": 2},
+        )},
+        {"kind": "section", "when": "skills_found", "blocks": (
+            {"kind": "heading", "text": "Skills Found:", "height": 8},
+            {"kind": "groups", "field": "skill_groups", "label_format": "{label}:", "height": 6,
+             "empty": "No specific skills were identified in this resume."},
+            {"kind": "space", "height": 2},
+        )},
+        {"kind": "heading", "text": "Missing Skills:", "height": 8},
+        # Missing skills listed per resume, as in the single-resume report
+        {"kind": "list", "field": "missing_skills", "limit": 10, "join": ", ", "wrap": True, "height": 6,
+         "empty": "No significant missing skills found!"},
+        {"kind": "space", "height": 2},
+        {"kind": "section", "when": "suggestions", "blocks": (
+            {"kind": "heading", "text": "Improvement Suggestions:", "height": 8},
+            {"kind": "list", "field": "suggestions", "bullet": "- ", "wrap": True, "height": 6},
+        )},
+    ),
+    sanitize_text
+)
+
+def _ranked(entries):
+    return sorted(entries, key=lambda entry: entry["result"].get("score", 0), reverse=True)
+
+def summary_fields(ranked, report_time):
+    """Fields of SUMMARY_TEMPLATE for the ranked entries"""
+    rows = []
+    for rank, entry in enumerate(ranked, 1):
+        result = entry["result"]
+        rows.append([
+            str(rank),
+            entry["filename"],
+            f"{result.get('score', 0)}%",
+            f"{result.get('keyword_match', 0)}%",
+            f"{result.get('semantic_similarity', 0)}%",
+            f"{result.get('domain_match', 0)}%",
+        ])
+    return {"count": len(ranked), "report_time": report_time, "rows": rows}
+
+def resume_fields(rank, entry):
+    """Fields of RESUME_TEMPLATE for one ranked entry"""
+    result = entry["result"]
+    found_skills = entry.get("found_skills")
+    skill_groups = []
+    if found_skills is not None:
+        skill_groups = [
+            [category.replace('_', ' ').title(), skills]
+            for category, skills in found_skills.get("technical", {}).items()
+            if skills
+        ]
+        if found_skills.get("soft"):
+            skill_groups.append(["Soft Skills", found_skills["soft"]])
+    return {
+        "rank": rank,
+        "filename": entry["filename"],
+        "score": result.get("score", 0),
+        "section_scores": [
+            f"{section.capitalize()}: {value}%"
+            for section, value in (result.get("section_scores") or {}).items()
+            if value > 0
+        ],
+        "skills_found": found_skills is not None,
+        "skill_groups": skill_groups,
+        "missing_skills": result.get("missing_keywords") or [],
+        "suggestions": result.get("suggestions") or []
+    }
+
+def build_comparison_pdf(entries, report_time=None):
+    """Lay out the comparison of several analyzed resumes in one PDF document.
+
+    `entries` is a list of dicts with "filename", "result" (an API result, see
+    build_result) and optionally "found_skills" from the detailed analysis.
+    Resumes are ranked by score.
+    """
+    report_time = report_time or datetime.now().strftime("%Y-%m-%d %H:%M")
+    ranked = _ranked(entries)
+
+    # File names that sanitize to nothing are shown as "Resume"
+    summary = SUMMARY_TEMPLATE.prepare(summary_fields(ranked, report_time))
+    for row in summary["rows"]:
+        row[1] = row[1] or "Resume"
+    blocks = SUMMARY_TEMPLATE.layout(summary)
+    for rank, entry in enumerate(ranked, 1):
+        fields = RESUME_TEMPLATE.prepare(resume_fields(rank, entry))
+        fields["filename"] = fields["filename"] or "Resume"
+        blocks += RESUME_TEMPLATE.layout(fields)
+    return render_pdf(blocks)
+
+def generate_comparison_report(entries, out_dir=None):
+    """Render the comparison report of a batch and return its path"""
+    report_dir = out_dir if out_dir and os.path.exists(out_dir) else REPORTS_DIR
+    current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
+    pdf = build_comparison_pdf(entries)
+    report_path = os.path.join(report_dir, f"comparison_{len(entries)}_resumes_{current_time}_report.pdf")
+    pdf.output(report_path)
+    print(f"Comparison report generated at: {report_path}", file=sys.stderr)
+    return report_path
@@ -0,0 +1,413 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party imports
+from fpdf import FPDF
+
+# Local imports
+from enhanced_analyzer import TECH_SKILLS, DOMAIN_SKILLS, SOFT_SKILLS, SECTION_PATTERNS, identify_section_spans
+
+# Synthetic resume and job description corpus for scale testing.
+#
+# Job postings are drawn from the analyzer's own skill tables: a role (two or
+# three technical categories), a domain and some soft skills. Each resume
+# targets one posting and contains a chosen share of its skills (the overlap)
+# plus unrelated ones, laid out in sections whose headers come from the
+# analyzer's section patterns. A share of the resumes are near-duplicates of
+# earlier ones (same content, new contact line and reordered bullets), and
+# the length is set in pages.
+#
+# Every resume and job is generated from its own seeded RNG (seed, kind and
+# index), so a corpus is reproducible, can be generated in parallel, and any
+# single item can be regenerated without the others. The corpus directory
+# holds jobs/, resumes/ (1000 files per subdirectory), a manifest.jsonl with
+# each resume's job, overlap, skills and duplicate_of, and corpus.json with
+# the parameters.
+
+# Lines of text per generated page (A4, 6 mm lines, 15 mm margins) and
+# characters per line before the PDF wraps it
+LINES_PER_PAGE = 44
+CHARS_PER_LINE = 95
+# Resumes per subdirectory of resumes/
+FILES_PER_DIRECTORY = 1000
+FORMATS = ("txt", "pdf")
+
+FIRST_NAMES = [
+    "Aarav", "Olivia", "Liam", "Priya", "Noah", "Emma", "Mateo", "Sofia", "Wei", "Amara", "Lucas", "Chloe",
+    "Ravi", "Hannah", "Diego", "Fatima", "Ethan", "Yuki", "Omar", "Grace", "Ivan", "Leila", "Jonas", "Mia"
+]
+LAST_NAMES = [
+    "Sharma", "Smith", "Garcia", "Chen", "Okafor", "Muller", "Rossi", "Kim", "Patel", "Nguyen", "Silva",
+    "Johnson", "Kowalski", "Haddad", "Tanaka", "Brown", "Andersen", "Moreau", "Costa", "Ivanova"
+]
+COMPANIES = [
+    "Northwind Labs", "Bluepeak Systems", "Quantum Harbor", "Brightline Health", "Cedar Insights",
+    "Orbit Payments", "Lumen Retail", "Redwood Logistics", "Silverleaf Capital", "Atlas Media", "Nimbus Works",
+    "Harborview Insurance", "Pinecrest Software", "Vertex Mobility", "Helios Energy"
+]
+UNIVERSITIES = [
+    "State University", "Institute of Technology", "City College", "National University",
+    "Polytechnic University", "University of the North"
+]
+DEGREES = [
+    "B.Sc. Computer Science", "B.Tech Information Technology", "M.Sc. Software Engineering",
+    "B.Sc. Mathematics", "M.Sc. Information Systems", "B.E. Electronics"
+]
+CITIES = ["Pune", "Austin", "Berlin", "Toronto", "Lisbon", "Singapore", "Nairobi", "Dublin", "Seoul", "Sydney"]
+SPOKEN_LANGUAGES = ["English", "Hindi", "Spanish", "German", "French", "Mandarin", "Portuguese", "Japanese"]
+HOBBIES = ["chess", "hiking", "photography", "cycling", "cooking", "music", "open source", "running"]
+
+# Role titles by technical category; a job's title comes from its first category
+ROLE_TITLES = {
+    "programming_languages": "Software Engineer",
+    "frontend": "Frontend Developer",
+    "backend": "Backend Engineer",
+    "database": "Database Engineer",
+    "devops": "DevOps Engineer",
+    "tools": "Build and Release Engineer",
+    "concepts": "Software Architect"
+}
+SENIORITY = ["Junior", "", "Senior", "Lead"]
+
+# Bullet templates; {a} and {b} are skills of the resume. The fixed words
+# avoid every skill name, so a resume only mentions the skills it was given.
+BULLETS = [
+    "Built and maintained services with {a} and {b} handling millions of requests per day",
+    "Migrated a legacy platform to {a}, cutting page load times by {n} percent",
+    "Introduced {a} across {n} teams and wrote the onboarding guides for it",
+    "Owned the {a} data model and tuned queries, reducing costs by {n} percent",
+    "Automated releases with {a} and {b}, shortening the delivery cycle from weeks to days",
+    "Worked with product owners on {a} features used by {n} thousand customers",
+    "Improved reliability of {a} workloads to 99.{n} percent uptime",
+    "Reviewed code and coached {n} engineers on {a} and {b} best practices",
+]
+FILLER_BULLETS = [
+    "Took part in on-call rotations and wrote postmortems for production incidents",
+    "Worked closely with customers to understand their needs and priorities",
+    "Wrote internal documentation and ran knowledge sharing sessions",
+    "Helped hire and onboard new team members",
+]
+SUMMARIES = [
+    "{title} with {years} years of experience building products with {a} and {b}.",
+    "Results-driven {title} focused on {a}, with {years} years in fast-moving teams.",
+    "{title} with a track record of shipping {a} and {b} systems over {years} years.",
+]
+JOB_OPENINGS = [
+    "{company} is hiring a {title} to join our {domain} team.",
+    "We are looking for a {title} to help {company} grow its {domain} products.",
+    "Join {company} as a {title} and build the next generation of {domain} software.",
+]
+
+def section_headers():
+    """Header variants of each section, taken from the analyzer's section patterns.
+
+    Only variants the analyzer recognizes as that section are kept, so
+    generated resumes are sectioned as intended.
+    """
+    headers = {}
+    for section, pattern in SECTION_PATTERNS.items():
+        for variant in pattern.strip("()").split("|"):
+            header = variant.replace("\\s+", " ").title()
+            if list(identify_section_spans([header, "x"])) == ["header", section]:
+                headers.setdefault(section, []).append(header)
+    return headers
+
+SECTION_HEADERS = section_headers()
+
+def _rng(seed, kind, index):
+    # String seeds are hashed with SHA-512, so they are stable across runs and processes
+    return random.Random(f"{seed}:{kind}:{index}")
+
+def _header(rng, section):
+    header = rng.choice(SECTION_HEADERS[section])
+    return header.upper() if rng.random() < 0.5 else header
+
+def _skill_names(skills):
+    return sorted(set(skills))
+
+def generate_job(index, seed=0):
+    """One synthetic job posting: {"id", "title", "skills", "domain", "text"}"""
+    rng = _rng(seed, "job", index)
+    categories = rng.sample(list(TECH_SKILLS), rng.randint(2, 3))
+    domain = rng.choice(list(DOMAIN_SKILLS))
+    technical = [skill for category in categories for skill in rng.sample(TECH_SKILLS[category], rng.randint(2, 4))]
+    # The opening names the domain, which is its first domain skill
+    domain_skills = [DOMAIN_SKILLS[domain][0]] + rng.sample(DOMAIN_SKILLS[domain][1:], rng.randint(0, 2))
+    soft = rng.sample(SOFT_SKILLS, rng.randint(2, 4))
+    title = " ".join(part for part in (rng.choice(SENIORITY), ROLE_TITLES[categories[0]]) if part)
+    company = rng.choice(COMPANIES)
+
+    lines = [
+        title,
+        rng.choice(JOB_OPENINGS).format(company=company, title=title, domain=DOMAIN_SKILLS[domain][0]),
+        "",
+        "Requirements",
+    ]
+    lines += [f"- {rng.randint(1, 6)}+ years of hands-on experience with {skill}" for skill in technical]
+    lines.append(f"- Background in {', '.join(domain_skills)}")
+    lines.append(f"- Strong {', '.join(soft)}")
+    lines += ["", f"Location: {rng.choice(CITIES)} or remote"]
+    return {
+        "id": f"job-{index:05d}",
+        "title": title,
+        "domain": domain,
+        "skills": _skill_names(technical + domain_skills + soft),
+        "text": "\n".join(lines)
+    }
+
+def _bullet(rng, skills):
+    if not skills or rng.random() < 0.15:
+        return rng.choice(FILLER_BULLETS)
+    a, b = rng.sample(skills, 2) if len(skills) > 1 else (skills[0], skills[0])
+    return rng.choice(BULLETS).format(a=a, b=b, n=rng.randint(2, 9))
+
+def _resume_lines(rng, job, overlap, pages):
+    """Lines and skills of one resume targeting a job"""
+    job_skills = job["skills"]
+    kept = rng.sample(job_skills, round(overlap * len(job_skills)))
+    all_skills = [skill for skills in TECH_SKILLS.values() for skill in skills]
+    all_skills += [skill for skills in DOMAIN_SKILLS.values() for skill in skills] + SOFT_SKILLS
+    others = [skill for skill in dict.fromkeys(all_skills) if skill not in job_skills]
+    skills = kept + rng.sample(others, rng.randint(3, 10))
+    rng.shuffle(skills)
+
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    years = rng.randint(1, 15)
+    title = job["title"] if rng.random() < 0.6 else rng.choice(list(ROLE_TITLES.values()))
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(1000, 9999)} | {rng.choice(CITIES)}",
+        _header(rng, "summary"),
+        rng.choice(SUMMARIES).format(title=title, years=years, a=skills[0], b=skills[-1]),
+        _header(rng, "experience"),
+    ]
+
+    # Experience entries until the page budget (minus the closing sections) is used
+    target = max(1, pages) * LINES_PER_PAGE - 14
+    year = 2025
+    while sum(1 + len(line) // CHARS_PER_LINE for line in lines) < target:
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(SENIORITY[1:]) or 'Software'} Engineer, {rng.choice(COMPANIES)} ({start} - {year})")
+        lines += [f"- {_bullet(rng, skills)}" for _ in range(rng.randint(2, 4))]
+        year = start
+
+    lines.append(_header(rng, "skills"))
+    lines.append(", ".join(skills))
+    lines.append(_header(rng, "education"))
+    lines.append(f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)} ({year - rng.randint(0, 2)})")
+    if rng.random() < 0.6:
+        lines.append(_header(rng, "projects"))
+        lines += [f"- {_bullet(rng, skills)}" for _ in range(rng.randint(1, 3))]
+    if rng.random() < 0.4:
+        lines.append(_header(rng, "languages"))
+        lines.append(", ".join(rng.sample(SPOKEN_LANGUAGES, rng.randint(1, 3))))
+    if rng.random() < 0.3:
+        lines.append(_header(rng, "interests"))
+        lines.append(", ".join(rng.sample(HOBBIES, rng.randint(2, 4))))
+    return lines, skills
+
+def _perturb(rng, lines):
+    """A near-duplicate of a resume: new contact line and two bullets swapped"""
+    lines = list(lines)
+    lines[1] = re.sub(r"\+1 555 \d{4}", f"+1 555 {rng.randint(1000, 9999)}", lines[1])
+    bullets = [index for index, line in enumerate(lines) if line.startswith("- ")]
+    if len(bullets) >= 2:
+        first, second = rng.sample(bullets, 2)
+        lines[first], lines[second] = lines[second], lines[first]
+    return lines
+
+def _duplicate_source(rng, index, duplicate_rate):
+    """Index of the earlier resume that resume `index` duplicates, or None; the first draws of its rng"""
+    if index and rng.random() < duplicate_rate:
+        return rng.randrange(index)
+    return None
+
+def generate_resume(index, jobs, seed=0, overlap=0.6, overlap_spread=0.25, duplicate_rate=0.0, pages=1):
+    """One synthetic resume: {"id", "job", "overlap", "skills", "duplicate_of", "text"}.
+
+    The resume targets jobs[index % len(jobs)] with a share of its skills
+    drawn around `overlap`. With probability `duplicate_rate` it is a
+    near-duplicate of a random earlier resume instead, or of the resume that
+    one duplicates.
+    """
+    rng = _rng(seed, "resume", index)
+    original = _duplicate_source(rng, index, duplicate_rate)
+    if original is not None:
+        # A duplicate of a duplicate is a duplicate of the first resume of the chain
+        while True:
+            earlier = _duplicate_source(_rng(seed, "resume", original), original, duplicate_rate)
+            if earlier is None:
+                break
+            original = earlier
+        source = generate_resume(original, jobs, seed, overlap, overlap_spread, 0.0, pages)
+        return dict(
+            source,
+            id=f"resume-{index:07d}",
+            duplicate_of=source["id"],
+            text="\n".join(_perturb(rng, source["text"].split("\n")))
+        )
+
+    job = jobs[index % len(jobs)]
+    resume_overlap = min(1.0, max(0.0, rng.uniform(overlap - overlap_spread, overlap + overlap_spread)))
+    lines, skills = _resume_lines(rng, job, resume_overlap, pages)
+    return {
+        "id": f"resume-{index:07d}",
+        "job": job["id"],
+        "overlap": round(resume_overlap, 3),
+        "skills": _skill_names(skills),
+        "duplicate_of": None,
+        "text": "\n".join(lines)
+    }
+
+def generate_jobs(count, seed=0):
+    return [generate_job(index, seed) for index in range(count)]
+
+def render_pdf(text):
+    """Render resume text as PDF bytes with the core fonts"""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", size=10)
+    for line in text.split("\n"):
+        pdf.multi_cell(0, 6, txt=line.encode("latin-1", "replace").decode("latin-1"))
+    return pdf.output(dest='S').encode('latin-1')
+
+def resume_path(index, fmt="txt"):
+    """Path of a resume relative to the corpus directory"""
+    return os.path.join("resumes", f"{index // FILES_PER_DIRECTORY:04d}", f"resume-{index:07d}.{fmt}")
+
+# Per-process state of the generator pool, set up by _init_writer
+_writer = {}
+
+def _init_writer(options):
+    _writer.clear()
+    _writer.update(options)
+    _writer["jobs"] = generate_jobs(options["job_count"], options["seed"])
+
+def _write_chunk(indices):
+    options = _writer
+    entries = []
+    for index in indices:
+        resume = generate_resume(
+            index, options["jobs"], seed=options["seed"], overlap=options["overlap"],
+            overlap_spread=options["overlap_spread"], duplicate_rate=options["duplicate_rate"], pages=options["pages"]
+        )
+        relative = resume_path(index, options["format"])
+        path = os.path.join(options["out_dir"], relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if options["format"] == "pdf":
+            with open(path, "wb") as f:
+                f.write(render_pdf(resume["text"]))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(resume["text"])
+        entries.append(dict(((key, value) for key, value in resume.items() if key != "text"), path=relative))
+    return entries
+
+def write_corpus(out_dir, count, job_count=20, seed=0, overlap=0.6, overlap_spread=0.25, duplicate_rate=0.05,
+                 pages=1, fmt="txt", workers=None, chunk_size=500, progress=None):
+    """Generate a corpus of `count` resumes and `job_count` jobs into a directory.
+
+    Resumes are written by a process pool in chunks; the manifest is written
+    in resume order as chunks complete. Returns the corpus parameters with
+    the elapsed time.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown corpus format: {fmt}")
+    started = time.time()
+    options = {
+        "out_dir": out_dir, "job_count": job_count, "seed": seed, "overlap": overlap,
+        "overlap_spread": overlap_spread, "duplicate_rate": duplicate_rate, "pages": pages, "format": fmt
+    }
+
+    os.makedirs(os.path.join(out_dir, "jobs"), exist_ok=True)
+    for job in generate_jobs(job_count, seed):
+        with open(os.path.join(out_dir, "jobs", f"{job['id']}.txt"), "w", encoding="utf-8") as f:
+            f.write(job["text"])
+
+    chunks = (range(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size))
+    written = 0
+    duplicates = 0
+    manifest_path = os.path.join(out_dir, "manifest.jsonl")
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_writer, initargs=(options,)) as executor:
+        for entries in executor.map(_write_chunk, chunks):
+            for entry in entries:
+                manifest.write(json.dumps(entry) + "\n")
+            written += len(entries)
+            duplicates += sum(1 for entry in entries if entry["duplicate_of"])
+            if progress is not None:
+                progress(written, count)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    info = dict(options, count=written, duplicates=duplicates, seconds=round(time.time() - started, 2))
+    info.pop("out_dir")
+    with open(os.path.join(out_dir, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+def iter_manifest(corpus_dir):
+    """Manifest entries of a generated corpus, with "path" made absolute"""
+    with open(os.path.join(corpus_dir, "manifest.jsonl"), "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry["path"] = os.path.join(corpus_dir, entry["path"])
+                yield entry
+
+def load_jobs(corpus_dir):
+    """{job ID: job description text} of a generated corpus"""
+    jobs_dir = os.path.join(corpus_dir, "jobs")
+    jobs = {}
+    for name in sorted(os.listdir(jobs_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(jobs_dir, name), "r", encoding="utf-8") as f:
+                jobs[name[:-len(".txt")]] = f.read()
+    return jobs
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Generate a synthetic resume and job description corpus")
+        parser.add_argument("out_dir", help="Directory to write the corpus to")
+        parser.add_argument("--count", type=int, default=10000, help="Number of resumes")
+        parser.add_argument("--jobs", type=int, default=20, help="Number of job descriptions")
+        parser.add_argument("--seed", type=int, default=0, help="Seed; the same parameters give the same corpus")
+        parser.add_argument("--overlap", type=float, default=0.6, help="Mean share of its job's skills a resume has")
+        parser.add_argument("--overlap-spread", type=float, default=0.25, help="Overlap varies uniformly by this much")
+        parser.add_argument("--duplicate-rate", type=float, default=0.05, help="Share of near-duplicate resumes")
+        parser.add_argument("--pages", type=int, default=1, help="Pages per resume")
+        parser.add_argument("--format", choices=FORMATS, default="txt", help="Write text files or PDFs")
+        parser.add_argument("--workers", type=int, help="Generator processes (default: CPU count)")
+
+        args = parser.parse_args()
+
+        last_report = [0.0]
+
+        def progress(done, total):
+            now = time.time()
+            if now - last_report[0] >= 5 or done == total:
+                last_report[0] = now
+                print(f"{done}/{total} resumes", file=sys.stderr)
+
+        info = write_corpus(
+            args.out_dir, args.count, job_count=args.jobs, seed=args.seed, overlap=args.overlap,
+            overlap_spread=args.overlap_spread, duplicate_rate=args.duplicate_rate, pages=args.pages,
+            fmt=args.format, workers=args.workers, progress=progress
+        )
+        print(json.dumps(info, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import time
+
+# Cooperative deadlines for analysis requests.
+#
+# A request carries a time budget. The expensive stages (OCR, section and
+# document similarity, report rendering) check the deadline before each unit
+# of work and, once it has passed, skip what is left instead of being killed
+# from outside: scoring falls back to the skill overlap alone and the result
+# is flagged "partial". Skipped stages are recorded on the Deadline in the
+# process that owns it; copies handed to worker processes only check expiry.
+
+class Deadline:
+    """Time budget of one request, checked cooperatively by the expensive stages"""
+
+    def __init__(self, budget_seconds=None, expires_at=None):
+        # Wall-clock expiry, so the deadline means the same in worker processes
+        if expires_at is None and budget_seconds is not None:
+            expires_at = time.time() + budget_seconds
+        self.expires_at = expires_at
+        self.skipped = []
+
+    @classmethod
+    def from_budget(cls, budget_seconds):
+        """A Deadline for a budget in seconds, or None for no budget"""
+        return cls(budget_seconds=budget_seconds) if budget_seconds else None
+
+    def remaining(self):
+        """Seconds left (never negative), or None without a budget"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.time())
+
+    def expired(self):
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def skip(self, stage):
+        """Record that `stage` was skipped or cut short because the deadline passed"""
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    @property
+    def partial(self):
+        return bool(self.skipped)
+
+def deadline_expired(deadline):
+    """True if a (possibly absent) deadline has passed"""
+    return deadline is not None and deadline.expired()
@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import traceback
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from text_extraction import content_hash, extract_document_text
+
+# Near-duplicate resume detection.
+#
+# Each resume is reduced to a MinHash signature over word shingles of its
+# normalized text. The estimated Jaccard similarity of two resumes is the
+# fraction of signature positions that agree. Signatures are split into bands
+# for locality-sensitive hashing: two resumes become candidates when any band
+# matches, which happens with high probability above ~0.7 similarity and
+# rarely below; candidates are then checked against the threshold.
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Append-only index of resume signatures
+DEDUP_INDEX_PATH = os.path.join(SCRIPT_DIR, "cache", "dedup", "index.jsonl")
+
+# Words per shingle
+SHINGLE_SIZE = 5
+# Signature length, split into LSH_BANDS bands of NUM_PERMUTATIONS // LSH_BANDS rows
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+# Estimated Jaccard similarity above which two resumes are near-duplicates
+DEFAULT_THRESHOLD = 0.9
+
+# Universal hash functions (a * x + b) mod p, fixed so signatures stay comparable across runs
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_random = np.random.RandomState(1)
+_PERM_A = _random.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _random.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+def normalize_for_shingles(text):
+    """Lowercase and reduce text to its words, so layout and punctuation edits do not count"""
+    return "".join(c if c.isalnum() else " " for c in text.lower()).split()
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of word n-grams of the normalized text"""
+    words = normalize_for_shingles(text)
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash_signature(text):
+    """MinHash signature (uint32 array of NUM_PERMUTATIONS) of a resume text"""
+    values = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles(text)],
+        dtype=np.uint64
+    )
+    if values.size == 0:
+        return np.full(NUM_PERMUTATIONS, 0xFFFFFFFF, dtype=np.uint32)
+    # (permutations x shingles) hashes, minimum per permutation
+    hashed = (np.outer(_PERM_A, values) + _PERM_B[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+    return hashed.min(axis=1).astype(np.uint32)
+
+def estimate_jaccard(signature_a, signature_b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return float(np.count_nonzero(signature_a == signature_b)) / len(signature_a)
+
+def _band_keys(signature):
+    rows = len(signature) // LSH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+class NearDuplicateIndex:
+    """LSH index of resume signatures keyed by resume content hash.
+
+    The index is loaded lazily from an append-only JSONL file, so analyses in
+    separate processes share it. Every entry records the resume it was found
+    to duplicate, if any, which gives the dedup rate.
+    """
+
+    def __init__(self, path=DEDUP_INDEX_PATH, threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._signatures = {}
+        self._duplicate_of = {}
+        self._buckets = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _insert(self, resume_hash, signature, duplicate_of):
+        # Caller holds the lock
+        self._signatures[resume_hash] = signature
+        self._duplicate_of[resume_hash] = duplicate_of
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, set()).add(resume_hash)
+
+    def _load(self):
+        # Caller holds the lock
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path:
+            # In-memory index
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        signature = np.frombuffer(bytes.fromhex(entry["signature"]), dtype=np.uint32)
+                    except (ValueError, KeyError):
+                        # A partially written last line
+                        continue
+                    if len(signature) == NUM_PERMUTATIONS:
+                        self._insert(entry["resume_hash"], signature, entry.get("duplicate_of"))
+        except OSError:
+            pass
+
+    def __len__(self):
+        with self._lock:
+            self._load()
+            return len(self._signatures)
+
+    def query(self, signature, exclude=None):
+        """Return [(resume_hash, similarity)] of indexed near-duplicates, most similar first"""
+        with self._lock:
+            self._load()
+            candidates = set()
+            for key in _band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(exclude)
+            matches = []
+            for candidate in candidates:
+                similarity = estimate_jaccard(signature, self._signatures[candidate])
+                if similarity >= self.threshold:
+                    matches.append((candidate, similarity))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def add(self, resume_hash, signature, duplicate_of=None, persist=True):
+        """Index a resume signature (no-op if the resume is already indexed)"""
+        with self._lock:
+            self._load()
+            if resume_hash in self._signatures:
+                return
+            self._insert(resume_hash, signature, duplicate_of)
+        if not persist or not self.path:
+            return
+        line = json.dumps({"resume_hash": resume_hash, "signature": signature.tobytes().hex(), "duplicate_of": duplicate_of})
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # One short append per entry, so concurrent writers do not interleave lines
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"Warning: Could not update near-duplicate index: {str(e)}", file=sys.stderr)
+
+    def check(self, resume_hash, resume_text):
+        """Look up near-duplicates of a resume, then index it.
+
+        Returns the matches as query() does; the resume is recorded as a
+        duplicate of the best match, if any.
+        """
+        signature = minhash_signature(resume_text)
+        matches = self.query(signature, exclude=resume_hash)
+        self.add(resume_hash, signature, duplicate_of=matches[0][0] if matches else None)
+        return matches
+
+    def stats(self):
+        """Index size and the share of indexed resumes that were near-duplicates"""
+        with self._lock:
+            self._load()
+            total = len(self._signatures)
+            duplicates = sum(1 for duplicate_of in self._duplicate_of.values() if duplicate_of)
+        return {
+            "indexed": total,
+            "near_duplicates": duplicates,
+            "dedup_rate": round(duplicates / total, 4) if total else 0.0,
+            "threshold": self.threshold
+        }
+
+# Index shared by every analysis in this process
+NEAR_DUPLICATE_INDEX = NearDuplicateIndex()
+
+def cluster_directory(directory, threshold=DEFAULT_THRESHOLD, index=None):
+    """Group the resumes in a directory into near-duplicate clusters.
+
+    Returns a dict with the clusters (lists of file names, largest first) and
+    the dedup rate: the share of files that are near-duplicates of an earlier one.
+    """
+    index = index or NearDuplicateIndex(path=None, threshold=threshold)
+    files = sorted(name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name)))
+    # Union-find over files, merged whenever one is a near-duplicate of another
+    parent = {}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    hash_to_file = {}
+    skipped = []
+    duplicates = 0
+    for name in files:
+        with open(os.path.join(directory, name), "rb") as f:
+            data = f.read()
+        try:
+            text = extract_document_text(data, ocr=False)
+        except ValueError:
+            skipped.append(name)
+            continue
+        if not text:
+            skipped.append(name)
+            continue
+        parent[name] = name
+        resume_hash = content_hash(data)
+        if resume_hash in hash_to_file:
+            # Byte-identical copy
+            matches = [(resume_hash, 1.0)]
+        else:
+            hash_to_file[resume_hash] = name
+            signature = minhash_signature(text)
+            matches = index.query(signature, exclude=resume_hash)
+            index.add(resume_hash, signature, duplicate_of=matches[0][0] if matches else None)
+        if matches:
+            duplicates += 1
+            for match_hash, _ in matches:
+                parent[find(name)] = find(hash_to_file.get(match_hash, name))
+
+    clusters = {}
+    for name in parent:
+        clusters.setdefault(find(name), []).append(name)
+    groups = sorted((sorted(members) for members in clusters.values()), key=len, reverse=True)
+    scanned = len(parent)
+    return {
+        "files": scanned,
+        "skipped": skipped,
+        "clusters": [group for group in groups if len(group) > 1],
+        "unique": len(groups),
+        "near_duplicates": duplicates,
+        "dedup_rate": round(duplicates / scanned, 4) if scanned else 0.0,
+        "threshold": threshold
+    }
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Near-duplicate resume detection")
+        subparsers = parser.add_subparsers(dest="command", required=True)
+
+        cluster = subparsers.add_parser("cluster", help="Group the resumes in a directory into near-duplicate clusters")
+        cluster.add_argument("directory", help="Directory of resume files, e.g. backend/uploads")
+        cluster.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                             help="Estimated Jaccard similarity above which resumes are near-duplicates")
+        cluster.add_argument("--index", action="store_true", help="Also add the resumes to the shared near-duplicate index")
+
+        subparsers.add_parser("stats", help="Size and dedup rate of the shared near-duplicate index")
+
+        args = parser.parse_args()
+
+        if args.command == "cluster":
+            index = NearDuplicateIndex(threshold=args.threshold) if args.index else None
+            result = cluster_directory(args.directory, threshold=args.threshold, index=index)
+        else:
+            result = NEAR_DUPLICATE_INDEX.stats()
+
+        print(json.dumps(result, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
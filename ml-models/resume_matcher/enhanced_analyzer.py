@@ -6,14 +6,41 @@ import traceback
 import io
 import argparse
 from datetime import datetime
-from collections import Counter
+from collections import Counter, OrderedDict
 import math
 import random
+import hashlib
+import time
+import threading
+import weakref
 
 # Third-party imports
 import spacy
-from fpdf import FPDF
-import fitz  # PyMuPDF
+
+# Local imports
+from deadline import Deadline, deadline_expired
+from dedup import NEAR_DUPLICATE_INDEX
+from metrics import (
+    METRICS,
+    NLP_PARSE_SECONDS,
+    SKILL_MATCH_SECONDS,
+    SEMANTIC_SECONDS,
+    REPORT_RENDER_SECONDS,
+    ANALYSES,
+    FAILURES,
+    record_cache
+)
+from ocr import DEFAULT_OCR_DPI
+from protocol import ProtocolError, read_request
+from report_catalog import record_report
+from report_renderer import FORMATS, GREEN, ORANGE, ReportTemplate
+from result_cache import RESULT_CACHE, ResultCache, make_key
+from text_extraction import (
+    EXTRACTOR_VERSION,
+    PARALLEL_PAGE_THRESHOLD,
+    content_hash,
+    extract_document_text
+)
 
 # Fix console encoding for Windows
 if sys.platform == "win32":
@@ -104,6 +131,33 @@ ALL_DOMAIN_SKILLS = []
 for category in DOMAIN_SKILLS:
     ALL_DOMAIN_SKILLS.extend(DOMAIN_SKILLS[category])
 
+# Weights of the components of the final score (they sum to 1.0)
+SCORE_WEIGHTS = {
+    "semantic": 0.25,
+    "keyword": 0.25,
+    "experience": 0.20,
+    "skills": 0.15,
+    "domain": 0.15
+}
+
+# Maximum random adjustment (in score points) used to differentiate close resumes
+SCORE_JITTER = 1.0
+
+# Layout of the result cache entries (see cache_entry); bumping it retires older entries
+RESULT_CACHE_FORMAT = 2
+
+def scoring_version():
+    """Return a stamp of the skill tables and scoring weights; editing any of them changes it"""
+    payload = json.dumps({
+        "tech_skills": TECH_SKILLS,
+        "soft_skills": SOFT_SKILLS,
+        "domain_skills": DOMAIN_SKILLS,
+        "weights": SCORE_WEIGHTS,
+        "jitter": SCORE_JITTER,
+        "extractor": EXTRACTOR_VERSION
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
 def error_response(message):
     """Return a standardized error response"""
     print(f"ERROR: {message}", file=sys.stderr)
@@ -172,44 +226,6 @@ def sanitize_text(text, is_filepath=False):
         # Last resort - strip all non-ASCII characters
         return re.sub(r'[^\x00-\x7F]+', '?', text)
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file with improved encoding handling"""
-    text = ""
-    try:
-        doc = fitz.open(pdf_path)
-        for page in doc:
-            try:
-                # Get text with careful encoding handling
-                page_text = page.get_text()
-                # Clean unprintable characters
-                page_text = ''.join(c if c.isprintable() or c.isspace() else ' ' for c in page_text)
-                text += page_text + "\n"
-            except Exception as e:
-                print(f"Warning: Error extracting text from page: {str(e)}", file=sys.stderr)
-                continue
-        doc.close()
-    except Exception as e:
-        print(f"Error extracting PDF text: {str(e)}", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
-    
-    # Handle common encoding issues
-    try:
-        # Replace common problematic characters
-        text = text.replace('\ufffd', '?')     # Replace replacement character
-        text = text.replace('\u0000', '')      # Remove null bytes
-        text = text.replace('\u2022', '-')     # Replace bullet points with hyphens
-        text = text.replace('\u2023', '-')     # Replace triangular bullet with hyphen
-        text = text.replace('\u2043', '-')     # Replace hyphen bullet with hyphen
-        text = text.replace('\u2219', '-')     # Replace bullet operator with hyphen
-        text = text.replace('•', '-')          # Replace standard bullet with hyphen
-        
-        # Try to normalize encoding to ensure consistency
-        text = text.encode('utf-8', errors='replace').decode('utf-8')
-    except Exception as e:
-        print(f"Warning: Error handling special characters: {str(e)}", file=sys.stderr)
-    
-    return text
-
 def clean_text(text):
     """Clean and normalize text for processing"""
     if not text:
@@ -224,26 +240,29 @@ def clean_text(text):
     
     return text
 
-def identify_resume_sections(text):
-    """Identify and extract different sections of a resume with improved detection"""
-    # Common section headers in resumes with more variations
-    section_patterns = {
-        'summary': r'(summary|profile|objective|about me|professional\s+summary|career\s+objective)',
-        'experience': r'(experience|work\s+experience|employment|work\s+history|professional\s+experience|career\s+history)',
-        'education': r'(education|academic|qualification|educational\s+background|academic\s+achievements)',
-        'skills': r'(skills|technical\s+skills|competencies|expertise|core\s+competencies|qualifications|key\s+skills)',
-        'projects': r'(projects|key\s+projects|professional\s+projects|personal\s+projects)',
-        'certifications': r'(certifications|certificates|accreditations|professional\s+certifications)',
-        'languages': r'(languages|language\s+proficiency|language\s+skills)',
-        'interests': r'(interests|hobbies|activities|personal\s+interests)',
-        'references': r'(references|recommendations|endorsements)'
-    }
+# Common section headers in resumes with more variations
+SECTION_PATTERNS = {
+    'summary': r'(summary|profile|objective|about me|professional\s+summary|career\s+objective)',
+    'experience': r'(experience|work\s+experience|employment|work\s+history|professional\s+experience|career\s+history)',
+    'education': r'(education|academic|qualification|educational\s+background|academic\s+achievements)',
+    'skills': r'(skills|technical\s+skills|competencies|expertise|core\s+competencies|qualifications|key\s+skills)',
+    'projects': r'(projects|key\s+projects|professional\s+projects|personal\s+projects)',
+    'certifications': r'(certifications|certificates|accreditations|professional\s+certifications)',
+    'languages': r'(languages|language\s+proficiency|language\s+skills)',
+    'interests': r'(interests|hobbies|activities|personal\s+interests)',
+    'references': r'(references|recommendations|endorsements)'
+}
+
+def identify_section_spans(lines):
+    """Locate the sections of a resume given as a list of lines.
     
-    # Find sections in the text
-    sections = {}
-    lines = text.split('\n')
+    Returns {section: (start, end)}, where the section's content is
+    lines[start:end] (its header line excluded), in order of first appearance.
+    """
+    # Find sections in the lines
+    spans = {}
     current_section = 'header'
-    sections[current_section] = []
+    spans[current_section] = [0, 0]
     
     i = 0
     while i < len(lines):
@@ -252,39 +271,46 @@ def identify_resume_sections(text):
         
         # Check if this line is a section header
         found_section = False
-        for section, pattern in section_patterns.items():
+        for section, pattern in SECTION_PATTERNS.items():
             if re.search(fr'^\s*{pattern}\s*(:|\n|\Z|$)', line_lower):
                 current_section = section
                 found_section = True
-                sections[current_section] = []
+                spans[current_section] = [i + 1, i + 1]
                 break
                 
         # Also check for section headers with all caps or followed by a line of dashes/underscores
         if not found_section and i < len(lines) - 1:
             next_line = lines[i+1].strip()
             if (line.isupper() and len(line) > 3) or re.match(r'^[-_=]{3,}$', next_line):
-                for section, pattern in section_patterns.items():
+                for section, pattern in SECTION_PATTERNS.items():
                     clean_line = line_lower.replace(':', '')
                     if re.search(pattern, clean_line):
                         current_section = section
                         found_section = True
-                        sections[current_section] = []
                         # Skip the divider line if present
                         if re.match(r'^[-_=]{3,}$', next_line):
                             i += 1
+                        spans[current_section] = [i + 1, i + 1]
                         break
         
         # If not a section header, add to current section
         if not found_section:
-            sections[current_section].append(line)
+            spans[current_section][1] = i + 1
         
         i += 1
     
-    # Convert lists of lines back to text
-    for section in sections:
-        sections[section] = '\n'.join(sections[section])
+    return {section: tuple(span) for section, span in spans.items()}
+
+def identify_resume_sections(text):
+    """Identify and extract different sections of a resume with improved detection"""
+    lines = text.split('\n')
+    spans = identify_section_spans(lines)
     
-    return sections
+    # Join each section's lines back into text
+    return {
+        section: '\n'.join(line.strip() for line in lines[start:end])
+        for section, (start, end) in spans.items()
+    }
 
 def extract_keywords(doc, min_length=3):
     """Extract important keywords from a spaCy document"""
@@ -323,14 +349,20 @@ def calculate_tfidf(resume_tf, job_tf, resume_keywords, job_keywords):
     
     return resume_tfidf, job_tfidf
 
-def calculate_section_match_score(resume_section, job_description, nlp):
-    """Calculate how well a resume section matches the job description"""
+def calculate_section_match_score(resume_section, job_description, nlp, job_doc=None):
+    """Calculate how well a resume section matches the job description.
+
+    `job_doc`, the already parsed clean_text(job_description), saves parsing
+    the job description again for every section.
+    """
     if not resume_section or not job_description:
         return 0
-    
+
     # Process texts
-    resume_doc = nlp(clean_text(resume_section))
-    job_doc = nlp(clean_text(job_description))
+    with NLP_PARSE_SECONDS.time(stage="sections"):
+        resume_doc = nlp(clean_text(resume_section))
+        if job_doc is None:
+            job_doc = nlp(clean_text(job_description))
     
     # Calculate semantic similarity if both sections have vector representations
     if resume_doc.has_vector and job_doc.has_vector:
@@ -346,8 +378,132 @@ def calculate_section_match_score(resume_section, job_description, nlp):
         intersection = resume_words.intersection(job_words)
         return len(intersection) / len(job_words)
 
-def extract_skills(text, nlp, skill_list=None):
-    """Extract skills from text using NLP and a predefined skill list"""
+# Section scores of resumes that were edited and analyzed again, see score_sections
+SECTION_CACHE = ResultCache(cache_dir=os.path.join(SCRIPT_DIR, "cache", "sections"))
+
+def pipeline_id(nlp):
+    """Name and version of a loaded pipeline; similarities depend on its vectors"""
+    meta = nlp.meta
+    return f"{meta.get('lang', nlp.lang)}_{meta.get('name', '')}-{meta.get('version', '')}"
+
+def section_cache_key(section_text, job, nlp):
+    """Cache key of one section's score against a parsed job (see parse_job).
+
+    The section is hashed as it is scored (through clean_text), so edits to
+    other sections, or to its punctuation and spacing, leave the key unchanged.
+    """
+    section_hash = hashlib.sha256(clean_text(section_text).encode("utf-8")).hexdigest()
+    return make_key(section_hash, job["hash"], f"{scoring_version()}:{pipeline_id(nlp)}")
+
+def score_sections(resume_sections, job, nlp, out_of_time=None):
+    """Score each resume section against a parsed job, reusing cached section scores.
+
+    Only sections whose content changed since they were last scored against
+    this job (with this pipeline and scoring version) are parsed again.
+    Returns (section_scores, incremental), where incremental lists the
+    recomputed and reused sections and the scoring time the reuse saved, or
+    (None, None) if `out_of_time()` turns true before every section is scored.
+    """
+    section_scores = {}
+    recomputed = []
+    reused = []
+    seconds_saved = 0.0
+    for section, content in resume_sections.items():
+        if out_of_time is not None and out_of_time():
+            return None, None
+        if not content:
+            section_scores[section] = 0
+            continue
+
+        key = section_cache_key(content, job, nlp)
+        entry = SECTION_CACHE.get(key)
+        record_cache("section", entry is not None)
+        if entry is not None:
+            section_scores[section] = entry["score"]
+            reused.append(section)
+            seconds_saved += entry["seconds"]
+            continue
+
+        started = time.perf_counter()
+        score = float(calculate_section_match_score(content, job["text"], nlp, job_doc=job["doc"]))
+        SECTION_CACHE.put(key, {"score": score, "seconds": time.perf_counter() - started})
+        section_scores[section] = score
+        recomputed.append(section)
+
+    return section_scores, {
+        "recomputed_sections": recomputed,
+        "reused_sections": reused,
+        "seconds_saved": round(seconds_saved, 4)
+    }
+
+# Parsed job descriptions per loaded pipeline, see parse_job
+_JOB_PARSES = weakref.WeakKeyDictionary()
+_JOB_PARSES_LOCK = threading.Lock()
+# Job descriptions kept parsed per pipeline (least recently used are evicted first)
+JOB_PARSE_CACHE_SIZE = 32
+
+def parse_job(job_description, nlp, skill_lemmas=None):
+    """Parse a job description once per pipeline into its doc, skills and keywords.
+
+    Every resume scored against the same job description (a batch, or an
+    edited resume uploaded again) shares the parse.
+    """
+    clean_job = clean_text(job_description)
+    key = hashlib.sha256(clean_job.encode("utf-8")).hexdigest()
+    with _JOB_PARSES_LOCK:
+        parses = _JOB_PARSES.get(nlp)
+        if parses is None:
+            parses = _JOB_PARSES[nlp] = OrderedDict()
+        job = parses.get(key)
+        if job is not None:
+            parses.move_to_end(key)
+            return job
+
+    with NLP_PARSE_SECONDS.time(stage="job"):
+        doc = nlp(clean_job)
+    job = {
+        "hash": key,
+        "text": job_description,
+        "doc": doc,
+        "skills": extract_skills(job_description, nlp, doc=doc, skill_lemmas=skill_lemmas),
+        "domain_skills": extract_skills(job_description, nlp, ALL_DOMAIN_SKILLS, doc=doc, skill_lemmas=skill_lemmas),
+        "keywords": extract_keywords(doc)
+    }
+    with _JOB_PARSES_LOCK:
+        parses[key] = job
+        while len(parses) > JOB_PARSE_CACHE_SIZE:
+            parses.popitem(last=False)
+    return job
+
+# Lemmatized skills per loaded pipeline, see get_skill_lemmas
+_SKILL_LEMMAS = weakref.WeakKeyDictionary()
+
+def lemmatize_skills(nlp, skill_list=None):
+    """Map each skill to its lemmatized form, parsing the skills in one batch"""
+    if skill_list is None:
+        skill_list = ALL_TECH_SKILLS + ALL_DOMAIN_SKILLS + SOFT_SKILLS
+    skills = list(dict.fromkeys(skill_list))
+    return {skill: ' '.join([token.lemma_ for token in doc]) for skill, doc in zip(skills, nlp.pipe(skills))}
+
+def get_skill_lemmas(nlp):
+    """Lemmatized skills for a loaded pipeline, computed on first use or installed from a snapshot"""
+    skill_lemmas = _SKILL_LEMMAS.get(nlp)
+    if skill_lemmas is None:
+        skill_lemmas = lemmatize_skills(nlp)
+        _SKILL_LEMMAS[nlp] = skill_lemmas
+    return skill_lemmas
+
+def set_skill_lemmas(nlp, skill_lemmas):
+    """Install precomputed skill lemmas for a pipeline (see snapshot.py)"""
+    _SKILL_LEMMAS[nlp] = skill_lemmas
+
+def extract_skills(text, nlp, skill_list=None, doc=None, skill_lemmas=None):
+    """Extract skills from text using NLP and a predefined skill list.
+    
+    Callers matching many texts can pass `doc`, the already parsed
+    clean_text(text), so the text is not parsed again. Skills are lemmatized
+    once per pipeline (get_skill_lemmas) unless `skill_lemmas` is given.
+    """
     if not text:
         return []
     
@@ -357,7 +513,11 @@ def extract_skills(text, nlp, skill_list=None):
     
     # Clean and process the text
     clean = clean_text(text)
-    doc = nlp(clean)
+    if doc is None:
+        with NLP_PARSE_SECONDS.time(stage="skills"):
+            doc = nlp(clean)
+    if skill_lemmas is None:
+        skill_lemmas = get_skill_lemmas(nlp)
     
     found_skills = []
     
@@ -372,18 +532,22 @@ def extract_skills(text, nlp, skill_list=None):
         # Don't check again for already found skills
         if skill not in found_skills:
             # Check for lemmatized skill
-            skill_tokens = nlp(skill)
-            skill_lemmas = ' '.join([token.lemma_ for token in skill_tokens])
-            if re.search(r'\b' + re.escape(skill_lemmas) + r'\b', lemmatized_text):
+            skill_lemma = skill_lemmas.get(skill)
+            if skill_lemma is None:
+                skill_lemma = ' '.join([token.lemma_ for token in nlp(skill)])
+            if re.search(r'\b' + re.escape(skill_lemma) + r'\b', lemmatized_text):
                 found_skills.append(skill)
     
-    # Also try to find skills by checking for n-grams in the text
+    # Also try to find skills by checking for n-grams in the text, looked up
+    # by lowercased skill so long texts stay linear in their length
+    skills_by_lower = {}
+    for skill in skill_list:
+        skills_by_lower.setdefault(skill.lower(), []).append(skill)
     words = clean.split()
     for n in range(2, 4):  # Try bigrams and trigrams
         for i in range(len(words) - n + 1):
-            ngram = ' '.join(words[i:i+n])
-            for skill in skill_list:
-                if skill.lower() == ngram and skill not in found_skills:
+            for skill in skills_by_lower.get(' '.join(words[i:i+n]), ()):
+                if skill not in found_skills:
                     found_skills.append(skill)
     
     return found_skills
@@ -428,22 +592,87 @@ def categorize_skills(skills):
     
     return categorized
 
-def analyze_resume_detailed(resume_text, job_description, nlp):
-    """Perform detailed analysis of a resume against a job description"""
+def calculate_skill_scores(resume_text, job_description, nlp, job_skills=None, domain_skills_in_job=None,
+                           resume_doc=None):
+    """Score a resume on skill overlap with the job description (the cheap stage of the analysis).
+    
+    `resume_doc`, the already parsed clean_text(resume_text), is shared by
+    both skill lists instead of parsing the resume for each.
+    """
+    # Extract all skills from job description unless the caller already did
+    if job_skills is None:
+        job_skills = extract_skills(job_description, nlp)
+    if domain_skills_in_job is None:
+        domain_skills_in_job = extract_skills(job_description, nlp, ALL_DOMAIN_SKILLS)
+    
+    # Extract skills from resume
+    if resume_doc is None and resume_text:
+        with NLP_PARSE_SECONDS.time(stage="skills"):
+            resume_doc = nlp(clean_text(resume_text))
+    resume_skills = extract_skills(resume_text, nlp, doc=resume_doc)
+    resume_skills_lower = set(s.lower() for s in resume_skills)
+    job_skills_lower = set(js.lower() for js in job_skills)
+    
+    # Find missing skills
+    missing_skills = [skill for skill in job_skills if skill.lower() not in resume_skills_lower]
+    
+    # Get domain skills
+    domain_skills_in_resume = extract_skills(resume_text, nlp, ALL_DOMAIN_SKILLS, doc=resume_doc)
+    
+    # Calculate special domain match score (gives a bonus for industry-specific skills)
+    domain_score = 0
+    if domain_skills_in_job:
+        domain_job_lower = set(js.lower() for js in domain_skills_in_job)
+        matching_domain = len([s for s in domain_skills_in_resume if s.lower() in domain_job_lower])
+        domain_score = matching_domain / len(domain_skills_in_job)
+    
+    # Keyword match against the job's skills
+    skill_match = len([s for s in resume_skills if s.lower() in job_skills_lower])
+    keyword_score = skill_match / max(1, len(job_skills)) if job_skills else 0
+    
+    return {
+        "found_skills": resume_skills,
+        "missing_skills": missing_skills,
+        "keyword_score": keyword_score,
+        "domain_score": domain_score
+    }
+
+def calculate_semantic_scores(resume_text, job_description, nlp, deadline=None, resume_doc=None, job=None):
+    """Score a resume on section and whole-document similarity (the expensive stage of the analysis).
+    
+    `resume_doc` is the already parsed clean_text(resume_text) and `job` the
+    parse_job of the job description, when the caller has them. Section
+    scores are reused from SECTION_CACHE for sections that did not change
+    (see score_sections); the result's "incremental" field tells which.
+    
+    Returns None, with the "semantic" stage recorded as skipped, if `deadline`
+    passes before the scores are complete.
+    """
+    def out_of_time():
+        if deadline_expired(deadline):
+            deadline.skip("semantic")
+            return True
+        return False
+    
+    if out_of_time():
+        return None
+    
     # Extract and clean resume sections
     resume_sections = identify_resume_sections(resume_text)
     
-    # Get core texts
-    clean_resume = clean_text(resume_text)
-    clean_job = clean_text(job_description)
-    
-    # Process with spaCy
-    resume_doc = nlp(clean_resume)
-    job_doc = nlp(clean_job)
+    # Process with spaCy, unless the caller already did
+    if job is None:
+        job = parse_job(job_description, nlp)
+    if resume_doc is None:
+        with NLP_PARSE_SECONDS.time(stage="semantic"):
+            resume_doc = nlp(clean_text(resume_text))
+    job_doc = job["doc"]
+    if out_of_time():
+        return None
     
     # Extract keywords with frequencies
     resume_keywords = extract_keywords(resume_doc)
-    job_keywords = extract_keywords(job_doc)
+    job_keywords = job["keywords"]
     
     # Calculate term frequencies
     resume_length = max(1, len(resume_doc))
@@ -454,76 +683,109 @@ def analyze_resume_detailed(resume_text, job_description, nlp):
     # Calculate TF-IDF
     resume_tfidf, job_tfidf = calculate_tfidf(resume_tf, job_tf, resume_keywords, job_keywords)
     
-    # Calculate section-based scores
-    section_scores = {}
-    for section, content in resume_sections.items():
-        section_scores[section] = calculate_section_match_score(content, job_description, nlp)
-    
-    # Extract all skills from job description
-    job_skills = extract_skills(job_description, nlp)
-    
-    # Extract skills from resume
-    resume_skills = extract_skills(resume_text, nlp)
-    
-    # Find missing skills
-    missing_skills = [skill for skill in job_skills if skill.lower() not in [s.lower() for s in resume_skills]]
-    
-    # Get all skills found in resume
-    found_skills = resume_skills
+    # Calculate section-based scores, only for the sections that changed
+    section_scores, incremental = score_sections(resume_sections, job, nlp, out_of_time=out_of_time)
+    if section_scores is None:
+        return None
     
-    # Get domain skills
-    domain_skills_in_job = extract_skills(job_description, nlp, ALL_DOMAIN_SKILLS)
-    domain_skills_in_resume = extract_skills(resume_text, nlp, ALL_DOMAIN_SKILLS)
-    
-    # Calculate special domain match score (gives a bonus for industry-specific skills)
-    domain_score = 0
-    if domain_skills_in_job:
-        matching_domain = len([s for s in domain_skills_in_resume if s.lower() in [js.lower() for js in domain_skills_in_job]])
-        domain_score = matching_domain / len(domain_skills_in_job) if domain_skills_in_job else 0
-    
-    # Calculate overall score with improved weighted components
-    # 1. Semantic similarity (25%)
+    # Semantic similarity of the whole documents
     semantic_score = resume_doc.similarity(job_doc) if resume_doc.has_vector and job_doc.has_vector else 0
     
-    # 2. Keyword match (25%)
-    skill_match = len([s for s in found_skills if s.lower() in [js.lower() for js in job_skills]])
-    keyword_score = skill_match / max(1, len(job_skills)) if job_skills else 0
-    
-    # 3. Experience section match (20%)
-    experience_score = section_scores.get('experience', 0)
-    
-    # 4. Skills section match (15%)
-    skills_score = section_scores.get('skills', 0)
-    
-    # 5. Domain-specific match (15%)
-    # This will help differentiate resumes significantly
+    return {
+        "section_scores": section_scores,
+        "semantic_score": semantic_score,
+        "incremental": incremental
+    }
+
+def combine_scores(skill_scores, semantic_scores):
+    """Combine the skill and semantic stages into the final analysis result.
     
-    # Calculate final weighted score
-    final_score = (
-        semantic_score * 0.25 + 
-        keyword_score * 0.25 + 
-        experience_score * 0.20 + 
-        skills_score * 0.15 +
-        domain_score * 0.15
-    ) * 100
+    With `semantic_scores` None (the semantic stage ran out of time) the score
+    is the keyword-only estimate: the keyword and domain components reweighted
+    to the full scale.
+    """
+    if semantic_scores is None:
+        section_scores = {}
+        semantic_scores = {"section_scores": section_scores, "semantic_score": 0}
+        skill_weight = SCORE_WEIGHTS["keyword"] + SCORE_WEIGHTS["domain"]
+        final_score = (
+            skill_scores["keyword_score"] * SCORE_WEIGHTS["keyword"] +
+            skill_scores["domain_score"] * SCORE_WEIGHTS["domain"]
+        ) / skill_weight * 100
+    else:
+        section_scores = semantic_scores["section_scores"]
+        
+        # Calculate final weighted score from the components in SCORE_WEIGHTS
+        final_score = (
+            semantic_scores["semantic_score"] * SCORE_WEIGHTS["semantic"] + 
+            skill_scores["keyword_score"] * SCORE_WEIGHTS["keyword"] + 
+            section_scores.get('experience', 0) * SCORE_WEIGHTS["experience"] + 
+            section_scores.get('skills', 0) * SCORE_WEIGHTS["skills"] +
+            skill_scores["domain_score"] * SCORE_WEIGHTS["domain"]
+        ) * 100
     
-    # Add small random factor for differentiation (±5%)
-    random_factor = random.uniform(-1.0, 1.0)
+    # Add small random factor for differentiation
+    random_factor = random.uniform(-SCORE_JITTER, SCORE_JITTER)
     final_score = max(0, min(100, final_score + random_factor))
     
     # Prepare result
     result = {
         "score": round(final_score, 1),
         "section_scores": {k: round(v * 100, 1) for k, v in section_scores.items()},
-        "missing_skills": missing_skills,
-        "found_skills": categorize_skills(found_skills),
-        "semantic_similarity": round(semantic_score * 100, 1),
-        "keyword_match": round(keyword_score * 100, 1),
-        "domain_match": round(domain_score * 100, 1)
+        "missing_skills": skill_scores["missing_skills"],
+        "found_skills": categorize_skills(skill_scores["found_skills"]),
+        "semantic_similarity": round(semantic_scores["semantic_score"] * 100, 1),
+        "keyword_match": round(skill_scores["keyword_score"] * 100, 1),
+        "domain_match": round(skill_scores["domain_score"] * 100, 1)
     }
     
     return result
 
+def score_upper_bound(skill_scores):
+    """Highest final score a resume can reach given only its skill scores.
+    
+    Semantic, experience and skills similarities are bounded by 1, so they are
+    taken at their maximum; the random differentiation factor is added on top.
+    """
+    bound = (
+        SCORE_WEIGHTS["semantic"] +
+        skill_scores["keyword_score"] * SCORE_WEIGHTS["keyword"] +
+        SCORE_WEIGHTS["experience"] +
+        SCORE_WEIGHTS["skills"] +
+        skill_scores["domain_score"] * SCORE_WEIGHTS["domain"]
+    ) * 100 + SCORE_JITTER
+    return min(100, bound)
+
+def analyze_resume_detailed(resume_text, job_description, nlp, deadline=None):
+    """Perform detailed analysis of a resume against a job description"""
+    # Section scores:
+    #   1. Semantic similarity (25%)
+    #   2. Keyword match (25%)
+    #   3. Experience section match (20%)
+    #   4. Skills section match (15%)
+    #   5. Domain-specific match (15%) - helps differentiate resumes significantly
+    # The job description is parsed once per pipeline and the resume once per
+    # analysis; both stages share the parses
+    job = parse_job(job_description, nlp)
+    with NLP_PARSE_SECONDS.time(stage="resume"):
+        resume_doc = nlp(clean_text(resume_text))
+    
+    # The cheap skill stage runs first, it is the fallback if the deadline passes
+    with SKILL_MATCH_SECONDS.time():
+        skill_scores = calculate_skill_scores(
+            resume_text, job_description, nlp,
+            job_skills=job["skills"], domain_skills_in_job=job["domain_skills"], resume_doc=resume_doc
+        )
+    with SEMANTIC_SECONDS.time():
+        semantic_scores = calculate_semantic_scores(
+            resume_text, job_description, nlp, deadline=deadline, resume_doc=resume_doc, job=job
+        )
+    
+    result = combine_scores(skill_scores, semantic_scores)
+    if semantic_scores is not None:
+        result["incremental"] = semantic_scores["incremental"]
+    return result
+
 def generate_suggestions(missing_skills, resume_sections, score):
     """Generate personalized suggestions based on resume analysis"""
     suggestions = []
@@ -565,21 +827,80 @@ def generate_suggestions(missing_skills, resume_sections, score):
     
     return suggestions[:5]  # Limit to 5 suggestions
 
-def generate_pdf_report(filename, analysis_result, resume_text, job_text, original_filename=None, out_dir=None):
-    """Generate a comprehensive PDF report with analysis results"""
-    # Extract data from analysis result
-    score = analysis_result["score"]
-    section_scores = analysis_result.get("section_scores", {})
-    missing_skills = analysis_result.get("missing_skills", [])
-    found_skills = analysis_result.get("found_skills", {"technical": {}, "soft": []})
-    suggestions = analysis_result.get("suggestions", [])
+# Layout of the PDF report (and its HTML/JSON forms), see report_renderer.py
+REPORT_TEMPLATE = ReportTemplate(
+    "ATS Resume Match Report",
+    (
+        {"kind": "title", "text": "ATS Resume Match Report"},
+        {"kind": "space", "height": 10},
+        {"kind": "rule"},
+        {"kind": "text", "text": "Resume: {filename}"},
+        {"kind": "text", "text": "Analysis Date: {report_time}"},
+        {"kind": "space", "height": 5},
+        {"kind": "score", "field": "score", "text": "ATS Match Score: {score}%", "thresholds": ((75, GREEN), (60, ORANGE))},
+        {"kind": "text", "style": "I", "size": 10,
+         "text": "Score is based on semantic similarity, keyword matching, and section-specific analysis"},
+        {"kind": "space", "height": 5},
+        {"kind": "section", "when": "section_scores", "blocks": (
+            {"kind": "heading", "text": "Section Match Scores:"},
+            {"kind": "pairs", "field": "section_scores", "format": "{label}: {value}%"},
+            {"kind": "space", "height": 5},
+        )},
+        {"kind": "heading", "text": "Skills Found in Your Resume:"},
+        {"kind": "groups", "field": "skill_groups", "label_format": "{label}:",
+         "empty": "No specific skills were identified in your resume."},
+        {"kind": "space", "height": 5},
+        {"kind": "heading", "text": "Missing Skills:"},
+        {"kind": "list", "field": "missing_skills", "limit": 10, "bullet": "- ",
+         "empty": "No significant missing skills found!"},
+        {"kind": "space", "height": 5},
+        {"kind": "heading", "text": "Improvement Suggestions:"},
+        {"kind": "list", "field": "suggestions", "bullet": "- ", "wrap": True,
+         "empty": "Your resume matches the job description well!"},
+    ),
+    sanitize_text
+)
+
+def report_fields(display_filename, analysis_result, report_time=None):
+    """Fields of REPORT_TEMPLATE for a detailed analysis (an AnalysisResult, before
+    REPORT_TEMPLATE.prepare)"""
+    found_skills = analysis_result.found_skills()
+    skill_groups = [
+        [category.replace('_', ' ').title(), skills]
+        for category, skills in found_skills["technical"].items()
+        if skills
+    ]
+    if found_skills["soft"]:
+        skill_groups.append(["Soft Skills", found_skills["soft"]])
+    
+    return {
+        "filename": display_filename or "Resume",
+        "report_time": report_time or datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "score": analysis_result.score,
+        "section_scores": [
+            [section.capitalize(), score]
+            for section, score in analysis_result.section_score_dict().items()
+            if score > 0
+        ],
+        "skill_groups": skill_groups,
+        "missing_skills": analysis_result.missing_skills(),
+        "suggestions": list(analysis_result.suggestions)
+    }
+
+def generate_pdf_report(filename, analysis_result, resume_text, job_text, original_filename=None, out_dir=None,
+                        fields=None):
+    """Generate a comprehensive PDF report with analysis results (an AnalysisResult).
     
+    `fields` are the prepared REPORT_TEMPLATE fields when the caller already
+    has them; otherwise they are built from the analysis.
+    """
     # Use original filename for display if provided
     display_filename = original_filename if original_filename else filename
+    if fields is None:
+        fields = REPORT_TEMPLATE.prepare(report_fields(display_filename, analysis_result))
     
     # Generate timestamp
     current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_time = datetime.now().strftime("%Y-%m-%d %H:%M")
     
     # Set output directory
     if out_dir and os.path.exists(out_dir):
@@ -587,238 +908,206 @@ def generate_pdf_report(filename, analysis_result, resume_text, job_text, origin
     else:
         report_dir = REPORTS_DIR
     
-    try:
-        # Initialize PDF
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        
-        # Set font - use only standard fonts available in FPDF
-        pdf.set_font("Arial", 'B', size=16)
-        
-        # Header
-        pdf.cell(200, 10, txt="ATS Resume Match Report", ln=True, align='C')
-        pdf.line(10, 30, 200, 30)
-        pdf.ln(10)
-        
-        # Basic Info
-        pdf.set_font("Arial", size=12)
-        # Clean filename before adding to PDF - be extra cautious with encoding
-        safe_filename = sanitize_text(display_filename, is_filepath=True)
-        if not safe_filename:
-            safe_filename = "Resume"  # Fallback if sanitization removes everything
-        pdf.cell(200, 10, txt=f"Resume: {safe_filename}", ln=True)
-        pdf.cell(200, 10, txt=f"Analysis Date: {report_time}", ln=True)
-        pdf.ln(5)
-        
-        # Score Section
-        pdf.set_font("Arial", 'B', size=14)
-        if score >= 75:
-            pdf.set_text_color(0, 128, 0)  # Green
-        elif score >= 60:
-            pdf.set_text_color(255, 165, 0)  # Orange
-        else:
-            pdf.set_text_color(255, 0, 0)  # Red
-            
-        pdf.cell(200, 10, txt=f"ATS Match Score: {score}%", ln=True)
-        pdf.set_text_color(0, 0, 0)  # Reset to black
-        pdf.set_font("Arial", 'I', size=10)
-        pdf.cell(200, 10, txt="Score is based on semantic similarity, keyword matching, and section-specific analysis", ln=True)
-        pdf.ln(5)
-        
-        # Section Scores
-        if section_scores:
-            pdf.set_font("Arial", 'B', size=12)
-            pdf.cell(200, 10, txt="Section Match Scores:", ln=True)
-            pdf.set_font("Arial", size=10)
-            
-            for section, score in section_scores.items():
-                if score > 0:  # Only show sections with scores
-                    # Extra safe encoding for section names
-                    section_name = sanitize_text(section.capitalize())
-                    if section_name:  # Only add if not empty after sanitization
-                        pdf.cell(200, 8, txt=f"{section_name}: {score}%", ln=True)
-            
-            pdf.ln(5)
-        
-        # Skills Found
-        pdf.set_font("Arial", 'B', size=12)
-        pdf.cell(200, 10, txt="Skills Found in Your Resume:", ln=True)
-        pdf.set_font("Arial", size=10)
-        
-        # Technical skills by category
-        if found_skills["technical"]:
-            for category, skills in found_skills["technical"].items():
-                if skills:
-                    # Extra safe encoding for category names
-                    category_name = sanitize_text(category.replace('_', ' ').title())
-                    if not category_name:
-                        category_name = "Skills"  # Fallback
-                    
-                    pdf.set_font("Arial", 'I', size=10)
-                    pdf.cell(200, 8, txt=f"{category_name}:", ln=True)
-                    pdf.set_font("Arial", size=10)
-                    
-                    # Clean each skill and join with commas, with extra safety
-                    cleaned_skills = []
-                    for skill in skills:
-                        safe_skill = sanitize_text(skill)
-                        if safe_skill and len(safe_skill.strip()) > 0:
-                            cleaned_skills.append(safe_skill)
-                    
-                    if cleaned_skills:
-                        skill_text = ", ".join(cleaned_skills)
-                        pdf.multi_cell(0, 8, txt=skill_text)
-            
-        # Soft skills
-        if found_skills["soft"]:
-            pdf.set_font("Arial", 'I', size=10)
-            pdf.cell(200, 8, txt="Soft Skills:", ln=True)
-            pdf.set_font("Arial", size=10)
-            
-            # Clean each skill and join with commas, with extra safety
-            cleaned_soft_skills = []
-            for skill in found_skills["soft"]:
-                safe_skill = sanitize_text(skill)
-                if safe_skill and len(safe_skill.strip()) > 0:
-                    cleaned_soft_skills.append(safe_skill)
-            
-            if cleaned_soft_skills:
-                soft_text = ", ".join(cleaned_soft_skills)
-                pdf.multi_cell(0, 8, txt=soft_text)
-        
-        if not found_skills["technical"] and not found_skills["soft"]:
-            pdf.multi_cell(0, 8, txt="No specific skills were identified in your resume.")
-        
-        pdf.ln(5)
-        
-        # Missing Skills
-        pdf.set_font("Arial", 'B', size=12)
-        pdf.cell(200, 10, txt="Missing Skills:", ln=True)
-        
-        if missing_skills:
-            pdf.set_font("Arial", size=10)
-            added_skills = 0
-            
-            for skill in missing_skills:
-                try:
-                    # Thoroughly sanitize the skill before adding to PDF
-                    safe_skill = sanitize_text(skill)
-                    
-                    if safe_skill and len(safe_skill.strip()) > 0:
-                        # Replace any remaining problematic characters
-                        safe_skill = re.sub(r'[^\x20-\x7E]', '', safe_skill)
-                        pdf.cell(200, 8, txt=f"- {safe_skill}", ln=True)
-                        added_skills += 1
-                        if added_skills >= 10:  # Limit to top 10
-                            break
-                except Exception as e:
-                    print(f"Warning: Could not add missing skill to PDF: {str(e)}", file=sys.stderr)
-                    continue
-            
-            if added_skills == 0:
-                pdf.set_font("Arial", 'I', size=10)
-                pdf.cell(200, 8, txt="Issue displaying missing skills", ln=True)
-        else:
-            pdf.set_font("Arial", 'I', size=10)
-            pdf.cell(200, 8, txt="No significant missing skills found!", ln=True)
-        
-        pdf.ln(5)
-        
-        # Suggestions
-        pdf.set_font("Arial", 'B', size=12)
-        pdf.cell(200, 10, txt="Improvement Suggestions:", ln=True)
-        pdf.set_font("Arial", size=10)
+    # Generate a safe filename for the report
+    base_filename = sanitize_text(os.path.splitext(display_filename)[0], is_filepath=True)
+    
+    # If sanitization removed everything, use a default name    
+    if not base_filename or len(base_filename.strip()) == 0:
+        base_filename = f"resume_{current_time}"
         
-        if suggestions:
-            added_suggestions = 0
-            
-            for suggestion in suggestions:
-                try:
-                    # First sanitize the text with multiple layers of safety
-                    safe_suggestion = sanitize_text(suggestion)
-                    
-                    if safe_suggestion and len(safe_suggestion.strip()) > 0:
-                        # Replace any remaining problematic characters
-                        safe_suggestion = re.sub(r'[^\x20-\x7E]', '', safe_suggestion)
-                        pdf.multi_cell(0, 8, txt=f"- {safe_suggestion}")
-                        added_suggestions += 1
-                except Exception as e:
-                    print(f"Warning: Could not add suggestion to PDF: {str(e)}", file=sys.stderr)
-                    continue
-            
-            if added_suggestions == 0:
-                pdf.set_font("Arial", 'I', size=10)
-                pdf.multi_cell(0, 8, txt="Your resume matches the job description well!")
-        else:
-            pdf.set_font("Arial", 'I', size=10)
-            pdf.multi_cell(0, 8, txt="Your resume matches the job description well!")
+    # Replace any remaining problematic characters in filename
+    base_filename = re.sub(r'[^a-zA-Z0-9_-]', '_', base_filename)
+    report_path = os.path.join(report_dir, f"{base_filename}_{current_time}_report.pdf")
+    
+    REPORT_TEMPLATE.render(fields, "pdf", report_path, prepared=True)
+    print(f"Report generated successfully at: {report_path}")
+    return report_path
+
+def job_hash(job_description):
+    """Hash of a job description as the analysis sees it (through clean_text)"""
+    return hashlib.sha256(clean_text(sanitize_text(job_description)).encode("utf-8")).hexdigest()
+
+def analysis_cache_key(resume_bytes, job_description, ocr=True, ocr_dpi=DEFAULT_OCR_DPI, resume_hash=None):
+    """Build the result cache key from the resume content, the normalized job
+    description and the version of the skill tables and scoring weights.
+    
+    `resume_hash` (the content_hash of the resume) can be given instead of the bytes.
+    """
+    # OCR settings change the text extracted from scanned resumes
+    version = f"{scoring_version()}:{RESULT_CACHE_FORMAT}:{ocr}:{ocr_dpi if ocr else 0}"
+    return make_key(resume_hash or content_hash(resume_bytes), job_hash(job_description), version)
+
+def get_cached_analysis(cache_key, display_filename, need_report=True, report_format="pdf", with_analysis=False):
+    """Return a cached analysis result, or None.
+    
+    With `need_report` the entry must have a PDF report that still exists or,
+    for the "html" and "json" report formats, the report fields, from which
+    the report is rendered into the result's "report" field. With
+    `with_analysis` a hit is returned as (result, AnalysisResult).
+    """
+    entry = RESULT_CACHE.get(cache_key)
+    report_file = entry.get("report_file") if entry is not None else None
+    if report_file and not os.path.exists(report_file):
+        # The report was cleaned up, the result has to be regenerated with it
+        RESULT_CACHE.invalidate(cache_key)
+        entry = None
+    inline_report = need_report and report_format != "pdf"
+    if inline_report:
+        has_report = entry is not None and entry.get("report_fields") is not None
+    else:
+        has_report = bool(report_file)
+    if entry is None or (need_report and not has_report):
+        record_cache("result", False)
+        return None
+    record_cache("result", True)
+    
+    from profiles import AnalysisResult
+    
+    analysis_result = AnalysisResult.from_record(entry["analysis"])
+    result = build_result(analysis_result, display_filename, report_file)
+    if "near_duplicate" in entry:
+        result["near_duplicate"] = entry["near_duplicate"]
+    if inline_report:
+        fields = dict(entry["report_fields"], filename=REPORT_TEMPLATE.prepare(display_filename or "Resume"))
+        with REPORT_RENDER_SECONDS.time(format=report_format):
+            result["report"] = REPORT_TEMPLATE.render(fields, report_format, prepared=True)
+    if with_analysis:
+        return result, analysis_result
+    return result
+
+def score_resume_text(resume_text, job_description, nlp, deadline=None):
+    """Score extracted resume text against a job description and add suggestions.
+    
+    Returns the detailed analysis, as an AnalysisResult (see profiles.py), with
+    the sanitized resume and job texts. Past `deadline` the similarity scoring
+    is skipped (keyword-only score).
+    """
+    # profiles.py builds on this module, it is imported on first use
+    from profiles import AnalysisResult
+    
+    # Sanitize texts
+    resume_text = sanitize_text(resume_text)
+    job_description = sanitize_text(job_description)
+    
+    # Identify resume sections
+    resume_sections = identify_resume_sections(resume_text)
+    
+    # Log sections found for debugging
+    print(f"Resume sections found: {list(resume_sections.keys())}", file=sys.stderr)
+    
+    # Perform detailed analysis
+    analysis_result = analyze_resume_detailed(resume_text, job_description, nlp, deadline=deadline)
+    
+    # Generate suggestions
+    suggestions = generate_suggestions(
+        analysis_result["missing_skills"], 
+        resume_sections, 
+        analysis_result["score"]
+    )
+    analysis_result["suggestions"] = suggestions
+    
+    return AnalysisResult.from_dict(analysis_result), resume_text, job_description
+
+def report_url(report_path):
+    """Return the API URL of a generated report, or None without a report"""
+    return f"/api/ats/reports/{os.path.basename(report_path)}" if report_path else None
+
+def build_result(analysis_result, display_filename, report_path=None):
+    """Shape a detailed analysis (an AnalysisResult) into the result returned by the API"""
+    # Add file info and report path to result
+    safe_filename = sanitize_text(display_filename, is_filepath=True)
+    url = report_url(report_path)
+    
+    result = {
+        "filename": safe_filename,
+        "original_filename": safe_filename,
+        "score": analysis_result.score,
+        "missing_keywords": analysis_result.missing_skills()[:10],
+        "suggestions": list(analysis_result.suggestions),
+        "section_scores": analysis_result.section_score_dict(),
+        "semantic_similarity": analysis_result.semantic_similarity,
+        "keyword_match": analysis_result.keyword_match,
+        "domain_match": analysis_result.domain_match,
+        "report_path": url,
+        "report_url": url,
+        "success": True
+    }
+    if analysis_result.incremental is not None:
+        # Which section scores were reused from earlier analyses (see score_sections)
+        result["incremental"] = analysis_result.incremental
+    return result
+
+def cache_entry(analysis_result, report_path=None, fields=None, near_duplicate=None):
+    """Result cache entry of an analysis: the compact record, from which
+    get_cached_analysis rebuilds the API result, the report and its fields"""
+    entry = {"analysis": analysis_result.to_record(), "report_file": report_path, "report_fields": fields}
+    if near_duplicate is not None:
+        entry["near_duplicate"] = near_duplicate
+    return entry
+
+def find_near_duplicate_result(matches, job_description, display_filename, ocr=True, ocr_dpi=DEFAULT_OCR_DPI,
+                               need_report=True, report_format="pdf"):
+    """Return the cached result of the most similar near-duplicate scored against
+    the same job description, with its match info, or (None, None)"""
+    for resume_hash, similarity in matches:
+        cache_key = analysis_cache_key(None, job_description, ocr=ocr, ocr_dpi=ocr_dpi, resume_hash=resume_hash)
+        cached_result = get_cached_analysis(
+            cache_key, display_filename, need_report=need_report, report_format=report_format
+        )
+        if cached_result is not None:
+            return cached_result, {"resume_hash": resume_hash, "similarity": round(similarity, 3)}
+    return None, None
+
+def analyze_resume(resume_path, job_description, nlp=None, original_filename=None, ocr=True, ocr_dpi=DEFAULT_OCR_DPI,
+                   parallel_threshold=PARALLEL_PAGE_THRESHOLD, resume_bytes=None, use_cache=True,
+                   generate_report=True, reuse_near_duplicates=False, deadline=None, user_id=None,
+                   report_format="pdf"):
+    """Analyze a resume against a job description using advanced NLP techniques.
+    
+    The resume is read from `resume_path`, or taken from `resume_bytes` when the
+    file contents are already in memory (in which case `resume_path` may be None).
+    Complete results are memoized by resume content, job description and
+    scoring version unless `use_cache` is False. With `generate_report` False
+    no report is rendered and the report fields are None. With `report_format`
+    "html" or "json" no PDF is written either; the report is returned inline
+    in the result's "report" field (see report_renderer.py).
+    
+    Resumes that are near-duplicates of an already analyzed one (see dedup.py)
+    are flagged with a "near_duplicate" field; with `reuse_near_duplicates` the
+    earlier result for the same job description is returned instead of
+    re-running the analysis.
+    
+    With a `deadline` (see deadline.py) the expensive stages that have not
+    finished when it passes are skipped: OCR, the similarity scoring (leaving
+    the keyword-only score) and the report. Such results carry "partial": True
+    and the "skipped_stages", and are not cached.
+    
+    Generated reports are recorded in the report catalog (see
+    report_catalog.py), under `user_id` when given.
+    """
+    try:
+        # In-memory resumes have no file name of their own
+        filename = os.path.basename(resume_path) if resume_path else (original_filename or "resume.pdf")
+        # Use original filename for display if provided
+        display_filename = original_filename if original_filename else filename
         
-        # Generate a safe filename for the report
-        if original_filename:
-            base_filename = sanitize_text(os.path.splitext(original_filename)[0], is_filepath=True)
-        else:
-            base_filename = sanitize_text(os.path.splitext(filename)[0], is_filepath=True)
+        # Read the resume once; the bytes are both hashed and extracted
+        if resume_bytes is None:
+            with open(resume_path, "rb") as f:
+                resume_bytes = f.read()
         
-        # If sanitization removed everything, use a default name    
-        if not base_filename or len(base_filename.strip()) == 0:
-            base_filename = f"resume_{current_time}"
-            
-        # Replace any remaining problematic characters in filename
-        base_filename = re.sub(r'[^a-zA-Z0-9_-]', '_', base_filename)
-        report_filename = f"{base_filename}_{current_time}_report.pdf"
-        report_path = os.path.join(report_dir, report_filename)
+        # Serve repeated submissions from the result cache
+        cache_key = None
+        if use_cache:
+            cache_key = analysis_cache_key(resume_bytes, job_description, ocr=ocr, ocr_dpi=ocr_dpi)
+            cached_result = get_cached_analysis(
+                cache_key, display_filename, need_report=generate_report, report_format=report_format
+            )
+            if cached_result is not None:
+                print(f"Returning cached analysis for {display_filename}", file=sys.stderr)
+                ANALYSES.inc(outcome="cached")
+                return cached_result
         
-        # Save the PDF with error handling
-        try:
-            pdf.output(report_path)
-            print(f"Report generated successfully at: {report_path}")
-            return report_path
-        except Exception as pdf_error:
-            print(f"Error saving PDF: {str(pdf_error)}", file=sys.stderr)
-            print(traceback.format_exc(), file=sys.stderr)
-            # Try with a simpler filename as a last resort
-            try:
-                emergency_path = os.path.join(report_dir, f"emergency_report_{current_time}.pdf")
-                pdf.output(emergency_path)
-                print(f"Emergency save successful at: {emergency_path}")
-                return emergency_path
-            except Exception as last_error:
-                print(f"Final save attempt failed: {str(last_error)}", file=sys.stderr)
-                raise
-            
-    except Exception as e:
-        print(f"Error in PDF report generation: {str(e)}", file=sys.stderr)
-        print(traceback.format_exc(), file=sys.stderr)
-        # Create minimal emergency report
-        try:
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            pdf.cell(200, 10, txt="ATS Resume Match Report", ln=True, align='C')
-            pdf.cell(200, 10, txt=f"Score: {score}%", ln=True)
-            pdf.cell(200, 10, txt="Error occurred during report generation.", ln=True)
-            
-            # Extra safe error handling
-            try:
-                safe_error = sanitize_text(str(e))
-                # Additional filter for any remaining problematic characters
-                safe_error = re.sub(r'[^\x20-\x7E]', '', safe_error)
-                pdf.multi_cell(0, 10, txt=f"Error details: {safe_error}")
-            except:
-                pdf.multi_cell(0, 10, txt="Error details unavailable")
-            
-            error_report_path = os.path.join(report_dir, f"error_report_{current_time}.pdf")
-            pdf.output(error_report_path)
-            print(f"Emergency report generated at: {error_report_path}")
-            return error_report_path
-        except Exception as inner_e:
-            print(f"Failed to generate emergency report: {str(inner_e)}", file=sys.stderr)
-            raise
-
-def analyze_resume(resume_path, job_description, nlp=None, original_filename=None):
-    """Analyze a resume against a job description using advanced NLP techniques"""
-    try:
         # Load spaCy if not provided
         if nlp is None:
             try:
@@ -827,91 +1116,164 @@ def analyze_resume(resume_path, job_description, nlp=None, original_filename=Non
             except Exception as e:
                 print(f"Failed to load spaCy model: {str(e)}", file=sys.stderr)
                 print(traceback.format_exc(), file=sys.stderr)
+                FAILURES.inc(type="model_load")
                 return error_response(f"Failed to load spaCy model: {str(e)}")
         
         # Extract text from resume
-        resume_text = extract_text_from_pdf(resume_path)
+        try:
+            resume_text = extract_document_text(
+                resume_bytes,
+                ocr=ocr,
+                ocr_dpi=ocr_dpi,
+                parallel_threshold=parallel_threshold,
+                source_path=resume_path,
+                deadline=deadline
+            )
+        except ValueError as e:
+            FAILURES.inc(type="unsupported_format")
+            return error_response(str(e))
+        
         if not resume_text:
-            print(f"Failed to extract text from resume: {resume_path}", file=sys.stderr)
+            print(f"Failed to extract text from resume: {filename}", file=sys.stderr)
+            FAILURES.inc(type="no_text")
             return error_response("Failed to extract text from resume")
         
-        # Sanitize texts
-        resume_text = sanitize_text(resume_text)
-        job_description = sanitize_text(job_description)
-        
-        # Identify resume sections
-        resume_sections = identify_resume_sections(resume_text)
-        
-        # Log sections found for debugging
-        print(f"Resume sections found: {list(resume_sections.keys())}", file=sys.stderr)
-        
-        # Perform detailed analysis
-        analysis_result = analyze_resume_detailed(resume_text, job_description, nlp)
+        # Flag re-exports of an already analyzed resume
+        near_duplicate = None
+        if use_cache:
+            matches = NEAR_DUPLICATE_INDEX.check(content_hash(resume_bytes), resume_text)
+            if matches:
+                near_duplicate = {"resume_hash": matches[0][0], "similarity": round(matches[0][1], 3)}
+                if reuse_near_duplicates:
+                    prior_result, prior_match = find_near_duplicate_result(
+                        matches, job_description, display_filename,
+                        ocr=ocr, ocr_dpi=ocr_dpi, need_report=generate_report, report_format=report_format
+                    )
+                    if prior_result is not None:
+                        print(f"Reusing analysis of a near-duplicate for {display_filename}", file=sys.stderr)
+                        ANALYSES.inc(outcome="reused")
+                        return dict(prior_result, near_duplicate=dict(prior_match, reused=True))
         
-        # Generate suggestions
-        suggestions = generate_suggestions(
-            analysis_result["missing_skills"], 
-            resume_sections, 
-            analysis_result["score"]
+        catalog_fields = {"resume_hash": content_hash(resume_bytes), "job_hash": job_hash(job_description)}
+        analysis_result, resume_text, job_description = score_resume_text(
+            resume_text, job_description, nlp, deadline=deadline
         )
-        analysis_result["suggestions"] = suggestions
         
-        # Use original filename for display if provided
-        display_filename = original_filename if original_filename else os.path.basename(resume_path)
-        
-        # Generate PDF report
-        report_path = generate_pdf_report(
-            os.path.basename(resume_path),
-            analysis_result,
-            resume_text,
-            job_description,
-            original_filename=original_filename
-        )
-        
-        # Add file info and report path to result
-        filename = os.path.basename(resume_path)
-        safe_filename = sanitize_text(display_filename, is_filepath=True)
+        # Generate the report
+        report_path = None
+        report = None
+        fields = None
+        if generate_report and deadline_expired(deadline):
+            deadline.skip("report")
+        elif generate_report:
+            with REPORT_RENDER_SECONDS.time(format=report_format):
+                # Sanitized once; kept in the cache to render the report again in any format
+                fields = REPORT_TEMPLATE.prepare(report_fields(display_filename, analysis_result))
+                if report_format == "pdf":
+                    report_path = generate_pdf_report(
+                        filename,
+                        analysis_result,
+                        resume_text,
+                        job_description,
+                        original_filename=original_filename,
+                        fields=fields
+                    )
+                else:
+                    report = REPORT_TEMPLATE.render(fields, report_format, prepared=True)
+        if report_path:
+            record_report(
+                report_path,
+                score=analysis_result.score,
+                filename=display_filename,
+                user_id=user_id,
+                **catalog_fields
+            )
         
         # Create final result object
-        result = {
-            "filename": safe_filename,
-            "original_filename": safe_filename,
-            "score": analysis_result["score"],
-            "missing_keywords": analysis_result["missing_skills"][:10],
-            "suggestions": analysis_result["suggestions"],
-            "section_scores": analysis_result["section_scores"],
-            "semantic_similarity": analysis_result["semantic_similarity"],
-            "keyword_match": analysis_result["keyword_match"],
-            "domain_match": analysis_result.get("domain_match", 0),
-            "report_path": f"/api/ats/reports/{os.path.basename(report_path)}",
-            "report_url": f"/api/ats/reports/{os.path.basename(report_path)}",
-            "success": True
-        }
+        result = build_result(analysis_result, display_filename, report_path)
+        
+        if near_duplicate is not None:
+            result["near_duplicate"] = dict(near_duplicate, reused=False)
+        
+        if deadline is not None and deadline.partial:
+            # A degraded result is not what a full analysis would return, never cache it
+            result["partial"] = True
+            result["skipped_stages"] = list(deadline.skipped)
+            print(f"Deadline passed, skipped: {', '.join(deadline.skipped)}", file=sys.stderr)
+            ANALYSES.inc(outcome="partial")
+        else:
+            ANALYSES.inc(outcome="complete")
+            if cache_key is not None:
+                RESULT_CACHE.put(
+                    cache_key, cache_entry(analysis_result, report_path, fields, result.get("near_duplicate"))
+                )
         
         print(f"Analysis completed successfully for {display_filename}", file=sys.stderr)
+        if report is not None:
+            result = dict(result, report=report)
         return result
         
     except Exception as e:
         print(f"Error analyzing resume: {str(e)}", file=sys.stderr)
         print(traceback.format_exc(), file=sys.stderr)
+        FAILURES.inc(type=type(e).__name__)
         return error_response(f"Error analyzing resume: {str(e)}")
 
 def main():
+    # The budget counts from process start, model loading included
+    started_at = time.time()
     try:
         # Parse command line arguments
         parser = argparse.ArgumentParser(description="Enhanced Resume Analyzer")
         parser.add_argument("--resume", dest="resume_path", help="Path to resume file")
         parser.add_argument("--job", dest="job_description", help="Job description text")
         parser.add_argument("--original-filename", dest="original_filename", help="Original filename of the resume")
+        parser.add_argument("--no-ocr", action="store_true", help="Disable OCR of image-only pages")
+        parser.add_argument("--ocr-dpi", type=int, default=DEFAULT_OCR_DPI, help="Resolution used to rasterize pages for OCR")
+        parser.add_argument("--parallel-page-threshold", type=int, default=PARALLEL_PAGE_THRESHOLD,
+                            help="Extract PDFs with at least this many pages in parallel (0 disables)")
+        parser.add_argument("--no-cache", action="store_true", help="Always re-run the analysis instead of using cached results")
+        parser.add_argument("--reuse-near-duplicates", action="store_true",
+                            help="Return the earlier result of a near-duplicate resume for the same job description")
+        parser.add_argument("--stdin", action="store_true",
+                            help="Read the resume bytes and job description from stdin (see protocol.py)")
+        parser.add_argument("--budget-seconds", type=float,
+                            help="Time budget; stages still running when it runs out are skipped and the result is marked partial")
+        parser.add_argument("--metrics-file", help="Write the run's metrics (Prometheus text format) to this file")
+        parser.add_argument("--user-id", help="Owner of the generated report in the report catalog")
+        parser.add_argument("--report-format", choices=FORMATS, default="pdf",
+                            help="Render the report as a PDF file, or inline in the result as HTML or JSON")
         parser.add_argument("--debug", action="store_true", help="Enable debug output")
         
         args, unknown = parser.parse_known_args()
+        budget_seconds = args.budget_seconds
+        
+        # Resume bytes and job description from stdin, no temporary file needed
+        resume_bytes = None
+        if args.stdin:
+            try:
+                request = read_request(sys.stdin.buffer)
+            except ProtocolError as e:
+                print(json.dumps(error_response(f"Invalid request: {str(e)}")))
+                return 1
+            if request is None:
+                print(json.dumps(error_response("No request received on stdin")))
+                return 1
+            resume_bytes = request["resume_bytes"]
+            args.job_description = request.get("job_description") or args.job_description
+            args.original_filename = request.get("original_filename") or args.original_filename
+            budget_seconds = request.get("budget_seconds") or budget_seconds
+            args.user_id = request.get("user_id") or args.user_id
+            args.report_format = request.get("report_format") or args.report_format
+            if args.report_format not in FORMATS:
+                print(json.dumps(error_response(f"Unsupported report format: {args.report_format}")))
+                return 1
         
         # Check if using positional arguments (legacy mode)
-        if not args.resume_path and len(unknown) >= 1:
+        if resume_bytes is None and not args.resume_path and len(unknown) >= 1:
             args.resume_path = unknown[0]
         
-        if not args.job_description and len(unknown) >= 2:
+        if resume_bytes is None and not args.job_description and len(unknown) >= 2:
             args.job_description = unknown[1]
         
         # Check for original filename in unknown args
@@ -925,11 +1287,11 @@ def main():
             original_filename = args.original_filename
         
         # Validate inputs
-        if not args.resume_path:
+        if resume_bytes is None and not args.resume_path:
             print(json.dumps(error_response("Resume path is required")))
             return 1
             
-        if not os.path.exists(args.resume_path):
+        if resume_bytes is None and not os.path.exists(args.resume_path):
             print(json.dumps(error_response(f"Resume file not found: {args.resume_path}")))
             return 1
             
@@ -937,20 +1299,29 @@ def main():
             print(json.dumps(error_response("Job description is required")))
             return 1
         
-        # Load spaCy model
-        try:
-            nlp = spacy.load("en_core_web_sm")
-            if args.debug:
-                print("Successfully loaded spaCy model", file=sys.stderr)
-        except Exception as e:
-            print(json.dumps(error_response(f"Failed to load spaCy model: {str(e)}")))
-            return 1
+        deadline = Deadline(expires_at=started_at + float(budget_seconds)) if budget_seconds else None
         
-        # Analyze resume
-        result = analyze_resume(args.resume_path, args.job_description, nlp, original_filename)
+        # Analyze resume (the spaCy model is only loaded on a result cache miss)
+        result = analyze_resume(
+            args.resume_path,
+            args.job_description,
+            None,
+            original_filename,
+            ocr=not args.no_ocr,
+            ocr_dpi=args.ocr_dpi,
+            parallel_threshold=args.parallel_page_threshold,
+            resume_bytes=resume_bytes,
+            use_cache=not args.no_cache,
+            reuse_near_duplicates=args.reuse_near_duplicates,
+            deadline=deadline,
+            user_id=args.user_id,
+            report_format=args.report_format
+        )
         
         # Output result as JSON
         print(json.dumps(result, ensure_ascii=True))
+        if args.metrics_file:
+            METRICS.write_textfile(args.metrics_file)
         return 0
         
     except Exception as e:
@@ -959,4 +1330,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # Modules imported on first use (profiles.py) import this one by name
+    sys.modules.setdefault("enhanced_analyzer", sys.modules[__name__])
     sys.exit(main()) 
\ No newline at end of file
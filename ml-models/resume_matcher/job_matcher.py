@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import argparse
+import traceback
+from collections import Counter
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from enhanced_analyzer import (
+    ALL_DOMAIN_SKILLS,
+    error_response,
+    sanitize_text,
+    clean_text,
+    identify_resume_sections,
+    get_skill_lemmas,
+    extract_skills,
+    combine_scores,
+    generate_suggestions,
+    build_result
+)
+from ocr import DEFAULT_OCR_DPI
+from profiles import AnalysisResult
+from snapshot import load_pipeline
+from text_extraction import extract_document_text
+
+def _doc_vectors(docs):
+    """Stack document vectors into a matrix, with a per-row norm and has_vector flag"""
+    vectors = np.array([doc.vector for doc in docs], dtype=np.float32)
+    if vectors.ndim != 2:
+        vectors = vectors.reshape(len(docs), -1)
+    has_vector = np.array([doc.has_vector for doc in docs], dtype=bool)
+    norms = np.array([doc.vector_norm if has else 0.0 for doc, has in zip(docs, has_vector)], dtype=np.float32)
+    return vectors, norms, has_vector
+
+def _cosine_matrix(a_vectors, a_norms, b_vectors, b_norms):
+    """Pairwise cosine similarity, 0 where either side has a zero vector (as Doc.similarity)"""
+    if a_vectors.shape[1] == 0 or b_vectors.shape[1] == 0:
+        return np.zeros((len(a_norms), len(b_norms)), dtype=np.float32)
+    denominator = np.outer(a_norms, b_norms)
+    dots = a_vectors @ b_vectors.T
+    return np.divide(dots, denominator, out=np.zeros_like(dots), where=denominator > 0)
+
+def _content_lemmas(doc):
+    return set(token.lemma_ for token in doc if not token.is_stop and not token.is_punct)
+
+def _overlap_matrix(a_docs, b_docs):
+    """|lemmas(a) & lemmas(b)| / |lemmas(b)| for every pair, the keyword fallback of
+    calculate_section_match_score"""
+    a_sets = [_content_lemmas(doc) for doc in a_docs]
+    b_sets = [_content_lemmas(doc) for doc in b_docs]
+    vocabulary = {lemma: index for index, lemma in enumerate(set().union(*b_sets))} if b_sets else {}
+    a_matrix = np.zeros((len(a_sets), len(vocabulary)), dtype=np.float32)
+    b_matrix = np.zeros((len(b_sets), len(vocabulary)), dtype=np.float32)
+    for row, lemmas in enumerate(a_sets):
+        a_matrix[row, [vocabulary[lemma] for lemma in lemmas if lemma in vocabulary]] = 1
+    for row, lemmas in enumerate(b_sets):
+        b_matrix[row, [vocabulary[lemma] for lemma in lemmas]] = 1
+    sizes = b_matrix.sum(axis=1)
+    intersection = a_matrix @ b_matrix.T
+    return np.divide(intersection, sizes, out=np.zeros_like(intersection), where=sizes > 0)
+
+def _skill_match_counts(resume_skills, job_skill_lists):
+    """Number of resume skills (with repeats) found in each job's skill list"""
+    vocabulary = {}
+    for job_skills in job_skill_lists:
+        for skill in job_skills:
+            vocabulary.setdefault(skill.lower(), len(vocabulary))
+    resume_counts = np.zeros(len(vocabulary), dtype=np.float32)
+    for skill, count in Counter(skill.lower() for skill in resume_skills).items():
+        if skill in vocabulary:
+            resume_counts[vocabulary[skill]] = count
+    job_matrix = np.zeros((len(job_skill_lists), len(vocabulary)), dtype=np.float32)
+    for row, job_skills in enumerate(job_skill_lists):
+        job_matrix[row, [vocabulary[skill.lower()] for skill in job_skills]] = 1
+    return job_matrix @ resume_counts
+
+def match_jobs(resume_text, jobs, nlp):
+    """Score one resume against many job descriptions in a single pass.
+
+    The resume is parsed, sectioned and skill-matched once; the job
+    descriptions are parsed together with nlp.pipe, and the skill overlap and
+    similarity scores for every job are computed as matrix operations. `jobs`
+    is a list of (job_id, job_text). Returns (job_id, AnalysisResult) pairs
+    ranked by score, the same analysis as score_resume_text.
+    """
+    resume_text = sanitize_text(resume_text)
+    resume_sections = identify_resume_sections(resume_text)
+    job_ids = [job_id for job_id, _ in jobs]
+    job_texts = [sanitize_text(job_text) for _, job_text in jobs]
+    clean_jobs = [clean_text(job_text) for job_text in job_texts]
+
+    # Parse the resume, its sections and the skills once, and the jobs in one batch
+    skill_lemmas = get_skill_lemmas(nlp)
+    resume_doc = nlp(clean_text(resume_text))
+    section_names = list(resume_sections.keys())
+    section_docs = list(nlp.pipe(clean_text(resume_sections[section]) for section in section_names))
+    job_docs = list(nlp.pipe(clean_jobs))
+
+    # Skill overlap: resume skills against a (jobs x skills) indicator matrix
+    resume_skills = extract_skills(resume_text, nlp, doc=resume_doc, skill_lemmas=skill_lemmas)
+    domain_skills_in_resume = extract_skills(
+        resume_text, nlp, ALL_DOMAIN_SKILLS, doc=resume_doc, skill_lemmas=skill_lemmas
+    )
+    job_skill_lists = [
+        extract_skills(job_text, nlp, doc=doc, skill_lemmas=skill_lemmas)
+        for job_text, doc in zip(job_texts, job_docs)
+    ]
+    domain_skill_lists = [
+        extract_skills(job_text, nlp, ALL_DOMAIN_SKILLS, doc=doc, skill_lemmas=skill_lemmas)
+        for job_text, doc in zip(job_texts, job_docs)
+    ]
+    keyword_matches = _skill_match_counts(resume_skills, job_skill_lists)
+    domain_matches = _skill_match_counts(domain_skills_in_resume, domain_skill_lists)
+
+    # Similarity: (sections x jobs) cosine matrix, with the keyword overlap
+    # fallback wherever a side has no vector
+    job_vectors, job_norms, job_has_vector = _doc_vectors(job_docs)
+    resume_vectors, resume_norms, resume_has_vector = _doc_vectors([resume_doc])
+    semantic = _cosine_matrix(resume_vectors, resume_norms, job_vectors, job_norms)[0]
+    semantic = np.where(resume_has_vector[0] & job_has_vector, semantic, 0)
+    if section_docs:
+        section_vectors, section_norms, section_has_vector = _doc_vectors(section_docs)
+        section_matrix = np.where(
+            np.outer(section_has_vector, job_has_vector),
+            _cosine_matrix(section_vectors, section_norms, job_vectors, job_norms),
+            _overlap_matrix(section_docs, job_docs)
+        )
+    else:
+        section_matrix = np.zeros((0, len(jobs)), dtype=np.float32)
+
+    ranked = []
+    resume_skills_lower = set(skill.lower() for skill in resume_skills)
+    clean_resume = clean_text(resume_text)
+    for column, job_id in enumerate(job_ids):
+        job_skills = job_skill_lists[column]
+        domain_skills_in_job = domain_skill_lists[column]
+        skill_scores = {
+            "found_skills": resume_skills,
+            "missing_skills": [skill for skill in job_skills if skill.lower() not in resume_skills_lower],
+            "keyword_score": float(keyword_matches[column]) / max(1, len(job_skills)) if job_skills else 0,
+            "domain_score": float(domain_matches[column]) / len(domain_skills_in_job) if domain_skills_in_job else 0
+        }
+
+        section_scores = {}
+        for row, section in enumerate(section_names):
+            content = resume_sections[section]
+            if not content or not job_texts[column]:
+                section_scores[section] = 0
+            elif clean_text(content) == clean_jobs[column]:
+                # Identical token sequences are fully similar
+                section_scores[section] = 1.0
+            else:
+                section_scores[section] = float(section_matrix[row, column])
+        semantic_score = float(semantic[column])
+        if clean_resume == clean_jobs[column] and job_has_vector[column] and resume_has_vector[0]:
+            semantic_score = 1.0
+
+        analysis_result = combine_scores(skill_scores, {"section_scores": section_scores, "semantic_score": semantic_score})
+        analysis_result["suggestions"] = generate_suggestions(
+            analysis_result["missing_skills"], resume_sections, analysis_result["score"]
+        )
+        ranked.append((job_id, AnalysisResult.from_dict(analysis_result)))
+
+    ranked.sort(key=lambda item: item[1].score, reverse=True)
+    return ranked
+
+def load_job_files(paths):
+    """Read job description files (or every .txt file in a directory) into a list of (job_id, text)"""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(".txt"))
+        else:
+            files = [path]
+        for job_file in files:
+            with open(job_file, "r", encoding="utf-8") as f:
+                jobs.append((os.path.basename(job_file), f.read()))
+    return jobs
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Rank many job descriptions against one resume")
+        parser.add_argument("--resume", dest="resume_path", required=True, help="Path to resume file")
+        parser.add_argument("--jobs", nargs="+", required=True, help="Job description text files or directories of them")
+        parser.add_argument("--top-k", type=int, help="Only return the best K jobs")
+        parser.add_argument("--no-ocr", action="store_true", help="Disable OCR of image-only pages")
+        parser.add_argument("--ocr-dpi", type=int, default=DEFAULT_OCR_DPI, help="Resolution used to rasterize pages for OCR")
+
+        args = parser.parse_args()
+
+        if not os.path.exists(args.resume_path):
+            print(json.dumps(error_response(f"Resume file not found: {args.resume_path}")))
+            return 1
+
+        jobs = [(job_id, job_text) for job_id, job_text in load_job_files(args.jobs) if job_text.strip()]
+        if not jobs:
+            print(json.dumps(error_response("At least one job description is required")))
+            return 1
+
+        try:
+            nlp = load_pipeline()
+        except Exception as e:
+            print(json.dumps(error_response(f"Failed to load spaCy model: {str(e)}")))
+            return 1
+
+        with open(args.resume_path, "rb") as f:
+            resume_bytes = f.read()
+        try:
+            resume_text = extract_document_text(resume_bytes, ocr=not args.no_ocr, ocr_dpi=args.ocr_dpi,
+                                                source_path=args.resume_path)
+        except ValueError as e:
+            print(json.dumps(error_response(str(e))))
+            return 1
+        if not resume_text:
+            print(json.dumps(error_response("Failed to extract text from resume")))
+            return 1
+
+        ranked = match_jobs(resume_text, jobs, nlp)
+        if args.top_k:
+            ranked = ranked[:args.top_k]
+
+        filename = os.path.basename(args.resume_path)
+        results = [dict(build_result(analysis_result, filename), job=job_id) for job_id, analysis_result in ranked]
+        print(json.dumps({"results": results, "total": len(jobs), "success": True}, ensure_ascii=True))
+        return 0
+
+    except Exception as e:
+        print(json.dumps(error_response(f"Application error: {str(e)}")))
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
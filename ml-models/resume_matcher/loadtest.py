@@ -0,0 +1,537 @@
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import itertools
+import threading
+import traceback
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from corpus import generate_jobs, generate_resume, iter_manifest, load_jobs, render_pdf
+from protocol import encode_request, read_frame
+
+# Load test of the analyzer on localhost, without MongoDB or Node.
+#
+# Replays the POST /api/ats/analyze workload: each request is one job
+# description with 1-10 resumes (seeded from a corpus.py corpus, or one
+# generated in memory), handled by a stand-in for the backend controller that
+# analyzes every resume and ranks the results. Two targets:
+#
+#   worker   a worker.py process speaking the framed protocol; a request's
+#            resumes are submitted together and queue for its analyzer processes
+#   cli      one `enhanced_analyzer.py --stdin` process per resume, one resume
+#            after another, as the backend controller runs it today
+#
+# Requests arrive at --rate per second (Poisson arrivals, open loop) with at
+# most --concurrency in flight, or back to back from --concurrency clients
+# when no rate is given. Arrivals that find every client busy wait for one;
+# that is the admission wait, while the queue wait is the time a resume spent
+# in the worker's queue before an analyzer process took it.
+#
+# The worker target's analyzer processes are started before the run, as in a
+# long-running service. The summary has throughput, request latency
+# percentiles, error rates, admission and queue waits and per-worker RSS;
+# --output also writes a timeline sampled every --sample-seconds.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT = os.path.join(SCRIPT_DIR, "worker.py")
+ANALYZER_SCRIPT = os.path.join(SCRIPT_DIR, "enhanced_analyzer.py")
+
+TARGETS = ("worker", "cli")
+PERCENTILES = (50, 90, 95, 99)
+# Resumes per request, as uploaded to POST /api/ats/analyze
+MIN_RESUMES = 1
+MAX_RESUMES = 10
+# Resumes and jobs of an in-memory corpus
+DEFAULT_POOL_SIZE = 200
+DEFAULT_JOBS = 20
+# The backend's analysis budget (ANALYSIS_BUDGET_SECONDS in atsController.js)
+DEFAULT_BUDGET_SECONDS = 150
+
+# Subprocesses get the environment the backend gives the analyzer
+ANALYZER_ENV = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONWARNINGS="ignore")
+
+def process_rss_bytes(pid):
+    """Resident set size of another process in bytes, or None if it cannot be read"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def load_workload(corpus_dir=None, pool_size=DEFAULT_POOL_SIZE, seed=0):
+    """Resumes and jobs to replay: ([(filename, PDF bytes)], {job ID: job description}).
+
+    Up to `pool_size` resumes are sampled from a corpus directory, or
+    generated in memory with the seed. Text resumes are rendered as PDFs,
+    the format the backend receives.
+    """
+    rng = random.Random(seed)
+    if corpus_dir:
+        jobs = load_jobs(corpus_dir)
+        entries = list(iter_manifest(corpus_dir))
+        if len(entries) > pool_size:
+            entries = rng.sample(entries, pool_size)
+        resumes = []
+        for entry in entries:
+            with open(entry["path"], "rb") as f:
+                data = f.read()
+            if entry["path"].endswith(".txt"):
+                data = render_pdf(data.decode("utf-8"))
+            resumes.append((f"{entry['id']}.pdf", data))
+        return resumes, jobs
+
+    job_list = generate_jobs(DEFAULT_JOBS, seed)
+    resumes = [
+        (f"{resume['id']}.pdf", render_pdf(resume["text"]))
+        for resume in (generate_resume(index, job_list, seed=seed) for index in range(pool_size))
+    ]
+    return resumes, {job["id"]: job["text"] for job in job_list}
+
+def iter_requests(resumes, jobs, seed=0, min_resumes=MIN_RESUMES, max_resumes=MAX_RESUMES):
+    """Endless seeded stream of requests: {"id", "job_id", "job_description", "resumes"}"""
+    rng = random.Random(seed)
+    job_ids = sorted(jobs)
+    for index in itertools.count(1):
+        job_id = rng.choice(job_ids)
+        count = min(len(resumes), rng.randint(min_resumes, max_resumes))
+        yield {
+            "id": index,
+            "job_id": job_id,
+            "job_description": jobs[job_id],
+            "resumes": rng.sample(resumes, count)
+        }
+
+class WorkerTarget:
+    """A worker.py process; responses are matched to requests by ID as they arrive"""
+
+    name = "worker"
+
+    def __init__(self, workers=1, max_requests=None, max_rss_mb=None, use_cache=False, log=None):
+        command = [sys.executable, WORKER_SCRIPT, "--workers", str(workers)]
+        if max_requests is not None:
+            command += ["--max-requests", str(max_requests)]
+        if max_rss_mb is not None:
+            command += ["--max-rss-mb", str(max_rss_mb)]
+        if not use_cache:
+            command.append("--no-cache")
+        self.workers = workers
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log or subprocess.DEVNULL, env=ANALYZER_ENV
+        )
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_responses, name="worker-responses", daemon=True)
+        self._reader.start()
+
+    def _read_responses(self):
+        while True:
+            payload = read_frame(self.process.stdout)
+            if payload is None:
+                break
+            response = json.loads(payload.decode("utf-8"))
+            with self._lock:
+                future = self._pending.pop(response.get("id"), None)
+            if future is not None:
+                future.set_result(response)
+        # The worker exited: fail whatever is still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("Worker process exited"))
+
+    def _send(self, resume_bytes, job_description, **fields):
+        request_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+        frame = encode_request(resume_bytes, job_description, id=request_id, **fields)
+        with self._write_lock:
+            self.process.stdin.write(frame)
+            self.process.stdin.flush()
+        return future
+
+    def analyze(self, job_description, resumes, fields):
+        """[(result, queue seconds)] of a request's resumes, submitted together"""
+        futures = [
+            self._send(resume_bytes, job_description, original_filename=filename, **fields)
+            for filename, resume_bytes in resumes
+        ]
+        analyzed = []
+        for future in futures:
+            response = future.result()
+            analyzed.append((response["result"], response.get("queue_seconds")))
+        return analyzed
+
+    def warm_up(self, job_description, resume):
+        """Start every analyzer process with one untimed analysis each"""
+        futures = [
+            self._send(resume[1], job_description, original_filename=resume[0], generate_report=False)
+            for _ in range(self.workers)
+        ]
+        for future in futures:
+            future.result()
+
+    def sample(self):
+        """Queue depth and per-process memory of the worker"""
+        stats = self._send(b"", None, command="stats").result()["stats"]
+        workers = []
+        for slot in stats["workers"]:
+            rss = process_rss_bytes(slot["pid"]) if slot["alive"] else None
+            workers.append({
+                "worker": slot["slot"],
+                "pid": slot["pid"],
+                "handled": slot["handled"],
+                "rss_bytes": rss if rss is not None else slot["rss_bytes"]
+            })
+        return {"queued": stats["queued"], "recycles": stats["recycles"], "workers": workers}
+
+    def close(self):
+        # End of input: the worker finishes what is queued and exits
+        with self._write_lock:
+            self.process.stdin.close()
+        self.process.wait()
+        self._reader.join()
+
+class CliTarget:
+    """One enhanced_analyzer.py process per resume, as the backend controller spawns them"""
+
+    name = "cli"
+
+    def __init__(self, use_cache=False, log=None):
+        self.command = [sys.executable, ANALYZER_SCRIPT, "--stdin"]
+        if not use_cache:
+            self.command.append("--no-cache")
+        self.log = log or subprocess.DEVNULL
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def _run(self, job_description, filename, resume_bytes, fields):
+        process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self.log, env=ANALYZER_ENV
+        )
+        with self._lock:
+            self._running.add(process.pid)
+        try:
+            request = dict(
+                fields,
+                resume_base64=base64.b64encode(resume_bytes).decode("ascii"),
+                job_description=job_description,
+                original_filename=filename
+            )
+            stdout, _ = process.communicate(json.dumps(request).encode("utf-8"))
+        finally:
+            with self._lock:
+                self._running.discard(process.pid)
+        if process.returncode != 0:
+            return {"error": f"Analyzer exited with code {process.returncode}", "success": False}
+        # Like the backend, take the JSON object out of whatever else was printed
+        text = stdout.decode("utf-8", "replace")
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end == -1:
+            return {"error": "Invalid JSON output format", "success": False}
+        return json.loads(text[start:end + 1])
+
+    def warm_up(self, job_description, resume):
+        # Every analysis starts a new process; that start is part of what is measured
+        pass
+
+    def analyze(self, job_description, resumes, fields):
+        """[(result, queue seconds)] of a request's resumes, analyzed one after another"""
+        return [
+            (self._run(job_description, filename, resume_bytes, fields), None)
+            for filename, resume_bytes in resumes
+        ]
+
+    def sample(self):
+        """Memory of the analyzer processes running right now"""
+        with self._lock:
+            pids = sorted(self._running)
+        workers = []
+        for pid in pids:
+            rss = process_rss_bytes(pid)
+            if rss is not None:
+                workers.append({"worker": pid, "pid": pid, "handled": None, "rss_bytes": rss})
+        return {"queued": 0, "recycles": {}, "workers": workers}
+
+    def close(self):
+        pass
+
+def handle_request(target, request, fields):
+    """Stand-in for the backend's analyzeResume controller: every resume analyzed, results ranked"""
+    results = []
+    queue_waits = []
+    try:
+        analyzed = target.analyze(request["job_description"], request["resumes"], fields)
+    except Exception as e:
+        analyzed = [({"error": str(e), "success": False}, None) for _ in request["resumes"]]
+    for (filename, _), (result, queue_seconds) in zip(request["resumes"], analyzed):
+        if queue_seconds is not None:
+            queue_waits.append(queue_seconds)
+        if result.get("error"):
+            results.append({"filename": filename, "error": result["error"], "score": 0, "success": False})
+        else:
+            results.append(dict(result, filename=filename, success=True))
+    results.sort(key=lambda result: result.get("score") or 0, reverse=True)
+    return {"success": True, "results": results}, queue_waits
+
+class LoadRecorder:
+    """Completed requests and periodic samples of the target, in time order"""
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.requests = []
+        self.samples = []
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def record(self, arrival, start, end, response, queue_waits):
+        results = response["results"]
+        entry = {
+            "arrival": arrival - self.started_at,
+            "end": end - self.started_at,
+            "latency": end - arrival,
+            "admission_wait": start - arrival,
+            "queue_waits": queue_waits,
+            "resumes": len(results),
+            "failed": sum(1 for result in results if not result["success"]),
+            "partial": sum(1 for result in results if result.get("partial"))
+        }
+        with self._lock:
+            self.in_flight -= 1
+            self.requests.append(entry)
+
+    def sample(self, target):
+        try:
+            sample = target.sample()
+        except Exception as e:
+            sample = {"error": str(e)}
+        with self._lock:
+            sample.update(t=round(time.time() - self.started_at, 2), in_flight=self.in_flight)
+            self.samples.append(sample)
+
+def _distribution(values):
+    if not len(values):
+        return None
+    values = np.asarray(values, dtype=float)
+    summary = {"mean": round(float(values.mean()), 4)}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = round(float(np.percentile(values, percentile)), 4)
+    summary["max"] = round(float(values.max()), 4)
+    return summary
+
+def _timeline(requests, samples, sample_seconds):
+    """Per-interval throughput, latency and errors, next to the target sample taken in it"""
+    if not requests:
+        return []
+    intervals = int(max(entry["end"] for entry in requests) // sample_seconds) + 1
+    buckets = [[] for _ in range(intervals)]
+    for entry in requests:
+        buckets[int(entry["end"] // sample_seconds)].append(entry)
+    timeline = []
+    for index, bucket in enumerate(buckets):
+        t = (index + 1) * sample_seconds
+        sample = next((sample for sample in samples if sample["t"] >= index * sample_seconds), {})
+        latencies = [entry["latency"] for entry in bucket]
+        timeline.append({
+            "t": round(t, 2),
+            "requests_per_second": round(len(bucket) / sample_seconds, 3),
+            "resumes_per_second": round(sum(entry["resumes"] for entry in bucket) / sample_seconds, 3),
+            "failed_resumes": sum(entry["failed"] for entry in bucket),
+            "p50_seconds": round(float(np.percentile(latencies, 50)), 4) if latencies else None,
+            "p95_seconds": round(float(np.percentile(latencies, 95)), 4) if latencies else None,
+            "in_flight": sample.get("in_flight"),
+            "queued": sample.get("queued"),
+            "rss_mb": {
+                str(worker["worker"]): round(worker["rss_bytes"] / (1024 * 1024), 1)
+                for worker in sample.get("workers", []) if worker["rss_bytes"]
+            }
+        })
+    return timeline
+
+def summarize(recorder, seconds, sample_seconds):
+    """Summary report of a run, with the timeline under "timeline" """
+    requests = recorder.requests
+    resumes = sum(entry["resumes"] for entry in requests)
+    failed_resumes = sum(entry["failed"] for entry in requests)
+    failed_requests = sum(1 for entry in requests if entry["failed"])
+
+    workers = {}
+    for sample in recorder.samples:
+        for worker in sample.get("workers", []):
+            if not worker["rss_bytes"]:
+                continue
+            rss_mb = worker["rss_bytes"] / (1024 * 1024)
+            summary = workers.setdefault(str(worker["worker"]), {"first_rss_mb": round(rss_mb, 1), "peak_rss_mb": 0})
+            summary["peak_rss_mb"] = round(max(summary["peak_rss_mb"], rss_mb), 1)
+            summary["last_rss_mb"] = round(rss_mb, 1)
+            summary["pids"] = sorted(set(summary.get("pids", [])) | {worker["pid"]})
+            if worker["handled"] is not None:
+                summary["handled"] = worker["handled"]
+    last_sample = next((sample for sample in reversed(recorder.samples) if "recycles" in sample), {})
+
+    return {
+        "seconds": round(seconds, 2),
+        "requests": len(requests),
+        "resumes": resumes,
+        "requests_per_second": round(len(requests) / seconds, 3) if seconds else None,
+        "resumes_per_second": round(resumes / seconds, 3) if seconds else None,
+        "request_error_rate": round(failed_requests / len(requests), 4) if requests else None,
+        "resume_error_rate": round(failed_resumes / resumes, 4) if resumes else None,
+        "partial_resumes": sum(entry["partial"] for entry in requests),
+        "latency_seconds": _distribution([entry["latency"] for entry in requests]),
+        "admission_wait_seconds": _distribution([entry["admission_wait"] for entry in requests]),
+        "queue_wait_seconds": _distribution([wait for entry in requests for wait in entry["queue_waits"]]),
+        "workers": workers,
+        "recycles": last_sample.get("recycles", {}),
+        "timeline": _timeline(requests, recorder.samples, sample_seconds)
+    }
+
+def run_load(target, requests, concurrency=4, rate=None, duration=60.0, max_requests=None, fields=None,
+             sample_seconds=1.0, seed=0):
+    """Replay requests against a target for `duration` seconds (or `max_requests`) and summarize.
+
+    With a `rate`, requests arrive as a Poisson process and wait for one of
+    `concurrency` clients; without one, `concurrency` clients send requests
+    back to back. Requests still in flight at the end are waited for.
+    """
+    fields = fields or {}
+    rng = random.Random(seed)
+    started_at = time.time()
+    recorder = LoadRecorder(started_at)
+    clients = threading.BoundedSemaphore(concurrency)
+    stop_sampling = threading.Event()
+
+    def sample_loop():
+        while not stop_sampling.wait(sample_seconds):
+            recorder.sample(target)
+
+    def client(request, arrival):
+        try:
+            start = time.time()
+            response, queue_waits = handle_request(target, request, fields)
+            recorder.record(arrival, start, time.time(), response, queue_waits)
+        finally:
+            if rate is None:
+                clients.release()
+
+    recorder.sample(target)
+    sampler = threading.Thread(target=sample_loop, name="load-sampler", daemon=True)
+    sampler.start()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-client") as executor:
+        next_arrival = started_at
+        for sent, request in enumerate(requests):
+            if max_requests and sent >= max_requests:
+                break
+            if rate:
+                next_arrival += rng.expovariate(rate)
+                if next_arrival - started_at >= duration:
+                    break
+                time.sleep(max(0.0, next_arrival - time.time()))
+                arrival = next_arrival
+            else:
+                clients.acquire()
+                arrival = time.time()
+                if arrival - started_at >= duration:
+                    clients.release()
+                    break
+            recorder.begin()
+            executor.submit(client, request, arrival)
+    seconds = time.time() - started_at
+    stop_sampling.set()
+    sampler.join()
+    recorder.sample(target)
+    return summarize(recorder, seconds, sample_seconds)
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Load test the resume analyzer on localhost")
+        parser.add_argument("--target", choices=TARGETS, default="worker",
+                            help="worker.py process, or one analyzer process per resume like the backend")
+        parser.add_argument("--corpus", help="Corpus directory from corpus.py (default: generated in memory)")
+        parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Distinct resumes to replay")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the resume sample and request mix")
+        parser.add_argument("--min-resumes", type=int, default=MIN_RESUMES, help="Fewest resumes per request")
+        parser.add_argument("--max-resumes", type=int, default=MAX_RESUMES, help="Most resumes per request")
+        parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at most")
+        parser.add_argument("--rate", type=float, help="Requests per second (default: back to back)")
+        parser.add_argument("--duration", type=float, default=60.0, help="Seconds to send requests for")
+        parser.add_argument("--requests", type=int, help="Stop after this many requests")
+        parser.add_argument("--workers", type=int, default=2, help="Analyzer processes of the worker target")
+        parser.add_argument("--max-requests", type=int, help="Recycle limit of the worker's processes")
+        parser.add_argument("--max-rss-mb", type=int, help="Memory limit of the worker's processes")
+        parser.add_argument("--cache", action="store_true", help="Let repeated resumes hit the result cache")
+        parser.add_argument("--report-format", choices=("pdf", "html", "json"), default="json",
+                            help="Report output; pdf writes report files like production")
+        parser.add_argument("--budget-seconds", type=float, default=DEFAULT_BUDGET_SECONDS,
+                            help="Time budget of each resume (0 disables)")
+        parser.add_argument("--sample-seconds", type=float, default=1.0, help="Timeline interval")
+        parser.add_argument("--log", help="Write the analyzer processes' stderr to this file")
+        parser.add_argument("--output", help="Write the summary with its timeline to this JSON file")
+
+        args = parser.parse_args()
+
+        resumes, jobs = load_workload(args.corpus, pool_size=args.pool_size, seed=args.seed)
+        requests = iter_requests(resumes, jobs, seed=args.seed, min_resumes=args.min_resumes,
+                                 max_resumes=args.max_resumes)
+        fields = {"report_format": args.report_format}
+        if args.budget_seconds:
+            fields["budget_seconds"] = args.budget_seconds
+
+        log = open(args.log, "ab") if args.log else None
+        try:
+            if args.target == "worker":
+                target = WorkerTarget(workers=args.workers, max_requests=args.max_requests,
+                                      max_rss_mb=args.max_rss_mb, use_cache=args.cache, log=log)
+            else:
+                target = CliTarget(use_cache=args.cache, log=log)
+            try:
+                job_id = sorted(jobs)[0]
+                target.warm_up(jobs[job_id], resumes[0])
+                summary = run_load(
+                    target, requests, concurrency=args.concurrency, rate=args.rate, duration=args.duration,
+                    max_requests=args.requests, fields=fields, sample_seconds=args.sample_seconds, seed=args.seed
+                )
+            finally:
+                target.close()
+        finally:
+            if log is not None:
+                log.close()
+
+        summary = dict({
+            "target": args.target,
+            "worker_processes": args.workers if args.target == "worker" else None,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "corpus": args.corpus,
+            "pool_size": len(resumes),
+            "seed": args.seed
+        }, **summary)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+        summary.pop("timeline")
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"Load test failed: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
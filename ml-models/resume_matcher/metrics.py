@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import bisect
+import argparse
+import threading
+import traceback
+import contextlib
+from time import perf_counter
+
+# Prometheus-style metrics for the analyzer.
+#
+# The analyzer modules record into the process-wide METRICS registry:
+# counters, gauges and fixed-bucket histograms, optionally labelled. Recording
+# is a dict update under a per-metric lock, so it is cheap enough for the hot
+# path. The registry renders the Prometheus text exposition format:
+#
+#   worker.py --metrics-port 9464          serves it at GET /metrics
+#   --metrics-file PATH (the other CLIs)   writes it when the run ends, e.g.
+#                                          for node_exporter's textfile collector
+#
+# Worker processes send snapshot(reset=True) deltas to their parent, which
+# merge()s them, so the parent's registry covers the whole pool.
+
+# Seconds, for stage latencies
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Pages per PDF
+PAGE_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+# Characters of extracted text per resume
+CHARACTER_BUCKETS = (500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _state(self, reset=False):
+        with self._lock:
+            state = {key: self._copy(value) for key, value in self._values.items()}
+            if reset:
+                self._values = {}
+        return state
+
+    def _copy(self, value):
+        return value
+
+    def _samples(self):
+        """Yield (name suffix, [(label, value)], value) for the exposition"""
+        state = self._state()
+        if not state and not self.labelnames:
+            state = {(): self._empty()}
+        for key in sorted(state):
+            yield from self._key_samples(list(zip(self.labelnames, key)), state[key])
+
+    def _key_samples(self, labels, value):
+        yield "", labels, value
+
+    def _empty(self):
+        return 0
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. cache hits"""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, state):
+        with self._lock:
+            for key, value in state.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. queue depth"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, state):
+        # The latest reported value wins
+        with self._lock:
+            self._values.update(state)
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets, with the sum and count of observations"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _empty(self):
+        # Per-bucket (not cumulative) counts with a final +Inf bucket, then sum and count
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def _copy(self, value):
+        return [list(value[0]), value[1], value[2]]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = self._empty()
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block in seconds"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def _merge(self, state):
+        with self._lock:
+            for key, (counts, total, count) in state.items():
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = self._empty()
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def _key_samples(self, labels, value):
+        counts, total, count = value
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            yield "_bucket", labels + [("le", _format_value(bound))], cumulative
+        yield "_sum", labels, total
+        yield "_count", labels, count
+
+class MetricsRegistry:
+    """Named metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self):
+        """The text exposition of every metric"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric._samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, reset=False):
+        """Picklable state of every recorded metric; with `reset` the values are
+        cleared, so successive snapshots are deltas that a parent can merge()"""
+        return {name: metric._state(reset=reset) for name, metric in list(self._metrics.items())}
+
+    def reset(self):
+        """Clear every recorded value, e.g. in a forked worker that inherited its parent's"""
+        self.snapshot(reset=True)
+
+    def merge(self, snapshot):
+        """Add a snapshot from another process (metrics unknown here are skipped)"""
+        for name, state in (snapshot or {}).items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric._merge(state)
+
+    def write_textfile(self, path):
+        """Write the exposition to a file, atomically"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+# Registry shared by everything in this process
+METRICS = MetricsRegistry()
+
+# Analyzer metrics
+EXTRACTION_SECONDS = METRICS.histogram(
+    "resume_matcher_extraction_seconds", "Time to extract the text of a resume, by file format", ("format",)
+)
+PDF_PAGES = METRICS.histogram("resume_matcher_pdf_pages", "Pages per extracted PDF", buckets=PAGE_BUCKETS)
+RESUME_CHARACTERS = METRICS.histogram(
+    "resume_matcher_resume_characters", "Characters of extracted text per resume", buckets=CHARACTER_BUCKETS
+)
+OCR_SECONDS = METRICS.histogram("resume_matcher_ocr_seconds", "Time to OCR the image-only pages of a document")
+NLP_PARSE_SECONDS = METRICS.histogram(
+    "resume_matcher_nlp_parse_seconds", "Time spent in spaCy parsing, by analysis stage", ("stage",)
+)
+SKILL_MATCH_SECONDS = METRICS.histogram(
+    "resume_matcher_skill_match_seconds", "Time to match the skills of a resume against a job description"
+)
+SEMANTIC_SECONDS = METRICS.histogram(
+    "resume_matcher_semantic_seconds", "Time to score section and document similarity"
+)
+REPORT_RENDER_SECONDS = METRICS.histogram(
+    "resume_matcher_report_render_seconds", "Time to render a report, by format (pdf, html, json, comparison)", ("format",)
+)
+CACHE_REQUESTS = METRICS.counter(
+    "resume_matcher_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ("cache", "result")
+)
+ANALYSES = METRICS.counter(
+    "resume_matcher_analyses_total", "Finished analyses by outcome (complete, partial, cached, reused)", ("outcome",)
+)
+FAILURES = METRICS.counter("resume_matcher_failures_total", "Failed analyses by failure type", ("type",))
+
+def record_cache(cache, hit):
+    """Count a lookup in the named cache"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="List the metrics the analyzer records")
+        parser.parse_args()
+        metrics = [
+            {"name": metric.name, "type": metric.kind, "labels": list(metric.labelnames), "help": metric.help}
+            for metric in METRICS._metrics.values()
+        ]
+        print(json.dumps(metrics, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import os
+import io
+import sys
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party imports
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+# Local imports
+from deadline import deadline_expired
+from metrics import record_cache
+from result_cache import ResultCache
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# OCR output is cached on disk by the hash of the rendered page image
+OCR_CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "ocr")
+
+# Resolution used to rasterize pages for OCR
+DEFAULT_OCR_DPI = 300
+
+# Pages with fewer extractable characters per square inch than this have no
+# usable text layer (a full letter page of text is several hundred per sq in)
+MIN_TEXT_DENSITY = 0.5
+
+# OCR texts of page images kept in memory (least recently used are evicted first) and on disk
+OCR_MEMORY_CACHE_SIZE = 256
+OCR_DISK_CACHE_SIZE = 50000
+
+OCR_CACHE = ResultCache(
+    memory_size=OCR_MEMORY_CACHE_SIZE, cache_dir=OCR_CACHE_DIR, disk_size=OCR_DISK_CACHE_SIZE, name="OCR"
+)
+
+def text_density(page, page_text):
+    """Return the number of non-whitespace characters per square inch of the page"""
+    area = (page.rect.width / 72) * (page.rect.height / 72)
+    if area <= 0:
+        return 0
+    return sum(1 for c in page_text if not c.isspace()) / area
+
+def page_needs_ocr(page, page_text, min_density=MIN_TEXT_DENSITY):
+    """Check whether a page is image-only, i.e. has no text layer but has images to read"""
+    if text_density(page, page_text) >= min_density:
+        return False
+    try:
+        return len(page.get_images()) > 0
+    except Exception:
+        return False
+
+def render_page_image(page, dpi=DEFAULT_OCR_DPI):
+    """Rasterize a page to grayscale PNG bytes for OCR"""
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    return pixmap.tobytes("png")
+
+def image_hash(image_bytes):
+    """Return the cache key for a rendered page image"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def get_cached_ocr(key):
+    """Return cached OCR text for an image hash, or None on a miss"""
+    return OCR_CACHE.get(key)
+
+def store_cached_ocr(key, text):
+    """Store OCR text for an image hash in memory and on disk"""
+    OCR_CACHE.put(key, text)
+
+def ocr_image(image_bytes, timeout=0):
+    """Run Tesseract on a PNG page image and return the recognized text.
+
+    A non-zero `timeout` (seconds) stops Tesseract with a RuntimeError.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        return pytesseract.image_to_string(image, timeout=timeout)
+
+def _ocr_image_safe(image_bytes, deadline=None):
+    # Runs in worker processes: report failures instead of raising so one bad
+    # page does not abort the others. Returns (text, error, skipped).
+    if deadline_expired(deadline):
+        return "", None, True
+    try:
+        # Tesseract is stopped when the deadline passes mid-page
+        remaining = deadline.remaining() if deadline is not None else None
+        timeout = max(0.001, remaining) if remaining is not None else 0
+        return ocr_image(image_bytes, timeout=timeout), None, False
+    except Exception as e:
+        if deadline_expired(deadline):
+            return "", None, True
+        return "", f"{type(e).__name__}: {str(e)}", False
+
+def ocr_page_images(images, max_workers=None, deadline=None, failed=None):
+    """OCR a list of PNG page images, using the cache and a process pool for misses.
+
+    Returns the recognized text for each image, in order. Images that fail OCR
+    yield an empty string and their indices are appended to `failed`, if
+    given; images not OCRed before `deadline` passed also yield an empty
+    string (the "ocr" stage is then recorded as skipped on the deadline).
+    """
+    texts = [None] * len(images)
+    keys = [image_hash(image_bytes) for image_bytes in images]
+    pending = []
+    pending_keys = set()
+    for index, (key, image_bytes) in enumerate(zip(keys, images)):
+        cached = get_cached_ocr(key)
+        record_cache("ocr", cached is not None)
+        if cached is not None:
+            texts[index] = cached
+        elif key not in pending_keys:
+            # Identical pages (e.g. a repeated scanned certificate) are OCRed once
+            pending_keys.add(key)
+            pending.append((index, key, image_bytes))
+
+    if not pending:
+        return texts
+
+    # A single page is not worth the cost of starting a pool
+    if len(pending) == 1:
+        outcomes = [_ocr_image_safe(pending[0][2], deadline)]
+    else:
+        workers = min(len(pending), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(
+                _ocr_image_safe, [image_bytes for _, _, image_bytes in pending], itertools.repeat(deadline)
+            ))
+
+    failed_keys = set()
+    recognized = {}
+    for (index, key, _), (text, error, skipped) in zip(pending, outcomes):
+        if skipped:
+            # Not cached, the page is OCRed in full next time
+            deadline.skip("ocr")
+            texts[index] = ""
+            continue
+        if error:
+            print(f"Warning: OCR failed for page image {index + 1} of {len(images)}: {error}", file=sys.stderr)
+            texts[index] = ""
+            failed_keys.add(key)
+            continue
+        store_cached_ocr(key, text)
+        recognized[key] = text
+        texts[index] = text
+
+    # Fill in duplicates of pages that were OCRed above (the memory tier may
+    # already have evicted them on a long document)
+    for index, key in enumerate(keys):
+        if texts[index] is None:
+            texts[index] = recognized.get(key, "")
+
+    if failed is not None:
+        failed.extend(index for index, key in enumerate(keys) if key in failed_keys)
+
+    return texts
@@ -0,0 +1,361 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from profiles import SKILL_REGISTRY
+
+# Applicant-pool analytics for one job posting.
+#
+# Each resume's skills become a row of a (resumes x skills) 0/1 matrix over the
+# skill registry, so the pool is analyzed with matrix products instead of
+# per-resume dict loops:
+#
+#   redundancy  pairwise Jaccard or cosine similarity of the skill sets; pairs
+#               above a threshold are grouped into redundant sets
+#   coverage    for each of the job's skills, how much of the pool has it,
+#               and how many of the job's skills each resume is missing
+#   clusters    spherical k-means over the normalized rows, with the skills
+#               that characterize each cluster
+#
+# The pairwise matrix of a large pool does not fit in memory (50k resumes are
+# 2.5 billion pairs), so similarities are computed in blocks of rows against
+# the rest of the upper triangle, sized to a memory budget, and only the pairs
+# above the threshold are kept.
+
+METRICS = ("jaccard", "cosine")
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_CLUSTERS = 8
+# Budget for one block of the pairwise matrix and its temporaries
+DEFAULT_MEMORY_MB = 256
+# Pools up to this size can ask for the full pairwise matrix
+DENSE_LIMIT = 5000
+# Redundant groups and cluster skills listed in the summary
+TOP_GROUPS = 20
+TOP_CLUSTER_SKILLS = 8
+
+def skill_matrix(skill_lists):
+    """(resumes x registry skills) float32 0/1 matrix from lists of skill names or registry IDs"""
+    matrix = np.zeros((len(skill_lists), len(SKILL_REGISTRY)), dtype=np.float32)
+    for row, skills in enumerate(skill_lists):
+        skills = list(skills)
+        if skills and isinstance(skills[0], str):
+            skills = SKILL_REGISTRY.encode(skill for skill in skills if skill in SKILL_REGISTRY)
+        matrix[row, skills] = 1
+    return matrix
+
+def found_skill_names(found_skills):
+    """Flatten the categorized found_skills of an analysis (see categorize_skills) into one list"""
+    if isinstance(found_skills, list):
+        return found_skills
+    names = [skill for skills in found_skills.get("technical", {}).values() for skill in skills]
+    names += [skill for skills in found_skills.get("domain", {}).values() for skill in skills]
+    return names + list(found_skills.get("soft", []))
+
+def _similarity(intersection, row_sizes, column_sizes, metric):
+    """Similarity from intersection counts, computed in place"""
+    if metric == "jaccard":
+        denominator = row_sizes[:, None] + column_sizes[None, :] - intersection
+    else:
+        denominator = np.sqrt(row_sizes[:, None] * column_sizes[None, :])
+    # Where the denominator is 0 both sets are empty and the intersection is already 0
+    np.divide(intersection, denominator, out=intersection, where=denominator > 0)
+    return intersection
+
+def pairwise_similarity(matrix, metric="jaccard"):
+    """Full (resumes x resumes) similarity matrix; only for pools up to DENSE_LIMIT"""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    if len(matrix) > DENSE_LIMIT:
+        raise ValueError(f"Pools over {DENSE_LIMIT} resumes are compared in blocks, see similar_pairs")
+    sizes = matrix.sum(axis=1)
+    return _similarity(matrix @ matrix.T, sizes, sizes, metric)
+
+def block_rows(resumes, memory_mb=DEFAULT_MEMORY_MB):
+    """Rows per block so a block against the whole pool (with temporaries) fits the memory budget"""
+    return max(1, int(memory_mb * 1024 * 1024 // (max(1, resumes) * 4 * 3)))
+
+def similar_pairs(matrix, threshold=DEFAULT_THRESHOLD, metric="jaccard", memory_mb=DEFAULT_MEMORY_MB):
+    """Pairs of resumes at or above a similarity threshold, computed block by block.
+
+    Returns (rows, columns, similarities) arrays with row < column. Resumes
+    are ordered by skill count and only the upper triangle is computed. A
+    block is compared only with the resumes whose skill count can still
+    reach the threshold. Jaccard and cosine similarity are at most
+    min/max and sqrt(min/max) of the two skill counts.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric}")
+    resumes = len(matrix)
+    order = np.argsort(matrix.sum(axis=1), kind="stable")
+    ordered = matrix[order]
+    sizes = ordered.sum(axis=1)
+    size_ratio = threshold if metric == "jaccard" else threshold * threshold
+    step = block_rows(resumes, memory_mb)
+    found_rows, found_columns, found_similarities = [], [], []
+    for start in range(0, resumes, step):
+        end = min(start + step, resumes)
+        # Larger resumes than this cannot reach the threshold with any row of the block
+        stop = resumes
+        if size_ratio > 0:
+            stop = max(end, int(np.searchsorted(sizes, sizes[end - 1] / size_ratio, "right")))
+        block = _similarity(ordered[start:end] @ ordered[start:stop].T, sizes[start:end], sizes[start:stop], metric)
+        # Keep the strict upper triangle: column index (offset by start) above the row index
+        block[np.tril_indices(end - start, m=stop - start)] = -1
+        rows, columns = np.nonzero(block >= threshold)
+        found_rows.append(rows + start)
+        found_columns.append(columns + start)
+        found_similarities.append(block[rows, columns])
+    if not found_rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    rows = order[np.concatenate(found_rows)]
+    columns = order[np.concatenate(found_columns)]
+    return np.minimum(rows, columns), np.maximum(rows, columns), np.concatenate(found_similarities)
+
+def redundant_groups(resumes, rows, columns):
+    """Connected components of the similar pairs, as lists of row indices (largest first, singletons omitted)"""
+    parent = np.arange(resumes)
+
+    def find(row):
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    for row, column in zip(rows.tolist(), columns.tolist()):
+        root_row, root_column = find(row), find(column)
+        if root_row != root_column:
+            parent[max(root_row, root_column)] = min(root_row, root_column)
+    groups = {}
+    for row in np.unique(np.concatenate([rows, columns])).tolist():
+        groups.setdefault(find(row), []).append(row)
+    return sorted(groups.values(), key=len, reverse=True)
+
+def job_coverage(matrix, job_skill_ids):
+    """How much of the pool has each of the job's skills, and how many of them each resume misses"""
+    job_skill_ids = list(dict.fromkeys(job_skill_ids))
+    resumes = len(matrix)
+    if not job_skill_ids:
+        return {"skills": [], "uncovered": [], "missing_per_resume": {}}
+    counts = matrix[:, job_skill_ids].sum(axis=0)
+    missing = len(job_skill_ids) - matrix[:, job_skill_ids].sum(axis=1).astype(np.int64)
+    skills = sorted((
+        {"skill": SKILL_REGISTRY.names[skill_id], "resumes": int(count),
+         "share": round(float(count) / resumes, 4) if resumes else 0.0}
+        for skill_id, count in zip(job_skill_ids, counts.tolist())
+    ), key=lambda skill: skill["resumes"])
+    return {
+        "skills": skills,
+        "uncovered": [skill["skill"] for skill in skills if skill["resumes"] == 0],
+        # Number of the job's skills a resume lacks -> resumes
+        "missing_per_resume": {str(count): int(total) for count, total in enumerate(np.bincount(missing)) if total}
+    }
+
+def _cluster_sums(matrix, labels, clusters):
+    """Sum of the rows of each cluster, as one product with the one-hot label matrix"""
+    one_hot = np.zeros((len(labels), clusters), dtype=matrix.dtype)
+    one_hot[np.arange(len(labels)), labels] = 1
+    return one_hot.T @ matrix
+
+def cluster_pool(matrix, clusters=DEFAULT_CLUSTERS, iterations=20, seed=0, memory_mb=DEFAULT_MEMORY_MB):
+    """Spherical k-means of the resumes' skill vectors.
+
+    Returns (labels, centroids): the cluster of each resume and the unit
+    centroid of each cluster. Rows are assigned in blocks, and seeds are
+    chosen k-means++ style from a sample so large pools stay fast.
+    """
+    resumes = len(matrix)
+    clusters = max(1, min(clusters, resumes))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    unit = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+    rng = np.random.default_rng(seed)
+
+    # k-means++ seeding on a sample: each new seed is drawn away from the chosen ones
+    sample = unit[rng.choice(resumes, size=min(resumes, 20 * clusters + 1000), replace=False)]
+    centroids = [sample[rng.integers(len(sample))]]
+    closest = 1 - sample @ centroids[0]
+    for _ in range(1, clusters):
+        weights = np.clip(closest, 0, None)
+        total = weights.sum()
+        choice = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+        centroids.append(sample[choice])
+        closest = np.minimum(closest, 1 - sample @ sample[choice])
+    centroids = np.array(centroids, dtype=np.float32)
+
+    step = max(1, block_rows(clusters, memory_mb))
+    labels = np.zeros(resumes, dtype=np.int64)
+    for iteration in range(iterations):
+        previous = labels.copy()
+        for start in range(0, resumes, step):
+            labels[start:start + step] = np.argmax(unit[start:start + step] @ centroids.T, axis=1)
+        sums = _cluster_sums(unit, labels, clusters)
+        lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+        # An emptied cluster keeps its previous centroid
+        centroids = np.where(lengths > 0, sums / np.where(lengths > 0, lengths, 1), centroids)
+        if iteration and np.array_equal(labels, previous):
+            break
+    return labels, centroids
+
+def describe_clusters(matrix, labels, clusters):
+    """Size and most common skills of each cluster, largest first"""
+    sizes = np.bincount(labels, minlength=clusters)
+    skill_counts = _cluster_sums(matrix, labels, clusters)
+    described = []
+    for cluster in np.argsort(-sizes, kind="stable").tolist():
+        size = int(sizes[cluster])
+        if not size:
+            continue
+        top = np.argsort(-skill_counts[cluster], kind="stable")[:TOP_CLUSTER_SKILLS]
+        described.append({
+            "cluster": cluster,
+            "resumes": size,
+            "skills": [
+                {"skill": SKILL_REGISTRY.names[skill_id], "share": round(float(skill_counts[cluster, skill_id]) / size, 3)}
+                for skill_id in top.tolist() if skill_counts[cluster, skill_id] > 0
+            ]
+        })
+    return described
+
+def analyze_pool(resume_ids, skill_lists, job_skills=None, threshold=DEFAULT_THRESHOLD, metric="jaccard",
+                 clusters=DEFAULT_CLUSTERS, memory_mb=DEFAULT_MEMORY_MB):
+    """Redundancy, job skill coverage and skill clusters of an applicant pool.
+
+    `skill_lists` holds each resume's skill names or registry IDs, parallel to
+    `resume_ids`; `job_skills` the job's skill names (for coverage).
+    """
+    timings = {}
+    started = time.perf_counter()
+    matrix = skill_matrix(skill_lists)
+    timings["encode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows, columns, similarities = similar_pairs(matrix, threshold=threshold, metric=metric, memory_mb=memory_mb)
+    groups = redundant_groups(len(matrix), rows, columns)
+    timings["pairs"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    coverage = job_coverage(matrix, SKILL_REGISTRY.encode(
+        skill for skill in (job_skills or []) if skill in SKILL_REGISTRY
+    ))
+    timings["coverage"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    labels, _ = cluster_pool(matrix, clusters=clusters, memory_mb=memory_mb)
+    described = describe_clusters(matrix, labels, max(1, min(clusters, len(matrix))))
+    timings["clusters"] = time.perf_counter() - started
+
+    return {
+        "resumes": len(resume_ids),
+        "metric": metric,
+        "threshold": threshold,
+        "similar_pairs": int(len(rows)),
+        "mean_pair_similarity": round(float(similarities.mean()), 4) if len(similarities) else None,
+        "redundant_resumes": int(sum(len(group) - 1 for group in groups)),
+        "redundant_groups": [[resume_ids[row] for row in group] for group in groups[:TOP_GROUPS]],
+        "coverage": coverage,
+        "clusters": described,
+        "seconds": {step: round(seconds, 3) for step, seconds in timings.items()}
+    }
+
+def load_index_skills(directory):
+    """(resume IDs, skill ID arrays) of every resume in a sharded index directory (see resume_index.py)"""
+    resume_ids, skill_lists = [], []
+    for path in sorted(glob.glob(os.path.join(directory, "shard-*-of-*.npz"))):
+        with np.load(path) as data:
+            values, offsets = data["skill_values"], data["skill_offsets"]
+            resume_ids.extend(data["ids"].tolist())
+            skill_lists.extend(values[offsets[row]:offsets[row + 1]] for row in range(len(offsets) - 1))
+    return resume_ids, skill_lists
+
+def load_result_skills(path):
+    """(resume IDs, skill name lists) from a JSONL file of {"id", "skills" or "found_skills"} objects"""
+    resume_ids, skill_lists = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f):
+            if line.strip():
+                entry = json.loads(line)
+                resume_ids.append(str(entry.get("id", entry.get("filename", number))))
+                skill_lists.append(found_skill_names(entry.get("skills", entry.get("found_skills", []))))
+    return resume_ids, skill_lists
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Redundancy, skill coverage and clusters of an applicant pool")
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument("--resumes", nargs="+", help="Resume files or directories of them")
+        source.add_argument("--index", help="Directory of a sharded resume index (see resume_index.py)")
+        source.add_argument("--skills-file", help="JSONL of {\"id\", \"skills\"} objects")
+        parser.add_argument("--job", dest="job_description", help="Job description text (for skill coverage)")
+        parser.add_argument("--job-file", help="Path to a file containing the job description")
+        parser.add_argument("--metric", choices=METRICS, default="jaccard", help="Skill set similarity")
+        parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="Similarity at or above which two resumes are redundant")
+        parser.add_argument("--clusters", type=int, default=DEFAULT_CLUSTERS, help="Number of skill clusters")
+        parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB,
+                            help="Memory budget of one block of the pairwise comparison")
+
+        args = parser.parse_args()
+
+        job_description = args.job_description
+        if args.job_file:
+            with open(args.job_file, "r", encoding="utf-8") as f:
+                job_description = f.read()
+
+        nlp = None
+        if args.resumes or job_description:
+            from snapshot import load_pipeline
+            nlp = load_pipeline()
+
+        if args.resumes:
+            from bulk_score import collect_resumes
+            from resume_index import build_index_entries
+            from text_extraction import extract_document_text
+
+            resumes = []
+            for path in collect_resumes(args.resumes):
+                with open(path, "rb") as f:
+                    try:
+                        text = extract_document_text(f.read(), ocr=False, source_path=path)
+                    except ValueError as e:
+                        print(f"Skipping {path}: {str(e)}", file=sys.stderr)
+                        continue
+                if text:
+                    resumes.append((os.path.basename(path), text))
+            entries = build_index_entries(resumes, nlp)
+            resume_ids = [entry.resume_id for entry in entries]
+            skill_lists = [entry.skill_ids for entry in entries]
+        elif args.index:
+            resume_ids, skill_lists = load_index_skills(args.index)
+        else:
+            resume_ids, skill_lists = load_result_skills(args.skills_file)
+
+        if not resume_ids:
+            print("ERROR: No resumes to analyze", file=sys.stderr)
+            return 1
+
+        job_skills = None
+        if job_description:
+            from enhanced_analyzer import sanitize_text, parse_job
+            job_skills = parse_job(sanitize_text(job_description), nlp)["skills"]
+
+        result = analyze_pool(
+            resume_ids, skill_lists, job_skills=job_skills, threshold=args.threshold, metric=args.metric,
+            clusters=args.clusters, memory_mb=args.memory_mb
+        )
+        print(json.dumps(result, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
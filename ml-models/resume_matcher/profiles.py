@@ -0,0 +1,267 @@
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+
+# Local imports
+from enhanced_analyzer import (
+    ALL_TECH_SKILLS,
+    ALL_DOMAIN_SKILLS,
+    SOFT_SKILLS,
+    sanitize_text,
+    clean_text,
+    identify_section_spans,
+    extract_skills,
+    extract_keywords,
+    categorize_skills
+)
+
+# Compact records for analysis artifacts that are held in bulk (worker caches,
+# indexes, ranking candidates).
+#
+# Skills are stored as integer IDs into the frozen SKILL_REGISTRY in array('H'),
+# keyword counts as parallel arrays of spaCy string hashes and counts, and
+# sections as line spans into the resume text instead of separate strings.
+# Conversion to the JSON result schema happens only at the API boundary
+# (build_result, AnalysisResult.to_dict); the result cache keeps AnalysisResult.to_record.
+
+class SkillRegistry:
+    """Frozen mapping between skill names and small integer IDs"""
+
+    __slots__ = ("names", "_ids")
+
+    def __init__(self, names):
+        self.names = tuple(dict.fromkeys(names))
+        self._ids = {name: skill_id for skill_id, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def encode(self, skills):
+        """Skill names (from the registry's skill lists) to an array of IDs, order and repeats kept"""
+        return array("H", [self._ids[skill] for skill in skills])
+
+    def decode(self, skill_ids):
+        """Array of IDs back to skill names"""
+        return [self.names[skill_id] for skill_id in skill_ids]
+
+    def bitset(self, skill_ids):
+        """Set of IDs as an integer bitset"""
+        bits = 0
+        for skill_id in skill_ids:
+            bits |= 1 << skill_id
+        return bits
+
+# Every skill known to the analyzer, in the order extract_skills checks them
+SKILL_REGISTRY = SkillRegistry(ALL_TECH_SKILLS + ALL_DOMAIN_SKILLS + SOFT_SKILLS)
+
+def _keyword_arrays(doc):
+    """Keyword counts of a parsed text as parallel (lemma hash, count) arrays sorted by hash"""
+    keywords = sorted((doc.vocab.strings[lemma], count) for lemma, count in extract_keywords(doc).items())
+    return array("Q", [key for key, _ in keywords]), array("I", [count for _, count in keywords])
+
+@dataclass
+class ResumeProfile:
+    """Parsed resume: sanitized text, section spans, skill IDs and keyword counts"""
+
+    __slots__ = ("resume_hash", "text", "section_names", "section_spans", "skill_ids",
+                 "domain_skill_ids", "keyword_ids", "keyword_counts", "length")
+
+    resume_hash: str
+    text: str
+    section_names: tuple
+    section_spans: array      # start/end line index pairs, parallel to section_names
+    skill_ids: array          # array('H') of all skills found
+    domain_skill_ids: array   # array('H') of domain skills found
+    keyword_ids: array        # array('Q') of lemma hashes
+    keyword_counts: array     # array('I') parallel to keyword_ids
+    length: int               # tokens in the parsed text
+
+    def sections(self):
+        """Sections as {name: text}, as identify_resume_sections returns them"""
+        lines = self.text.split("\n")
+        return {
+            name: "\n".join(line.strip() for line in lines[self.section_spans[2 * i]:self.section_spans[2 * i + 1]])
+            for i, name in enumerate(self.section_names)
+        }
+
+    def skills(self):
+        return SKILL_REGISTRY.decode(self.skill_ids)
+
+@dataclass
+class JobProfile:
+    """Parsed job description: sanitized text, skill IDs and keyword counts"""
+
+    __slots__ = ("job_hash", "text", "skill_ids", "domain_skill_ids", "keyword_ids", "keyword_counts", "length")
+
+    job_hash: str
+    text: str
+    skill_ids: array
+    domain_skill_ids: array
+    keyword_ids: array
+    keyword_counts: array
+    length: int
+
+    def skills(self):
+        return SKILL_REGISTRY.decode(self.skill_ids)
+
+@dataclass
+class AnalysisResult:
+    """Scores of one resume against one job, without the derived display fields.
+    
+    `incremental` is the section reuse of the run that produced the result
+    (see score_sections); it is None for results read back from the cache.
+    """
+
+    __slots__ = ("score", "semantic_similarity", "keyword_match", "domain_match", "section_names",
+                 "section_scores", "found_skill_ids", "missing_skill_ids", "suggestions", "incremental")
+
+    score: float
+    semantic_similarity: float
+    keyword_match: float
+    domain_match: float
+    section_names: tuple
+    section_scores: array     # array('d') parallel to section_names
+    found_skill_ids: array
+    missing_skill_ids: array
+    suggestions: tuple
+    incremental: dict
+
+    @classmethod
+    def from_dict(cls, analysis_result):
+        """Build from the dict produced by combine_scores / analyze_resume_detailed"""
+        found_skills = analysis_result["found_skills"]
+        found = [skill for skills in found_skills["technical"].values() for skill in skills]
+        found += [skill for skills in found_skills["domain"].values() for skill in skills]
+        found += found_skills["soft"]
+        return cls(
+            score=analysis_result["score"],
+            semantic_similarity=analysis_result["semantic_similarity"],
+            keyword_match=analysis_result["keyword_match"],
+            domain_match=analysis_result.get("domain_match", 0),
+            section_names=tuple(analysis_result["section_scores"]),
+            section_scores=array("d", analysis_result["section_scores"].values()),
+            found_skill_ids=SKILL_REGISTRY.encode(found),
+            missing_skill_ids=SKILL_REGISTRY.encode(analysis_result["missing_skills"]),
+            suggestions=tuple(analysis_result.get("suggestions", ())),
+            incremental=analysis_result.get("incremental")
+        )
+
+    @classmethod
+    def from_record(cls, record):
+        """Build from the JSON record written by to_record"""
+        return cls(
+            score=record["score"],
+            semantic_similarity=record["semantic_similarity"],
+            keyword_match=record["keyword_match"],
+            domain_match=record["domain_match"],
+            section_names=tuple(record["section_names"]),
+            section_scores=array("d", record["section_scores"]),
+            found_skill_ids=array("H", record["found_skill_ids"]),
+            missing_skill_ids=array("H", record["missing_skill_ids"]),
+            suggestions=tuple(record["suggestions"]),
+            incremental=None
+        )
+
+    def to_record(self):
+        """JSON-serializable form for the result cache, skills as registry IDs.
+        
+        The section reuse describes one run only (a cache hit recomputes
+        nothing), so it is not kept.
+        """
+        return {
+            "score": self.score,
+            "semantic_similarity": self.semantic_similarity,
+            "keyword_match": self.keyword_match,
+            "domain_match": self.domain_match,
+            "section_names": list(self.section_names),
+            "section_scores": list(self.section_scores),
+            "found_skill_ids": list(self.found_skill_ids),
+            "missing_skill_ids": list(self.missing_skill_ids),
+            "suggestions": list(self.suggestions)
+        }
+
+    def section_score_dict(self):
+        return dict(zip(self.section_names, self.section_scores))
+
+    def found_skills(self):
+        return categorize_skills(SKILL_REGISTRY.decode(self.found_skill_ids))
+
+    def missing_skills(self):
+        return SKILL_REGISTRY.decode(self.missing_skill_ids)
+
+    def to_dict(self):
+        """The analysis result dict in the combine_scores schema"""
+        analysis_result = {
+            "score": self.score,
+            "section_scores": self.section_score_dict(),
+            "missing_skills": self.missing_skills(),
+            "found_skills": self.found_skills(),
+            "semantic_similarity": self.semantic_similarity,
+            "keyword_match": self.keyword_match,
+            "domain_match": self.domain_match,
+            "suggestions": list(self.suggestions)
+        }
+        if self.incremental is not None:
+            analysis_result["incremental"] = self.incremental
+        return analysis_result
+
+def build_resume_profile(resume_text, nlp, resume_hash=None, skill_lemmas=None):
+    """Parse a resume once into a ResumeProfile"""
+    text = sanitize_text(resume_text)
+    spans = identify_section_spans(text.split("\n"))
+    doc = nlp(clean_text(text))
+    keyword_ids, keyword_counts = _keyword_arrays(doc)
+    return ResumeProfile(
+        resume_hash=resume_hash,
+        text=text,
+        section_names=tuple(spans),
+        section_spans=array("I", [bound for span in spans.values() for bound in span]),
+        skill_ids=SKILL_REGISTRY.encode(extract_skills(text, nlp, doc=doc, skill_lemmas=skill_lemmas)),
+        domain_skill_ids=SKILL_REGISTRY.encode(
+            extract_skills(text, nlp, ALL_DOMAIN_SKILLS, doc=doc, skill_lemmas=skill_lemmas)
+        ),
+        keyword_ids=keyword_ids,
+        keyword_counts=keyword_counts,
+        length=len(doc)
+    )
+
+def build_job_profile(job_description, nlp, job_hash=None, skill_lemmas=None):
+    """Parse a job description once into a JobProfile"""
+    text = sanitize_text(job_description)
+    doc = nlp(clean_text(text))
+    keyword_ids, keyword_counts = _keyword_arrays(doc)
+    return JobProfile(
+        job_hash=job_hash,
+        text=text,
+        skill_ids=SKILL_REGISTRY.encode(extract_skills(text, nlp, doc=doc, skill_lemmas=skill_lemmas)),
+        domain_skill_ids=SKILL_REGISTRY.encode(
+            extract_skills(text, nlp, ALL_DOMAIN_SKILLS, doc=doc, skill_lemmas=skill_lemmas)
+        ),
+        keyword_ids=keyword_ids,
+        keyword_counts=keyword_counts,
+        length=len(doc)
+    )
+
+def profile_skill_scores(resume_profile, job_profile):
+    """Skill overlap scores from two profiles, the same as calculate_skill_scores on their texts"""
+    job_bits = SKILL_REGISTRY.bitset(job_profile.skill_ids)
+    resume_bits = SKILL_REGISTRY.bitset(resume_profile.skill_ids)
+    domain_job_bits = SKILL_REGISTRY.bitset(job_profile.domain_skill_ids)
+
+    # Repeats count, as in calculate_skill_scores
+    skill_match = sum(count for skill_id, count in Counter(resume_profile.skill_ids).items() if job_bits >> skill_id & 1)
+    matching_domain = sum(1 for skill_id in resume_profile.domain_skill_ids if domain_job_bits >> skill_id & 1)
+    job_skill_count = len(job_profile.skill_ids)
+    domain_skill_count = len(job_profile.domain_skill_ids)
+
+    return {
+        "found_skills": resume_profile.skills(),
+        "missing_skills": SKILL_REGISTRY.decode(
+            skill_id for skill_id in job_profile.skill_ids if not resume_bits >> skill_id & 1
+        ),
+        "keyword_score": skill_match / max(1, job_skill_count) if job_skill_count else 0,
+        "domain_score": matching_domain / domain_skill_count if domain_skill_count else 0
+    }
@@ -0,0 +1,162 @@
+import json
+import base64
+import struct
+
+# Request protocol for passing resumes to the analyzer without temporary files.
+#
+# A request is read from a binary stream (stdin or a socket) in one of two forms:
+#
+#   JSON      a single JSON object, with the resume as base64:
+#             {"resume_base64": "...", "job_description": "...", "original_filename": "..."}
+#
+#   Framed    a length-prefixed JSON header followed by a length-prefixed frame
+#             holding the raw resume bytes. Each frame is a 4-byte big-endian
+#             unsigned length followed by that many bytes.
+#
+# The job description travels as a JSON string in both forms, so it keeps its
+# newlines and is not bounded by command-line length limits. An optional
+# "budget_seconds" field sets the request's time budget (see deadline.py), and
+# "user_id" the owner of the generated report (see report_catalog.py).
+# "report_format" ("pdf", "html" or "json", see report_renderer.py) returns the
+# report inline in the result instead of as a PDF file.
+#
+# Batch requests (several resumes against one job description) use the same two
+# forms: the JSON object has a "resumes" list of {"resume_base64", "original_filename"}
+# objects, and the framed header has a "resumes" list of metadata objects
+# followed by one resume frame per entry. "comparison_report": true asks for one
+# comparison PDF of the whole batch (see comparison_report.py).
+
+FRAME_HEADER = struct.Struct(">I")
+
+# Uploads are limited to 10MB by the backend; leave room for base64 and metadata
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+class ProtocolError(ValueError):
+    """Raised when a request cannot be decoded"""
+
+def _read_exact(stream, size):
+    """Read exactly `size` bytes from a binary stream"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            raise ProtocolError(f"Unexpected end of stream ({size - remaining} of {size} bytes read)")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+def read_frame(stream):
+    """Read one length-prefixed frame, or return None at a clean end of stream"""
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        header += _read_exact(stream, FRAME_HEADER.size - len(header))
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {size} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    return _read_exact(stream, size)
+
+def write_frame(stream, payload):
+    """Write one length-prefixed frame"""
+    stream.write(FRAME_HEADER.pack(len(payload)))
+    stream.write(payload)
+
+def encode_request(resume_bytes, job_description, **fields):
+    """Encode a framed request (used by clients and tests)"""
+    header = json.dumps(dict(fields, job_description=job_description)).encode("utf-8")
+    return FRAME_HEADER.pack(len(header)) + header + FRAME_HEADER.pack(len(resume_bytes)) + resume_bytes
+
+def _decode_header(payload):
+    try:
+        request = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ProtocolError(f"Invalid request JSON: {str(e)}")
+    if not isinstance(request, dict):
+        raise ProtocolError("Request must be a JSON object")
+    return request
+
+def _decode_resume(entry):
+    encoded = entry.pop("resume_base64", None)
+    if encoded is None:
+        raise ProtocolError("JSON requests must include resume_base64")
+    try:
+        entry["resume_bytes"] = base64.b64decode(encoded, validate=True)
+    except (ValueError, TypeError) as e:
+        raise ProtocolError(f"Invalid resume_base64: {str(e)}")
+    return entry
+
+def _read_header(stream):
+    """Read the request header: the whole JSON request, or the first frame of a framed one.
+
+    Returns (header, framed), or (None, False) if the stream is already at its end.
+    """
+    first = stream.read(1)
+    if not first:
+        return None, False
+
+    if first == b"{":
+        # Plain JSON: the whole stream is the request
+        return _decode_header(first + stream.read()), False
+
+    # Framed: the first byte belongs to the header frame's length (a JSON
+    # request starts with "{", which as a length byte would exceed MAX_FRAME_SIZE)
+    header = first + _read_exact(stream, FRAME_HEADER.size - 1)
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {size} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    return _decode_header(_read_exact(stream, size)), True
+
+def read_request(stream):
+    """Read one request from a binary stream and return it as a dict.
+
+    The returned dict has the raw resume under "resume_bytes" alongside the
+    other request fields. Returns None if the stream is already at its end.
+    """
+    request, framed = _read_header(stream)
+    if request is None:
+        return None
+
+    if not framed:
+        return _decode_resume(request)
+
+    resume_bytes = read_frame(stream)
+    if resume_bytes is None:
+        raise ProtocolError("Framed request is missing the resume frame")
+    request["resume_bytes"] = resume_bytes
+    return request
+
+def read_batch_request(stream):
+    """Read a batch request (one job description, several resumes) from a binary stream.
+
+    Returns a dict whose "resumes" list holds dicts with "resume_bytes" and the
+    other per-resume fields, or None if the stream is already at its end.
+    """
+    request, framed = _read_header(stream)
+    if request is None:
+        return None
+
+    resumes = request.get("resumes")
+    if not isinstance(resumes, list) or not all(isinstance(entry, dict) for entry in resumes):
+        raise ProtocolError("Batch requests must include a list of resumes")
+
+    for entry in resumes:
+        if framed:
+            resume_bytes = read_frame(stream)
+            if resume_bytes is None:
+                raise ProtocolError(f"Framed batch request is missing resume frames ({len(resumes)} expected)")
+            entry["resume_bytes"] = resume_bytes
+        else:
+            _decode_resume(entry)
+    return request
+
+def encode_batch_request(resumes, job_description, **fields):
+    """Encode a framed batch request from a list of (resume_bytes, metadata dict)"""
+    header = dict(fields, job_description=job_description, resumes=[metadata for _, metadata in resumes])
+    payload = json.dumps(header).encode("utf-8")
+    frames = [FRAME_HEADER.pack(len(payload)), payload]
+    for resume_bytes, _ in resumes:
+        frames.append(FRAME_HEADER.pack(len(resume_bytes)))
+        frames.append(resume_bytes)
+    return b"".join(frames)
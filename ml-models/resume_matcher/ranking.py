@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import heapq
+import argparse
+import traceback
+
+# Local imports
+from enhanced_analyzer import (
+    error_response,
+    sanitize_text,
+    get_skill_lemmas,
+    calculate_semantic_scores,
+    combine_scores,
+    score_upper_bound
+)
+from profiles import AnalysisResult, build_job_profile, build_resume_profile, profile_skill_scores
+from snapshot import load_pipeline
+from text_extraction import extract_resume_text
+
+def rank_resumes(resumes, job_description, nlp, top_k=5, exhaustive=False):
+    """Rank resumes against a job description with a two-stage cascade.
+
+    Stage one scores every resume on skill overlap only. Stage two runs the
+    section/semantic scoring only for resumes whose upper-bound final score can
+    still reach the current top-K threshold, so the top K are the same as with
+    exhaustive ranking. `resumes` is an iterable of (resume_id, resume_text).
+    Scored resumes are held as AnalysisResult records; only the returned top K
+    are expanded into result dicts.
+    """
+    # The job and the skill lemmas are shared by every resume, parse them once
+    skill_lemmas = get_skill_lemmas(nlp)
+    job_profile = build_job_profile(job_description, nlp, skill_lemmas=skill_lemmas)
+
+    # Stage one: cheap skill scores and the upper bound they imply. Candidates
+    # are held as compact profiles; the skill scores are recomputed from them
+    candidates = []
+    for resume_id, resume_text in resumes:
+        profile = build_resume_profile(resume_text, nlp, skill_lemmas=skill_lemmas)
+        candidates.append((score_upper_bound(profile_skill_scores(profile, job_profile)), resume_id, profile))
+
+    # Most promising resumes first so the threshold rises as early as possible
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+    # Stage two: full scoring while a resume can still make the top K
+    top_scores = []  # min-heap of the best final scores seen so far
+    results = []
+    pruned = 0
+    for index, (upper_bound, resume_id, profile) in enumerate(candidates):
+        if not exhaustive and len(top_scores) >= top_k and upper_bound < top_scores[0]:
+            # Candidates are sorted by upper bound, so none of the rest can qualify
+            pruned = len(candidates) - index
+            break
+
+        semantic_scores = calculate_semantic_scores(profile.text, job_profile.text, nlp)
+        result = AnalysisResult.from_dict(combine_scores(profile_skill_scores(profile, job_profile), semantic_scores))
+        results.append((resume_id, result))
+
+        if len(top_scores) < top_k:
+            heapq.heappush(top_scores, result.score)
+        elif result.score > top_scores[0]:
+            heapq.heapreplace(top_scores, result.score)
+
+    results.sort(key=lambda item: item[1].score, reverse=True)
+
+    return {
+        "results": [dict(result.to_dict(), id=resume_id) for resume_id, result in results[:top_k]],
+        "total": len(candidates),
+        "scored": len(results),
+        "pruned": pruned
+    }
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Rank resumes against a job description")
+        parser.add_argument("--resumes", nargs="+", required=True, help="Paths to resume files")
+        parser.add_argument("--job", dest="job_description", help="Job description text")
+        parser.add_argument("--job-file", help="Path to a file containing the job description")
+        parser.add_argument("--top-k", type=int, default=5, help="Number of top resumes to return")
+        parser.add_argument("--exhaustive", action="store_true", help="Score every resume fully (no pruning)")
+
+        args = parser.parse_args()
+
+        job_description = args.job_description
+        if args.job_file:
+            with open(args.job_file, "r", encoding="utf-8") as f:
+                job_description = f.read()
+
+        if not job_description:
+            print(json.dumps(error_response("Job description is required")))
+            return 1
+
+        if args.top_k < 1:
+            print(json.dumps(error_response("--top-k must be at least 1")))
+            return 1
+
+        try:
+            nlp = load_pipeline()
+        except Exception as e:
+            print(json.dumps(error_response(f"Failed to load spaCy model: {str(e)}")))
+            return 1
+
+        # Extract resume texts, skipping files that yield nothing
+        resumes = []
+        for resume_path in args.resumes:
+            try:
+                resume_text = extract_resume_text(resume_path)
+            except ValueError as e:
+                print(f"Skipping {resume_path}: {str(e)}", file=sys.stderr)
+                continue
+            if not resume_text:
+                print(f"Failed to extract text from resume: {resume_path}", file=sys.stderr)
+                continue
+            resumes.append((os.path.basename(resume_path), sanitize_text(resume_text)))
+
+        ranking = rank_resumes(
+            resumes,
+            sanitize_text(job_description),
+            nlp,
+            top_k=args.top_k,
+            exhaustive=args.exhaustive
+        )
+        print(f"Scored {ranking['scored']} of {ranking['total']} resumes, pruned {ranking['pruned']}", file=sys.stderr)
+
+        ranking["success"] = True
+        print(json.dumps(ranking, ensure_ascii=True))
+        return 0
+
+    except Exception as e:
+        print(json.dumps(error_response(f"Application error: {str(e)}")))
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import time
+import base64
+import sqlite3
+import argparse
+import threading
+import traceback
+
+# Catalog of generated reports.
+#
+# Every report the analyzer renders is recorded in a SQLite database next to
+# the reports, so listing, lookup by resume or user, "latest report for this
+# resume" and retention are indexed queries instead of directory scans. The
+# report ID is the report's file name (the last part of its API URL).
+#
+# Listings are paginated by keyset: each page ends with an opaque cursor
+# (the created time and ID of its last row), and the next page starts after it,
+# so any page costs the same however deep it is.
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_CATALOG_PATH = os.path.join(SCRIPT_DIR, "reports", "catalog.sqlite3")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    resume_hash TEXT,
+    job_hash TEXT,
+    user_id TEXT,
+    filename TEXT,
+    score REAL,
+    created_at REAL NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS reports_by_created ON reports (created_at, report_id);
+CREATE INDEX IF NOT EXISTS reports_by_resume ON reports (resume_hash, created_at, report_id);
+CREATE INDEX IF NOT EXISTS reports_by_user ON reports (user_id, created_at, report_id);
+"""
+
+_COLUMNS = ("report_id", "resume_hash", "job_hash", "user_id", "filename", "score", "created_at", "path", "size")
+
+def encode_cursor(created_at, report_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, report_id]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    try:
+        created_at, report_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(created_at), str(report_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
+class ReportCatalog:
+    """SQLite catalog of generated reports, shared by every analyzer process.
+
+    The database is opened lazily in WAL mode, so readers never block the
+    analyzers recording new reports.
+    """
+
+    def __init__(self, path=REPORT_CATALOG_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Caller holds the lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(sql, params).fetchall()]
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, params).rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record(self, report_path, resume_hash=None, job_hash=None, score=None, filename=None, user_id=None,
+               created_at=None):
+        """Add (or replace) the catalog entry of a report file; returns its report ID"""
+        report_id = os.path.basename(report_path)
+        try:
+            stat = os.stat(report_path)
+            size = stat.st_size
+        except OSError:
+            stat = None
+            size = None
+        if created_at is None:
+            created_at = stat.st_mtime if stat is not None and resume_hash is None else time.time()
+        self._execute(
+            f"INSERT OR REPLACE INTO reports ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+            (report_id, resume_hash, job_hash, user_id, filename, score, created_at, os.path.abspath(report_path), size)
+        )
+        return report_id
+
+    def get(self, report_id):
+        """The entry of a report ID, or None"""
+        rows = self._query("SELECT * FROM reports WHERE report_id = ?", (report_id,))
+        return rows[0] if rows else None
+
+    def list(self, limit=DEFAULT_PAGE_SIZE, cursor=None, user_id=None, resume_hash=None, job_hash=None):
+        """One page of reports, newest first, optionally for one user or resume.
+
+        Returns {"reports": [...], "next_cursor": cursor of the next page or None}.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        conditions = []
+        params = []
+        for column, value in (("user_id", user_id), ("resume_hash", resume_hash), ("job_hash", job_hash)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if cursor:
+            created_at, report_id = decode_cursor(cursor)
+            conditions.append("(created_at < ? OR (created_at = ? AND report_id < ?))")
+            params.extend([created_at, created_at, report_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._query(
+            f"SELECT * FROM reports {where} ORDER BY created_at DESC, report_id DESC LIMIT ?",
+            params + [limit + 1]
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["report_id"])
+        return {"reports": rows, "next_cursor": next_cursor}
+
+    def latest_for_resume(self, resume_hash, job_hash=None):
+        """The newest report of a resume (against one job description if given), or None"""
+        page = self.list(limit=1, resume_hash=resume_hash, job_hash=job_hash)
+        return page["reports"][0] if page["reports"] else None
+
+    def created_after(self, created_at, limit=MAX_PAGE_SIZE):
+        """Reports created after a time, oldest first (for incremental syncs)"""
+        return self._query(
+            "SELECT * FROM reports WHERE created_at > ? ORDER BY created_at, report_id LIMIT ?",
+            (created_at, limit)
+        )
+
+    def expire(self, older_than_seconds, delete_files=True, dry_run=False, batch_size=MAX_PAGE_SIZE):
+        """Remove reports created more than `older_than_seconds` ago, with their files.
+
+        Works through the expired range of the created-time index in batches.
+        Returns the number of reports (to be) removed and the bytes freed.
+        """
+        cutoff = time.time() - older_than_seconds
+        removed = 0
+        freed = 0
+        after = (float("-inf"), "")
+        while True:
+            rows = self._query(
+                "SELECT report_id, path, size, created_at FROM reports "
+                "WHERE created_at < ? AND (created_at > ? OR (created_at = ? AND report_id > ?)) "
+                "ORDER BY created_at, report_id LIMIT ?",
+                (cutoff, after[0], after[0], after[1], batch_size)
+            )
+            if not rows:
+                break
+            after = (rows[-1]["created_at"], rows[-1]["report_id"])
+            removed += len(rows)
+            freed += sum(row["size"] or 0 for row in rows)
+            if dry_run:
+                continue
+            if delete_files:
+                for row in rows:
+                    try:
+                        os.remove(row["path"])
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        print(f"Warning: Could not remove report {row['path']}: {str(e)}", file=sys.stderr)
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany("DELETE FROM reports WHERE report_id = ?", [(row["report_id"],) for row in rows])
+        return {"removed": removed, "bytes": freed, "dry_run": dry_run}
+
+    def import_directory(self, directory):
+        """Catalog the PDF reports already in a directory (a one-off migration scan).
+
+        Reports that are already cataloged keep their entries.
+        """
+        added = 0
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".pdf") and self.get(entry.name) is None:
+                    self.record(entry.path)
+                    added += 1
+        return added
+
+    def stats(self):
+        rows = self._query("SELECT COUNT(*) AS reports, COALESCE(SUM(size), 0) AS bytes, "
+                           "MIN(created_at) AS oldest, MAX(created_at) AS newest FROM reports")
+        return dict(rows[0], path=self.path)
+
+# Catalog shared by every analysis in this process
+REPORT_CATALOG = ReportCatalog()
+
+def record_report(report_path, **fields):
+    """Record a generated report in the shared catalog; failures only warn, the report is still served"""
+    try:
+        return REPORT_CATALOG.record(report_path, **fields)
+    except sqlite3.Error as e:
+        print(f"Warning: Could not record report in catalog: {str(e)}", file=sys.stderr)
+        return None
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Query and maintain the catalog of generated reports")
+        parser.add_argument("--catalog", default=REPORT_CATALOG_PATH, help="Catalog database file")
+        subparsers = parser.add_subparsers(dest="command", required=True)
+
+        listing = subparsers.add_parser("list", help="One page of reports, newest first")
+        listing.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE, help="Reports per page")
+        listing.add_argument("--cursor", help="next_cursor of the previous page")
+        listing.add_argument("--user", dest="user_id", help="Only this user's reports")
+        listing.add_argument("--resume-hash", help="Only reports of this resume (content hash)")
+        listing.add_argument("--job-hash", help="Only reports for this job description hash")
+
+        get = subparsers.add_parser("get", help="Catalog entry of one report")
+        get.add_argument("report_id")
+
+        latest = subparsers.add_parser("latest", help="Newest report of a resume")
+        latest.add_argument("--resume-hash", required=True)
+        latest.add_argument("--job-hash")
+
+        expire = subparsers.add_parser("expire", help="Delete reports older than a number of days")
+        expire.add_argument("--older-than-days", type=float, required=True)
+        expire.add_argument("--keep-files", action="store_true", help="Only remove the catalog entries")
+        expire.add_argument("--dry-run", action="store_true", help="Only count what would be removed")
+
+        importer = subparsers.add_parser("import", help="Catalog the reports already in directories")
+        importer.add_argument("directories", nargs="*", default=[os.path.join(SCRIPT_DIR, "reports")])
+
+        subparsers.add_parser("stats", help="Number and total size of cataloged reports")
+
+        args = parser.parse_args()
+        catalog = ReportCatalog(args.catalog)
+
+        if args.command == "list":
+            result = catalog.list(limit=args.limit, cursor=args.cursor, user_id=args.user_id,
+                                  resume_hash=args.resume_hash, job_hash=args.job_hash)
+        elif args.command == "get":
+            result = catalog.get(args.report_id)
+        elif args.command == "latest":
+            result = catalog.latest_for_resume(args.resume_hash, job_hash=args.job_hash)
+        elif args.command == "expire":
+            result = catalog.expire(args.older_than_days * 86400, delete_files=not args.keep_files, dry_run=args.dry_run)
+        elif args.command == "import":
+            result = {"imported": sum(catalog.import_directory(directory) for directory in args.directories)}
+        else:
+            result = catalog.stats()
+
+        print(json.dumps(result, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+import os
+import re
+import sys
+import json
+import html
+import argparse
+import functools
+import traceback
+
+# Third-party imports
+from fpdf import FPDF
+
+# Template-driven report rendering shared by the analyzer modules.
+#
+# A report is described by a ReportTemplate: a title and a sequence of block
+# dicts (headings, text lines, the score, lists, grouped lists, key/value
+# pairs, spacing) whose text is filled in from a fields dict. Rendering goes
+# in three steps:
+#
+#   prepare   every dynamic field is sanitized exactly once, with the module's
+#             own sanitize function, and made safe for the PDF core fonts
+#   layout    the template is resolved against the prepared fields into plain
+#             blocks (the "json" format)
+#   output    the blocks are drawn into a PDF, or written as HTML
+#
+# Prepared fields are plain JSON, so a result cache can keep them and render
+# the report again later in any format without re-running the analysis.
+
+FORMATS = ("pdf", "html", "json")
+
+# Score colors
+GREEN = (0, 128, 0)
+ORANGE = (255, 165, 0)
+RED = (255, 0, 0)
+
+_NON_PRINTABLE = re.compile(r'[^\x20-\x7E]')
+
+# Default font and line height of each block kind: (style, size, height)
+_BLOCK_DEFAULTS = {
+    "title": ("B", 16, 10),
+    "heading": ("B", 12, 10),
+    "text": ("", 12, 10),
+    "score": ("B", 14, 10),
+    "list": ("", 10, 8),
+    "groups": ("", 10, 8),
+    "pairs": ("", 10, 8),
+    "table": ("", 10, 7),
+}
+
+class ReportDocument(FPDF):
+    """FPDF with the page setup every report shares"""
+
+    def __init__(self):
+        super().__init__()
+        self.set_auto_page_break(auto=True, margin=15)
+        self.add_page()
+
+    def use_font(self, style, size):
+        # set_font itself returns early when nothing changes
+        self.set_font("Arial", style, size)
+
+class ReportTemplate:
+    """Declarative layout of a report.
+
+    `blocks` is a sequence of dicts with a "kind" and the options of that kind:
+
+      title, heading, text   "text" (a format string over the fields); "wrap" to use a multi-line cell
+      score                  "text" and "field" (the numeric score), colored by "thresholds":
+                             ((minimum, color), ...), below all of them RED
+      list                   "field" (list of strings), "limit", "bullet" (prefix) or "indent"
+                             (width of a separate "-" column), "spacing" after each item,
+                             "empty" (text when the list is empty), "join" (separator to put
+                             the items on one line)
+      groups                 "field" (list of [label, items]), items joined on one line or, with
+                             "indent", one per line; "label_format", "label_style", "label_size",
+                             "label_height"; "spacing" after each group; "empty"
+      pairs                  "field" (list of [label, value]), "format" over {label} and {value}
+      table                  "columns" ((heading, width in mm, align), ...) and "field" (list of
+                             rows, a string per column); "header_style"; cells that are too
+                             wide are cut with an ellipsis
+      page                   starts a new page
+      space                  "height"
+      rule                   a horizontal line across the page
+      section                "blocks" of its own, typically with a "when"
+
+    Every block takes optional "style", "size" and "height" (font and line
+    height) and "when": the block is left out when that field is empty.
+    `sanitize` cleans one dynamic string; it runs once per distinct string.
+    """
+
+    def __init__(self, title, blocks, sanitize, fallback_title=None):
+        self.title = title
+        self.blocks = tuple(blocks)
+        self.sanitize = sanitize
+        self.fallback_title = fallback_title or title
+        # Field the fallback report shows as the score
+        self.score_field = next((block["field"] for block in self.blocks if block["kind"] == "score"), None)
+        self._sanitize = functools.lru_cache(maxsize=4096)(
+            lambda text: _NON_PRINTABLE.sub('', sanitize(text) or '')
+        )
+
+    def prepare(self, fields):
+        """Sanitize every string in the fields (recursively) once, up front"""
+        return self._prepare_value(fields)
+
+    def _prepare_value(self, value):
+        if isinstance(value, str):
+            return self._sanitize(value)
+        if isinstance(value, dict):
+            return {key: self._prepare_value(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._prepare_value(item) for item in value]
+        return value
+
+    def layout(self, prepared):
+        """Resolve the template against prepared fields into a list of plain blocks"""
+        resolved = []
+        self._resolve(self.blocks, prepared, resolved)
+        return resolved
+
+    def _resolve(self, blocks, prepared, resolved):
+        for block in blocks:
+            when = block.get("when")
+            if when and not prepared.get(when):
+                continue
+            kind = block["kind"]
+            if kind == "section":
+                self._resolve(block["blocks"], prepared, resolved)
+                continue
+            style, size, height = _BLOCK_DEFAULTS.get(kind, ("", 10, 8))
+            out = {
+                "kind": kind,
+                "style": block.get("style", style),
+                "size": block.get("size", size),
+                "height": block.get("height", height),
+            }
+            if kind in ("title", "heading", "text"):
+                out["text"] = block["text"].format(**prepared)
+                out["wrap"] = block.get("wrap", False)
+                out["align"] = block.get("align", "C" if kind == "title" else "L")
+            elif kind == "score":
+                score = prepared.get(block["field"]) or 0
+                out["text"] = block["text"].format(**prepared)
+                out["color"] = next((color for minimum, color in block.get("thresholds", ()) if score >= minimum), RED)
+            elif kind == "list":
+                items = [item for item in prepared.get(block["field"]) or [] if item.strip()]
+                if block.get("limit"):
+                    items = items[:block["limit"]]
+                if block.get("join") and items:
+                    items = [block["join"].join(items)]
+                out.update(items=items, bullet=block.get("bullet", ""), indent=block.get("indent", 0),
+                           wrap=block.get("wrap", False), spacing=block.get("spacing", 0), empty=block.get("empty"))
+            elif kind == "groups":
+                label_format = block.get("label_format", "{label}")
+                groups = [
+                    {"label": label_format.format(label=label), "items": [item for item in items if item.strip()]}
+                    for label, items in prepared.get(block["field"]) or []
+                    if label
+                ]
+                out.update(groups=[group for group in groups if group["items"]], indent=block.get("indent", 0),
+                           label_style=block.get("label_style", "I"), label_size=block.get("label_size", out["size"]),
+                           label_height=block.get("label_height", out["height"]), empty=block.get("empty"),
+                           spacing=block.get("spacing", 0))
+            elif kind == "pairs":
+                out["items"] = [
+                    block.get("format", "{label}: {value}").format(label=label, value=value)
+                    for label, value in prepared.get(block["field"]) or []
+                    if label
+                ]
+            elif kind == "table":
+                out.update(columns=[list(column) for column in block["columns"]],
+                           rows=[list(row) for row in prepared.get(block["field"]) or []],
+                           header_style=block.get("header_style", "B"))
+            elif kind == "space":
+                out = {"kind": kind, "height": block.get("height", 5)}
+            elif kind in ("rule", "page"):
+                out = {"kind": kind}
+            else:
+                raise ValueError(f"Unknown report block kind: {kind}")
+            resolved.append(out)
+
+    def render(self, fields, fmt="pdf", path=None, prepared=False):
+        """Render a report: a PDF written to `path` (returns the path), HTML (a
+        string) or JSON (the resolved blocks). Pass `prepared=True` for fields
+        that already went through prepare()."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported report format: {fmt}")
+        fields = fields if prepared else self.prepare(fields)
+        blocks = self.layout(fields)
+        if fmt == "json":
+            return {"title": self.title, "blocks": blocks}
+        if fmt == "html":
+            return render_html(self.title, blocks)
+        try:
+            render_pdf(blocks).output(path)
+        except Exception as e:
+            # One fallback for every failure: a minimal report with the score and the error
+            print(f"Error in PDF report generation: {str(e)}", file=sys.stderr)
+            print(traceback.format_exc(), file=sys.stderr)
+            fallback = [
+                {"kind": "title", "style": "", "size": 12, "height": 10, "text": self.fallback_title, "wrap": False, "align": "C"},
+                {"kind": "text", "style": "", "size": 12, "height": 10, "text": f"Score: {fields.get(self.score_field, 0)}%",
+                 "wrap": False, "align": "L"},
+                {"kind": "text", "style": "", "size": 12, "height": 10, "wrap": True, "align": "L",
+                 "text": f"Error occurred during report generation. Error details: {self._sanitize(str(e))}"},
+            ]
+            render_pdf(fallback).output(path)
+        return path
+
+def render_pdf(blocks):
+    """Draw resolved blocks into a new ReportDocument"""
+    pdf = ReportDocument()
+    for block in blocks:
+        kind = block["kind"]
+        if kind == "space":
+            pdf.ln(block["height"])
+            continue
+        if kind == "rule":
+            y = pdf.get_y()
+            pdf.line(pdf.l_margin, y, pdf.w - pdf.r_margin, y)
+            continue
+        if kind == "page":
+            pdf.add_page()
+            continue
+        pdf.use_font(block["style"], block["size"])
+        height = block["height"]
+        if kind in ("title", "heading", "text"):
+            if block["wrap"]:
+                pdf.multi_cell(0, height, txt=block["text"], align=block["align"])
+            else:
+                pdf.cell(0, height, txt=block["text"], ln=True, align=block["align"])
+        elif kind == "score":
+            pdf.set_text_color(*block["color"])
+            pdf.cell(0, height, txt=block["text"], ln=True)
+            pdf.set_text_color(0, 0, 0)
+        elif kind == "pairs":
+            for item in block["items"]:
+                pdf.cell(0, height, txt=item, ln=True)
+        elif kind == "list":
+            if not block["items"] and block["empty"]:
+                pdf.use_font("I", block["size"])
+                pdf.multi_cell(0, height, txt=block["empty"])
+            for item in block["items"]:
+                _pdf_item(pdf, item, block, height)
+                if block["spacing"]:
+                    pdf.ln(block["spacing"])
+        elif kind == "groups":
+            if not block["groups"] and block["empty"]:
+                pdf.multi_cell(0, height, txt=block["empty"])
+            for group in block["groups"]:
+                pdf.use_font(block["label_style"], block["label_size"])
+                pdf.cell(0, block["label_height"], txt=group["label"], ln=True)
+                pdf.use_font(block["style"], block["size"])
+                if block["indent"]:
+                    for item in group["items"]:
+                        _pdf_item(pdf, item, dict(block, bullet=""), height)
+                else:
+                    pdf.multi_cell(0, height, txt=", ".join(group["items"]))
+                if block["spacing"]:
+                    pdf.ln(block["spacing"])
+        elif kind == "table":
+            pdf.use_font(block["header_style"], block["size"])
+            for heading, width, _ in block["columns"]:
+                pdf.cell(width, height, txt=heading, border=1, align='C')
+            pdf.ln()
+            pdf.use_font(block["style"], block["size"])
+            for row in block["rows"]:
+                for (_, width, align), value in zip(block["columns"], row):
+                    pdf.cell(width, height, txt=_fit(pdf, value, width - 2), border=1, align=align)
+                pdf.ln()
+    return pdf
+
+def _fit(pdf, text, width):
+    """Truncate text with an ellipsis to fit a cell width in the current font"""
+    if pdf.get_string_width(text) <= width:
+        return text
+    while text and pdf.get_string_width(text + "...") > width:
+        text = text[:-1]
+    return text + "..."
+
+def _pdf_item(pdf, item, block, height):
+    if block["indent"]:
+        # Bullet in its own column, the item beside it
+        pdf.cell(block["indent"], height, txt="-", ln=0)
+        if block.get("wrap"):
+            pdf.multi_cell(0, height, txt=item)
+        else:
+            pdf.cell(0, height, txt=item, ln=True)
+    elif block.get("wrap"):
+        pdf.multi_cell(0, height, txt=f"{block['bullet']}{item}")
+    else:
+        pdf.cell(0, height, txt=f"{block['bullet']}{item}", ln=True)
+
+def _css_color(color):
+    return "rgb({}, {}, {})".format(*color)
+
+def render_html(title, blocks):
+    """Lightweight HTML rendering of resolved blocks, for clients that do not need a PDF"""
+    escape = html.escape
+    parts = [f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{escape(title)}</title></head><body>"]
+    for block in blocks:
+        kind = block["kind"]
+        if kind == "title":
+            parts.append(f"<h1>{escape(block['text'])}</h1>")
+        elif kind == "heading":
+            parts.append(f"<h2>{escape(block['text'])}</h2>")
+        elif kind == "text":
+            tag = "em" if "I" in block["style"] else "strong" if "B" in block["style"] else "span"
+            parts.append(f"<p><{tag}>{escape(block['text'])}</{tag}></p>")
+        elif kind == "score":
+            parts.append(f"<p style=\"color: {_css_color(block['color'])}\"><strong>{escape(block['text'])}</strong></p>")
+        elif kind in ("list", "pairs"):
+            if block["items"]:
+                parts.append("<ul>" + "".join(f"<li>{escape(item)}</li>" for item in block["items"]) + "</ul>")
+            elif block.get("empty"):
+                parts.append(f"<p><em>{escape(block['empty'])}</em></p>")
+        elif kind == "groups":
+            if not block["groups"] and block.get("empty"):
+                parts.append(f"<p><em>{escape(block['empty'])}</em></p>")
+            for group in block["groups"]:
+                parts.append(f"<h3>{escape(group['label'])}</h3>")
+                parts.append("<ul>" + "".join(f"<li>{escape(item)}</li>" for item in group["items"]) + "</ul>")
+        elif kind == "table":
+            parts.append("<table><tr>" + "".join(f"<th>{escape(column[0])}</th>" for column in block["columns"]) + "</tr>")
+            for row in block["rows"]:
+                parts.append("<tr>" + "".join(f"<td>{escape(value)}</td>" for value in row) + "</tr>")
+            parts.append("</table>")
+        elif kind in ("rule", "page"):
+            parts.append("<hr>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Render a report from prepared fields")
+        parser.add_argument("fields_file", help="JSON file with the report fields (e.g. the report_fields of a cached result)")
+        parser.add_argument("--format", choices=FORMATS, default="html", help="Output format")
+        parser.add_argument("--output", help="Output file (required for pdf; default: stdout)")
+        args = parser.parse_args()
+
+        # The enhanced analyzer's template is the one the API serves
+        from enhanced_analyzer import REPORT_TEMPLATE
+
+        with open(args.fields_file, "r", encoding="utf-8") as f:
+            fields = json.load(f)
+        if args.format == "pdf":
+            if not args.output:
+                parser.error("--output is required for pdf")
+            REPORT_TEMPLATE.render(fields, "pdf", os.path.abspath(args.output))
+            return 0
+
+        rendered = REPORT_TEMPLATE.render(fields, args.format)
+        text = rendered if args.format == "html" else json.dumps(rendered, indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            print(text)
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
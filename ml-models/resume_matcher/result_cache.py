@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# On-disk tier of the analysis result cache
+RESULT_CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "results")
+
+# Number of results kept in memory (least recently used are evicted first)
+MEMORY_CACHE_SIZE = 512
+# Number of results kept on disk before the oldest are removed
+DISK_CACHE_SIZE = 20000
+# The disk tier is pruned at most this often, by whichever process writes first
+# after the interval (most analyzer processes live for a single resume)
+PRUNE_INTERVAL_SECONDS = 300
+# File in the cache directory whose modification time records the last pruning
+PRUNE_MARKER = ".last_pruned"
+
+def make_key(resume_hash, job_hash, version):
+    """Build the cache key for a (resume, job description, analyzer version) triple"""
+    return hashlib.sha256(f"{resume_hash}:{job_hash}:{version}".encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """Two-tier cache of complete analysis results: a bounded in-memory LRU in
+    front of one JSON file per entry on disk.
+
+    Entries are dicts holding the JSON result and the path of its report, or
+    any other JSON value (the text and OCR caches keep strings). `name`
+    labels the cache in warnings.
+    """
+
+    def __init__(self, memory_size=MEMORY_CACHE_SIZE, cache_dir=RESULT_CACHE_DIR, disk_size=DISK_CACHE_SIZE,
+                 name="result"):
+        self.name = name
+        self.memory_size = memory_size
+        self.cache_dir = cache_dir
+        self.disk_size = disk_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, entry):
+        # Caller holds the lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.memory_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached entry for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+            self.hits += 1
+        try:
+            # Entries read back recently survive disk pruning longer
+            os.utime(self._path(key), None)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        """Store an entry in memory and on disk"""
+        with self._lock:
+            self._remember(key, entry)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see a partial entry
+            tmp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=True)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: Could not write {self.name} cache: {str(e)}", file=sys.stderr)
+            return
+
+        if self._prune_due():
+            self.prune_disk()
+
+    def _prune_due(self):
+        """Claim the next pruning of the disk tier if the last one, by any process, is
+        PRUNE_INTERVAL_SECONDS old (or there has been none)"""
+        marker = os.path.join(self.cache_dir, PRUNE_MARKER)
+        try:
+            if time.time() - os.path.getmtime(marker) < PRUNE_INTERVAL_SECONDS:
+                return False
+        except OSError:
+            pass
+        try:
+            # Touched before pruning so concurrent writers do not all prune at once
+            with open(marker, "a"):
+                pass
+            os.utime(marker, None)
+        except OSError:
+            return False
+        return True
+
+    def invalidate(self, key):
+        """Drop an entry from both tiers"""
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def prune_disk(self):
+        """Remove the oldest on-disk entries beyond the disk size limit"""
+        try:
+            entries = []
+            # Every file but the marker counts, including entries of an older layout
+            for item in os.scandir(self.cache_dir):
+                if item.name != PRUNE_MARKER:
+                    try:
+                        entries.append((item.stat().st_mtime, item.path))
+                    except OSError:
+                        # Removed by another process meanwhile
+                        pass
+        except OSError as e:
+            print(f"Warning: Could not prune {self.name} cache: {str(e)}", file=sys.stderr)
+            return
+        if len(entries) <= self.disk_size:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.disk_size]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Another process pruned it first
+                pass
+
+# Cache shared by every analysis in this process
+RESULT_CACHE = ResultCache()
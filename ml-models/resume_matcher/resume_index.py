@@ -0,0 +1,515 @@
+import os
+import sys
+import json
+import time
+import heapq
+import hashlib
+import argparse
+import traceback
+import multiprocessing
+from dataclasses import dataclass
+
+# Third-party imports
+import numpy as np
+
+# Sharded resume index with scatter-gather queries.
+#
+# Resumes are indexed as compact entries: the skill registry IDs of their
+# skills and domain skills, and their unit-length document vector. The index
+# is partitioned into N shards by a stable hash of the resume ID, and each
+# shard lives in its own process. A query (the job's skill IDs and vector) is
+# scattered to every shard; each shard prefilters its resumes through skill
+# posting lists (resumes sharing at least one skill with the job), scores the
+# candidates with one matrix-vector product and returns its local top K; the
+# coordinator merges the shard results. Shards need neither spaCy nor the
+# analyzer: entries and queries are built by the coordinator, so adding shards
+# adds both query parallelism and memory.
+#
+# The index score estimates the analysis score from the components that do
+# not need the resume text: whole-document similarity, keyword and domain
+# match, weighted as in SCORE_WEIGHTS. Section scores are left to the full
+# analysis of the shortlisted resumes.
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# One .npz file per shard, named after the shard and the shard count
+RESUME_INDEX_DIR = os.path.join(SCRIPT_DIR, "cache", "index")
+
+DEFAULT_SHARDS = 4
+DEFAULT_TOP_K = 10
+# Entries sent to a shard per message when adding
+ADD_CHUNK_SIZE = 2000
+
+def shard_for(resume_id, shards):
+    """Shard of a resume ID; stable across processes and runs (unlike hash())"""
+    digest = hashlib.blake2b(str(resume_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shards
+
+def shard_path(directory, shard, shards):
+    return os.path.join(directory, f"shard-{shard}-of-{shards}.npz")
+
+def _unit_vector(vector):
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+    return vector / norm if norm > 0 else np.zeros_like(vector)
+
+@dataclass
+class IndexEntry:
+    """One indexed resume: skill registry IDs and unit document vector"""
+
+    __slots__ = ("resume_id", "skill_ids", "domain_skill_ids", "vector")
+
+    resume_id: str
+    skill_ids: np.ndarray         # uint16, distinct
+    domain_skill_ids: np.ndarray  # uint16, distinct
+    vector: np.ndarray            # float32, unit length or zeros
+
+@dataclass
+class IndexQuery:
+    """A job profile as the shards see it, with the weights of the index score"""
+
+    __slots__ = ("skill_ids", "domain_skill_ids", "vector", "weights")
+
+    skill_ids: np.ndarray
+    domain_skill_ids: np.ndarray
+    vector: np.ndarray
+    weights: tuple                # (semantic, keyword, domain)
+
+def _skill_array(skill_ids):
+    return np.unique(np.asarray(list(skill_ids), dtype=np.uint16))
+
+def build_index_entries(resumes, nlp, batch_size=64):
+    """Parse (resume_id, resume_text) pairs into IndexEntry records, in nlp.pipe batches"""
+    from enhanced_analyzer import ALL_DOMAIN_SKILLS, sanitize_text, clean_text, extract_skills, get_skill_lemmas
+    from profiles import SKILL_REGISTRY
+
+    skill_lemmas = get_skill_lemmas(nlp)
+    resumes = [(resume_id, sanitize_text(text)) for resume_id, text in resumes]
+    docs = nlp.pipe((clean_text(text) for _, text in resumes), batch_size=batch_size)
+    entries = []
+    for (resume_id, text), doc in zip(resumes, docs):
+        entries.append(IndexEntry(
+            resume_id=str(resume_id),
+            skill_ids=_skill_array(SKILL_REGISTRY.encode(extract_skills(text, nlp, doc=doc, skill_lemmas=skill_lemmas))),
+            domain_skill_ids=_skill_array(SKILL_REGISTRY.encode(
+                extract_skills(text, nlp, ALL_DOMAIN_SKILLS, doc=doc, skill_lemmas=skill_lemmas)
+            )),
+            vector=_unit_vector(doc.vector) if doc.has_vector else np.zeros(doc.vector.size, dtype=np.float32)
+        ))
+    return entries
+
+def build_index_query(job_description, nlp):
+    """Parse a job description (once per pipeline, see parse_job) into an IndexQuery"""
+    from enhanced_analyzer import SCORE_WEIGHTS, sanitize_text, parse_job
+    from profiles import SKILL_REGISTRY
+
+    job = parse_job(sanitize_text(job_description), nlp)
+    doc = job["doc"]
+    return IndexQuery(
+        skill_ids=_skill_array(SKILL_REGISTRY.encode(job["skills"])),
+        domain_skill_ids=_skill_array(SKILL_REGISTRY.encode(job["domain_skills"])),
+        vector=_unit_vector(doc.vector) if doc.has_vector else np.zeros(doc.vector.size, dtype=np.float32),
+        weights=(SCORE_WEIGHTS["semantic"], SCORE_WEIGHTS["keyword"], SCORE_WEIGHTS["domain"])
+    )
+
+class ResumeIndex:
+    """In-memory index of one shard.
+
+    Entries are appended to pending lists and compacted into arrays on the
+    next query: a (resumes x dim) float32 vector matrix and, per skill, a
+    posting list of the rows that have it. Re-adding a resume ID replaces its
+    entry; replaced and removed rows stay as tombstones until compaction.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.rows = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        # skill ID -> int32 rows, for skills and domain skills
+        self.postings = {}
+        self.domain_postings = {}
+        self._pending = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, entries):
+        for entry in entries:
+            self._pending.append(entry)
+        return len(entries)
+
+    def remove(self, resume_ids):
+        self._compact()
+        removed = 0
+        for resume_id in resume_ids:
+            row = self.rows.pop(resume_id, None)
+            if row is not None:
+                self.alive[row] = False
+                removed += 1
+        return removed
+
+    def _compact(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        # Later entries of the same ID win; earlier rows become tombstones
+        latest = {entry.resume_id: entry for entry in pending}
+        for resume_id in latest:
+            row = self.rows.get(resume_id)
+            if row is not None:
+                self.alive[row] = False
+        entries = list(latest.values())
+        start = len(self.ids)
+        dim = max([self.vectors.shape[1]] + [entry.vector.size for entry in entries])
+        vectors = np.zeros((start + len(entries), dim), dtype=np.float32)
+        vectors[:start, :self.vectors.shape[1]] = self.vectors
+        for offset, entry in enumerate(entries):
+            vectors[start + offset, :entry.vector.size] = entry.vector
+            self.rows[entry.resume_id] = start + offset
+            self.ids.append(entry.resume_id)
+        self.vectors = vectors
+        self.alive = np.concatenate([self.alive, np.ones(len(entries), dtype=bool)])
+        for postings, field in ((self.postings, "skill_ids"), (self.domain_postings, "domain_skill_ids")):
+            added = {}
+            for offset, entry in enumerate(entries):
+                for skill_id in getattr(entry, field).tolist():
+                    added.setdefault(skill_id, []).append(start + offset)
+            for skill_id, rows in added.items():
+                rows = np.asarray(rows, dtype=np.int32)
+                postings[skill_id] = np.concatenate([postings[skill_id], rows]) if skill_id in postings else rows
+
+    def _match_counts(self, postings, skill_ids):
+        """Number of the job's skills each row has, from the posting lists"""
+        lists = [postings[skill_id] for skill_id in skill_ids.tolist() if skill_id in postings]
+        if not lists:
+            return np.zeros(len(self.ids), dtype=np.int64)
+        return np.bincount(np.concatenate(lists), minlength=len(self.ids))
+
+    def query(self, job_query, top_k=DEFAULT_TOP_K, min_skill_matches=1):
+        """Local top K as a list of result dicts, best first, and the number of candidates scored.
+
+        Resumes sharing fewer than `min_skill_matches` skills with the job are
+        not scored (unless the job has no skills at all).
+        """
+        self._compact()
+        skill_matches = self._match_counts(self.postings, job_query.skill_ids)
+        if len(job_query.skill_ids) and min_skill_matches > 0:
+            candidates = np.flatnonzero((skill_matches >= min_skill_matches) & self.alive)
+        else:
+            candidates = np.flatnonzero(self.alive)
+        if candidates.size == 0:
+            return [], 0
+
+        semantic_weight, keyword_weight, domain_weight = job_query.weights
+        keyword = skill_matches[candidates] / max(1, len(job_query.skill_ids))
+        domain_skill_count = len(job_query.domain_skill_ids)
+        domain = (self._match_counts(self.domain_postings, job_query.domain_skill_ids)[candidates] / domain_skill_count
+                  if domain_skill_count else np.zeros(candidates.size))
+        if job_query.vector.size and job_query.vector.size == self.vectors.shape[1]:
+            semantic = self.vectors[candidates] @ job_query.vector
+        else:
+            semantic = np.zeros(candidates.size, dtype=np.float32)
+        scores = (semantic * semantic_weight + keyword * keyword_weight + domain * domain_weight) \
+            / (semantic_weight + keyword_weight + domain_weight) * 100
+
+        if candidates.size > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(candidates.size)
+        best = best[np.argsort(-scores[best], kind="stable")]
+        results = [{
+            "id": self.ids[candidates[i]],
+            "score": round(float(scores[i]), 2),
+            "semantic_similarity": round(float(semantic[i]) * 100, 1),
+            "keyword_match": round(float(keyword[i]) * 100, 1),
+            "domain_match": round(float(domain[i]) * 100, 1)
+        } for i in best.tolist()]
+        return results, int(candidates.size)
+
+    def save(self, path):
+        """Write the live entries to an .npz file"""
+        self._compact()
+        live = np.flatnonzero(self.alive)
+        skills = [[] for _ in range(len(self.ids))]
+        domain_skills = [[] for _ in range(len(self.ids))]
+        for postings, per_row in ((self.postings, skills), (self.domain_postings, domain_skills)):
+            for skill_id, rows in postings.items():
+                for row in rows.tolist():
+                    per_row[row].append(skill_id)
+
+        def flatten(per_row):
+            lengths = np.array([len(per_row[row]) for row in live.tolist()], dtype=np.int64)
+            values = [skill_id for row in live.tolist() for skill_id in sorted(per_row[row])]
+            return np.asarray(values, dtype=np.uint16), np.concatenate([[0], np.cumsum(lengths)])
+
+        skill_values, skill_offsets = flatten(skills)
+        domain_values, domain_offsets = flatten(domain_skills)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + f".{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=np.asarray([self.ids[row] for row in live.tolist()], dtype=str),
+            vectors=self.vectors[live],
+            skill_values=skill_values, skill_offsets=skill_offsets,
+            domain_values=domain_values, domain_offsets=domain_offsets
+        )
+        os.replace(tmp_path, path)
+        return int(live.size)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()"""
+        index = cls()
+        with np.load(path) as data:
+            ids = data["ids"].tolist()
+            vectors = data["vectors"]
+            skill_values, skill_offsets = data["skill_values"], data["skill_offsets"]
+            domain_values, domain_offsets = data["domain_values"], data["domain_offsets"]
+            index.add([
+                IndexEntry(
+                    resume_id=resume_id,
+                    skill_ids=skill_values[skill_offsets[row]:skill_offsets[row + 1]],
+                    domain_skill_ids=domain_values[domain_offsets[row]:domain_offsets[row + 1]],
+                    vector=vectors[row]
+                )
+                for row, resume_id in enumerate(ids)
+            ])
+        index._compact()
+        return index
+
+    def stats(self):
+        self._compact()
+        return {
+            "resumes": len(self.rows),
+            "rows": len(self.ids),
+            "dim": int(self.vectors.shape[1]),
+            "postings": int(sum(rows.size for rows in self.postings.values())),
+            "vector_bytes": int(self.vectors.nbytes)
+        }
+
+def _shard_main(conn, path):
+    """Shard process: hold one partition of the index and answer coordinator commands"""
+    # stdout belongs to the coordinator's caller
+    sys.stdout = sys.stderr
+    from worker import current_rss_bytes
+
+    index = ResumeIndex.load(path) if path and os.path.exists(path) else ResumeIndex()
+    conn.send({"type": "ready", "pid": os.getpid(), "resumes": len(index)})
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        command, args = message
+        try:
+            if command == "add":
+                reply = index.add(*args)
+            elif command == "remove":
+                reply = index.remove(*args)
+            elif command == "query":
+                started = time.perf_counter()
+                results, candidates = index.query(*args)
+                reply = {"results": results, "candidates": candidates, "seconds": time.perf_counter() - started}
+            elif command == "save":
+                reply = index.save(path)
+            elif command == "stats":
+                reply = dict(index.stats(), pid=os.getpid(), rss_bytes=current_rss_bytes())
+            else:
+                raise ValueError(f"Unknown shard command: {command}")
+            conn.send({"type": "reply", "reply": reply})
+        except Exception as e:
+            conn.send({"type": "error", "error": f"{type(e).__name__}: {str(e)}"})
+
+class ShardedResumeIndex:
+    """Coordinator of a resume index partitioned across shard processes.
+
+    Use as a context manager (or call start() and close()). With a
+    `directory`, shards load their partition from it on start and save() writes
+    them back; the shard count is part of the file names, so an index is
+    reloaded with the shard count it was saved with.
+    """
+
+    def __init__(self, shards=DEFAULT_SHARDS, directory=None):
+        if shards < 1:
+            raise ValueError("An index needs at least one shard")
+        self.shards = shards
+        self.directory = directory
+        # Shards are spawned, not forked, so they do not inherit the parent's pipeline
+        self.context = multiprocessing.get_context("spawn")
+        self.processes = []
+        self.conns = []
+
+    def start(self):
+        for shard in range(self.shards):
+            parent_conn, child_conn = self.context.Pipe()
+            path = shard_path(self.directory, shard, self.shards) if self.directory else None
+            process = self.context.Process(target=_shard_main, args=(child_conn, path), daemon=True)
+            process.start()
+            child_conn.close()
+            self.processes.append(process)
+            self.conns.append(parent_conn)
+        for conn in self.conns:
+            conn.recv()
+        return self
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            conn.close()
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.conns = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _scatter(self, messages):
+        """Send {shard: (command, args)} to the shards, then gather their replies in shard order.
+
+        Every message is sent before any reply is read, so the shards work in parallel.
+        """
+        for shard, message in messages.items():
+            self.conns[shard].send(message)
+        replies = {}
+        for shard in messages:
+            reply = self.conns[shard].recv()
+            if reply["type"] == "error":
+                raise RuntimeError(f"Shard {shard}: {reply['error']}")
+            replies[shard] = reply["reply"]
+        return replies
+
+    def add(self, entries):
+        """Route entries to their shards by resume ID"""
+        groups = {}
+        for entry in entries:
+            groups.setdefault(shard_for(entry.resume_id, self.shards), []).append(entry)
+        added = 0
+        # Chunked so a large import does not become one huge message per shard
+        while groups:
+            messages = {shard: ("add", (group[:ADD_CHUNK_SIZE],)) for shard, group in groups.items()}
+            added += sum(self._scatter(messages).values())
+            groups = {shard: group[ADD_CHUNK_SIZE:] for shard, group in groups.items() if len(group) > ADD_CHUNK_SIZE}
+        return added
+
+    def remove(self, resume_ids):
+        groups = {}
+        for resume_id in resume_ids:
+            groups.setdefault(shard_for(resume_id, self.shards), []).append(resume_id)
+        return sum(self._scatter({shard: ("remove", (ids,)) for shard, ids in groups.items()}).values())
+
+    def query(self, job_query, top_k=DEFAULT_TOP_K, min_skill_matches=1):
+        """Scatter a job query to every shard and merge their local top K into the global top K"""
+        started = time.perf_counter()
+        replies = self._scatter({
+            shard: ("query", (job_query, top_k, min_skill_matches)) for shard in range(self.shards)
+        })
+        results = heapq.nlargest(
+            top_k,
+            (dict(result, shard=shard) for shard, reply in replies.items() for result in reply["results"]),
+            key=lambda result: result["score"]
+        )
+        return {
+            "results": results,
+            "candidates": sum(reply["candidates"] for reply in replies.values()),
+            "shards": self.shards,
+            "slowest_shard_seconds": round(max(reply["seconds"] for reply in replies.values()), 6),
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    def save(self):
+        if not self.directory:
+            raise ValueError("The index has no directory to save to")
+        return sum(self._scatter({shard: ("save", ()) for shard in range(self.shards)}).values())
+
+    def stats(self):
+        replies = self._scatter({shard: ("stats", ()) for shard in range(self.shards)})
+        shards = [dict(replies[shard], shard=shard) for shard in range(self.shards)]
+        return {
+            "shards": shards,
+            "resumes": sum(shard["resumes"] for shard in shards),
+            "rss_bytes": sum(shard["rss_bytes"] for shard in shards)
+        }
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Sharded resume index with scatter-gather queries")
+        parser.add_argument("--directory", default=RESUME_INDEX_DIR, help="Directory of the shard files")
+        parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="Number of shards")
+        subparsers = parser.add_subparsers(dest="command", required=True)
+
+        add = subparsers.add_parser("add", help="Index resume files (the resume ID is the file name)")
+        add.add_argument("resumes", nargs="+", help="Resume files or directories of them")
+        add.add_argument("--no-ocr", action="store_true", help="Disable OCR of image-only pages")
+
+        query = subparsers.add_parser("query", help="Top resumes for a job description")
+        query.add_argument("--job", dest="job_description", help="Job description text")
+        query.add_argument("--job-file", help="Path to a file containing the job description")
+        query.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="Number of resumes to return")
+        query.add_argument("--min-skill-matches", type=int, default=1,
+                           help="Only score resumes sharing at least this many skills with the job")
+
+        subparsers.add_parser("stats", help="Resumes and memory per shard")
+
+        args = parser.parse_args()
+
+        if args.command == "add":
+            from bulk_score import collect_resumes
+            from snapshot import load_pipeline
+            from text_extraction import extract_document_text
+
+            resumes = []
+            for path in collect_resumes(args.resumes):
+                with open(path, "rb") as f:
+                    try:
+                        text = extract_document_text(f.read(), ocr=not args.no_ocr, source_path=path)
+                    except ValueError as e:
+                        print(f"Skipping {path}: {str(e)}", file=sys.stderr)
+                        continue
+                if text:
+                    resumes.append((os.path.basename(path), text))
+            entries = build_index_entries(resumes, load_pipeline())
+            with ShardedResumeIndex(args.shards, args.directory) as index:
+                index.add(entries)
+                result = {"added": len(entries), "indexed": index.save()}
+
+        elif args.command == "query":
+            from snapshot import load_pipeline
+
+            if args.job_file:
+                with open(args.job_file, "r", encoding="utf-8") as f:
+                    job_description = f.read()
+            else:
+                job_description = args.job_description
+            if not job_description:
+                print("ERROR: --job or --job-file is required", file=sys.stderr)
+                return 1
+            job_query = build_index_query(job_description, load_pipeline())
+            with ShardedResumeIndex(args.shards, args.directory) as index:
+                result = index.query(job_query, top_k=args.top_k, min_skill_matches=args.min_skill_matches)
+
+        else:
+            with ShardedResumeIndex(args.shards, args.directory) as index:
+                result = index.stats()
+
+        print(json.dumps(result, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
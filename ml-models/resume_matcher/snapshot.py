@@ -0,0 +1,163 @@
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import traceback
+
+# Third-party imports
+import spacy
+from spacy import util
+from thinc.api import Config
+
+# Local imports
+from enhanced_analyzer import get_skill_lemmas, set_skill_lemmas, scoring_version
+from profiles import SKILL_REGISTRY
+
+# Warm-start snapshot of the analyzer pipeline.
+#
+# `python snapshot.py build-snapshot` serializes the configured spaCy pipeline
+# (config plus nlp.to_bytes), the lemmatized skill table used by
+# extract_skills and the skill registry into one versioned file. Workers load
+# it with load_pipeline() instead of resolving and reading the installed model
+# package and re-parsing every skill. A snapshot is stale when it was built
+# by a different snapshot format, spaCy version or scoring version, or from
+# another model or model version than the one requested and installed;
+# load_pipeline then loads the model normally and rebuilds the snapshot.
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_PATH = os.path.join(SCRIPT_DIR, "cache", "snapshot", "analyzer.snapshot")
+
+# Bump when the layout of the snapshot changes
+SNAPSHOT_FORMAT = 1
+
+DEFAULT_MODEL = "en_core_web_sm"
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, unreadable or stale"""
+
+def build_snapshot(path=SNAPSHOT_PATH, model=DEFAULT_MODEL, nlp=None):
+    """Load the model (unless `nlp` is it, already loaded), precompute the skill tables
+    and write the snapshot. Returns its metadata."""
+    if nlp is None:
+        nlp = spacy.load(model)
+    metadata = {
+        "format": SNAPSHOT_FORMAT,
+        "spacy_version": spacy.__version__,
+        "model": model,
+        "model_version": nlp.meta.get("version"),
+        "scoring_version": scoring_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    snapshot = {
+        "metadata": metadata,
+        "config": nlp.config.to_str(),
+        "pipeline": nlp.to_bytes(),
+        "skill_names": SKILL_REGISTRY.names,
+        "skill_lemmas": get_skill_lemmas(nlp)
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write to a temporary file first so loading workers never see a partial snapshot
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return dict(metadata, bytes=os.path.getsize(path))
+
+def read_snapshot(path=SNAPSHOT_PATH, model=DEFAULT_MODEL):
+    """Read and validate a snapshot file of `model`"""
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except OSError as e:
+        raise SnapshotError(f"Snapshot not found: {str(e)}")
+    except (pickle.UnpicklingError, EOFError, AttributeError, ValueError) as e:
+        raise SnapshotError(f"Snapshot is unreadable: {str(e)}")
+
+    metadata = snapshot.get("metadata", {})
+    if metadata.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Snapshot format {metadata.get('format')} is not {SNAPSHOT_FORMAT}")
+    if metadata.get("spacy_version") != spacy.__version__:
+        raise SnapshotError(f"Snapshot was built with spaCy {metadata.get('spacy_version')}, not {spacy.__version__}")
+    if metadata.get("model") != model:
+        raise SnapshotError(f"Snapshot was built from {metadata.get('model')}, not {model}")
+    # Without an installed package (e.g. a model directory) there is no version to compare
+    model_version = util.get_package_version(model)
+    if model_version is not None and metadata.get("model_version") != model_version:
+        raise SnapshotError(
+            f"Snapshot was built from {model} {metadata.get('model_version')}, not the installed {model_version}"
+        )
+    if metadata.get("scoring_version") != scoring_version() or tuple(snapshot["skill_names"]) != SKILL_REGISTRY.names:
+        raise SnapshotError("Snapshot was built for different skill tables, rebuild it")
+    return snapshot
+
+def load_snapshot(path=SNAPSHOT_PATH, model=DEFAULT_MODEL):
+    """Restore the pipeline from a snapshot of `model`, with its skill lemmas installed"""
+    snapshot = read_snapshot(path, model)
+    config = Config().from_str(snapshot["config"])
+    lang_cls = util.get_lang_class(config["nlp"]["lang"])
+    # The weights come from the snapshot, so the components are only constructed here
+    nlp = lang_cls.from_config(config, auto_fill=False, validate=False)
+    nlp.from_bytes(snapshot["pipeline"])
+    set_skill_lemmas(nlp, snapshot["skill_lemmas"])
+    return nlp
+
+def load_pipeline(model=DEFAULT_MODEL, path=SNAPSHOT_PATH):
+    """Load the analyzer pipeline from the snapshot if there is a usable one, else from the model
+    package; a stale snapshot is rebuilt from the loaded model"""
+    stale = False
+    if path and os.path.exists(path):
+        try:
+            return load_snapshot(path, model)
+        except SnapshotError as e:
+            print(f"Ignoring snapshot: {str(e)}", file=sys.stderr)
+            stale = True
+        except Exception as e:
+            print(f"Failed to load snapshot: {str(e)}", file=sys.stderr)
+    nlp = spacy.load(model)
+    if stale:
+        try:
+            build_snapshot(path, model, nlp=nlp)
+            print(f"Rebuilt snapshot at {path}", file=sys.stderr)
+        except Exception as e:
+            print(f"Failed to rebuild snapshot: {str(e)}", file=sys.stderr)
+    return nlp
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Warm-start snapshot of the analyzer pipeline")
+        subparsers = parser.add_subparsers(dest="command", required=True)
+
+        build = subparsers.add_parser("build-snapshot", help="Serialize the pipeline and skill tables")
+        build.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model to snapshot")
+        build.add_argument("--output", default=SNAPSHOT_PATH, help="Snapshot file to write")
+
+        info = subparsers.add_parser("info", help="Show a snapshot's metadata and whether it is usable")
+        info.add_argument("--path", default=SNAPSHOT_PATH, help="Snapshot file to inspect")
+        info.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model the snapshot must be built from")
+
+        args = parser.parse_args()
+
+        if args.command == "build-snapshot":
+            result = build_snapshot(args.output, args.model)
+            result["path"] = args.output
+        else:
+            try:
+                snapshot = read_snapshot(args.path, args.model)
+                result = dict(snapshot["metadata"], usable=True)
+            except SnapshotError as e:
+                result = {"usable": False, "error": str(e)}
+
+        print(json.dumps(result, indent=2))
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
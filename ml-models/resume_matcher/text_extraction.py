@@ -0,0 +1,342 @@
+import os
+import io
+import sys
+import hashlib
+import math
+import zipfile
+import traceback
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party imports
+import fitz  # PyMuPDF
+import docx
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+# Local imports
+from metrics import EXTRACTION_SECONDS, OCR_SECONDS, PDF_PAGES, RESUME_CHARACTERS, record_cache
+from ocr import DEFAULT_OCR_DPI, page_needs_ocr, render_page_image, ocr_page_images
+from result_cache import ResultCache
+
+# Get the absolute directory of the script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Extracted text is cached on disk by the hash of the uploaded file
+TEXT_CACHE_DIR = os.path.join(SCRIPT_DIR, "cache", "text")
+
+# Bump when extraction or normalization changes so stale cached text is not reused
+EXTRACTOR_VERSION = "1"
+
+# Leading bytes used to recognize the supported formats
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy .doc (and other Office 97-2003 files)
+
+# PDFs with at least this many pages are extracted across a process pool
+# (below this, starting the pool costs more than it saves)
+PARALLEL_PAGE_THRESHOLD = 32
+
+# Extracted texts kept in memory (least recently used are evicted first) and on disk
+TEXT_MEMORY_CACHE_SIZE = 32
+TEXT_DISK_CACHE_SIZE = 20000
+
+TEXT_CACHE = ResultCache(
+    memory_size=TEXT_MEMORY_CACHE_SIZE, cache_dir=TEXT_CACHE_DIR, disk_size=TEXT_DISK_CACHE_SIZE, name="text"
+)
+
+def clean_unprintable(text):
+    """Replace unprintable characters with spaces"""
+    return ''.join(c if c.isprintable() or c.isspace() else ' ' for c in text)
+
+def normalize_extracted_text(text):
+    """Normalize extracted text the same way for every input format"""
+    # Handle common encoding issues
+    try:
+        # Replace common problematic characters
+        text = text.replace('\ufffd', '?')     # Replace replacement character
+        text = text.replace('\u0000', '')      # Remove null bytes
+        text = text.replace('\u2022', '-')     # Replace bullet points with hyphens
+        text = text.replace('\u2023', '-')     # Replace triangular bullet with hyphen
+        text = text.replace('\u2043', '-')     # Replace hyphen bullet with hyphen
+        text = text.replace('\u2219', '-')     # Replace bullet operator with hyphen
+        text = text.replace('•', '-')          # Replace standard bullet with hyphen
+
+        # Try to normalize encoding to ensure consistency
+        text = text.encode('utf-8', errors='replace').decode('utf-8')
+    except Exception as e:
+        print(f"Warning: Error handling special characters: {str(e)}", file=sys.stderr)
+
+    return text
+
+def _extract_page(doc, index, ocr=True, ocr_dpi=DEFAULT_OCR_DPI):
+    """Extract one page as (text, ocr_image, error) so a bad page never affects the others"""
+    try:
+        page = doc.load_page(index)
+        # Get text with careful encoding handling
+        page_text = page.get_text()
+        # Only image-only pages take the (much slower) OCR path
+        image = None
+        if ocr and page_needs_ocr(page, page_text):
+            image = render_page_image(page, dpi=ocr_dpi)
+        return page_text, image, None
+    except Exception as e:
+        return "", None, str(e)
+
+def _open_pdf_source(source):
+    """Open a fitz handle on a ("path", path) or ("shm", name, size) source"""
+    if source[0] == "path":
+        return fitz.open(source[1])
+    shm = shared_memory.SharedMemory(name=source[1])
+    try:
+        data = bytes(shm.buf[:source[2]])
+    finally:
+        shm.close()
+    return fitz.open(stream=data, filetype="pdf")
+
+def _extract_page_range(source, start, end, ocr, ocr_dpi):
+    # Runs in worker processes: each one opens its own fitz handle on the source
+    try:
+        doc = _open_pdf_source(source)
+    except Exception as e:
+        return [("", None, f"Could not open document: {str(e)}")] * (end - start)
+    try:
+        return [_extract_page(doc, index, ocr, ocr_dpi) for index in range(start, end)]
+    finally:
+        doc.close()
+
+def _extract_pages_parallel(source, page_count, ocr=True, ocr_dpi=DEFAULT_OCR_DPI, max_workers=None):
+    """Extract pages in contiguous ranges across a process pool, returned in page order"""
+    workers = min(page_count, max_workers or os.cpu_count() or 1)
+    chunk_size = math.ceil(page_count / workers)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    pages = []
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(_extract_page_range, source, start, end, ocr, ocr_dpi) for start, end in ranges]
+        for (start, end), future in zip(ranges, futures):
+            try:
+                pages.extend(future.result())
+            except Exception as e:
+                # A crashed worker only loses its own range
+                pages.extend([("", None, f"Extraction worker failed: {str(e)}")] * (end - start))
+    return pages
+
+def _assemble_pages(pages, deadline=None, failed_pages=None):
+    """Join extracted pages in order, replacing image-only pages with their OCR text.
+
+    The indices of pages that could not be extracted or OCRed are appended to
+    `failed_pages`, if given.
+    """
+    page_texts = []
+    ocr_pages = []
+    ocr_images = []
+    for index, (page_text, image, error) in enumerate(pages):
+        if error:
+            print(f"Warning: Error extracting text from page {index + 1}: {error}", file=sys.stderr)
+            if failed_pages is not None:
+                failed_pages.append(index)
+        if image is not None:
+            ocr_pages.append(index)
+            ocr_images.append(image)
+        page_texts.append(page_text)
+
+    if ocr_images:
+        print(f"Running OCR on {len(ocr_images)} image-only page(s)", file=sys.stderr)
+        failed_ocr = []
+        with OCR_SECONDS.time():
+            ocr_texts = ocr_page_images(ocr_images, deadline=deadline, failed=failed_ocr)
+        if failed_pages is not None:
+            failed_pages.extend(ocr_pages[index] for index in failed_ocr)
+        for index, ocr_text in zip(ocr_pages, ocr_texts):
+            if ocr_text.strip():
+                page_texts[index] = ocr_text
+
+    # Clean unprintable characters
+    text = ""
+    for page_text in page_texts:
+        text += clean_unprintable(page_text) + "\n"
+
+    return normalize_extracted_text(text)
+
+def _extract_pdf(path=None, data=None, ocr=True, ocr_dpi=DEFAULT_OCR_DPI, parallel_threshold=PARALLEL_PAGE_THRESHOLD,
+                 deadline=None, failed_pages=None):
+    """Extract the text of a PDF given as a path and/or bytes.
+
+    Documents with at least `parallel_threshold` pages are split into page
+    ranges extracted by a process pool; each worker opens the file itself, or
+    the bytes through shared memory when there is no path. OCR stops once
+    `deadline` has passed. Pages that failed are appended to `failed_pages`.
+    """
+    doc = fitz.open(path) if path else fitz.open(stream=data, filetype="pdf")
+    try:
+        page_count = doc.page_count
+        PDF_PAGES.observe(page_count)
+        if not parallel_threshold or page_count < max(2, parallel_threshold):
+            pages = [_extract_page(doc, index, ocr, ocr_dpi) for index in range(page_count)]
+            return _assemble_pages(pages, deadline, failed_pages)
+    finally:
+        doc.close()
+
+    print(f"Extracting {page_count} pages in parallel", file=sys.stderr)
+    if path:
+        pages = _extract_pages_parallel(("path", path), page_count, ocr, ocr_dpi)
+        return _assemble_pages(pages, deadline, failed_pages)
+
+    shm = shared_memory.SharedMemory(create=True, size=len(data))
+    try:
+        shm.buf[:len(data)] = data
+        pages = _extract_pages_parallel(("shm", shm.name, len(data)), page_count, ocr, ocr_dpi)
+    finally:
+        shm.close()
+        shm.unlink()
+    return _assemble_pages(pages, deadline, failed_pages)
+
+def extract_text_from_pdf(pdf_path, ocr=True, ocr_dpi=DEFAULT_OCR_DPI, parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Extract text from a PDF file with improved encoding handling.
+
+    Pages without a usable text layer (scanned resumes) are rasterized at
+    `ocr_dpi` and run through OCR when `ocr` is enabled.
+    """
+    try:
+        return _extract_pdf(path=pdf_path, ocr=ocr, ocr_dpi=ocr_dpi, parallel_threshold=parallel_threshold)
+    except Exception as e:
+        print(f"Error extracting PDF text: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return ""
+
+def _iter_block_lines(element, parent, seen_cells):
+    """Yield the text of paragraphs and table cells under a DOCX element, in document order"""
+    for child in element.iterchildren():
+        if child.tag == qn('w:p'):
+            yield Paragraph(child, parent).text
+        elif child.tag == qn('w:tbl'):
+            for row in Table(child, parent).rows:
+                for cell in row.cells:
+                    # Merged cells are returned once per grid column they span
+                    # (keep the elements themselves, lxml may reuse proxy ids)
+                    if cell._tc in seen_cells:
+                        continue
+                    seen_cells.add(cell._tc)
+                    yield from _iter_block_lines(cell._tc, cell, seen_cells)
+
+def iter_docx_lines(source):
+    """Stream the lines of a DOCX file (a path or file-like object).
+
+    Paragraphs and table cells are yielded in document order, without
+    converting the document to PDF.
+    """
+    document = docx.Document(source)
+    seen_cells = set()
+    for block_text in _iter_block_lines(document.element.body, document, seen_cells):
+        # Soft line breaks inside a paragraph become separate lines
+        for line in block_text.split('\n'):
+            yield line
+
+def extract_text_from_docx(source):
+    """Extract text from a DOCX file (a path or file-like object)"""
+    try:
+        text = '\n'.join(clean_unprintable(line) for line in iter_docx_lines(source))
+    except Exception as e:
+        print(f"Error extracting DOCX text: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return ""
+
+    return normalize_extracted_text(text + "\n")
+
+def detect_format(data):
+    """Detect the document format from its leading (magic) bytes"""
+    head = data[:1024]
+    if head.startswith(PDF_MAGIC) or PDF_MAGIC in head:
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        return None
+    if head.startswith(OLE_MAGIC):
+        return "doc"
+    return None
+
+def content_hash(data):
+    """Return the content hash used to key cached extraction results"""
+    return hashlib.sha256(data).hexdigest()
+
+def get_cached_text(key):
+    """Return cached extracted text, or None on a miss"""
+    return TEXT_CACHE.get(key)
+
+def store_cached_text(key, text):
+    """Store extracted text in memory and on disk"""
+    TEXT_CACHE.put(key, text)
+
+def _text_cache_key(data, file_format, ocr, ocr_dpi):
+    # OCR settings change the text extracted from scanned PDFs
+    options = f"{ocr}:{ocr_dpi}" if file_format == "pdf" else ""
+    return content_hash(f"{EXTRACTOR_VERSION}:{file_format}:{options}:".encode("utf-8") + data)
+
+def extract_document_text(data, ocr=True, ocr_dpi=DEFAULT_OCR_DPI, use_cache=True,
+                          parallel_threshold=PARALLEL_PAGE_THRESHOLD, source_path=None, deadline=None):
+    """Extract normalized text from resume file bytes, dispatching on the file format.
+
+    `source_path` is the file the bytes were read from, if any; parallel PDF
+    workers open it directly. OCR of image-only pages stops once `deadline`
+    (see deadline.py) has passed. Raises ValueError for formats that cannot be read.
+    """
+    file_format = detect_format(data)
+    if file_format == "doc":
+        raise ValueError("Legacy .doc files are not supported. Please upload a PDF or DOCX file.")
+    if file_format is None:
+        raise ValueError("Unsupported file format. Please upload a PDF or DOCX file.")
+
+    key = _text_cache_key(data, file_format, ocr, ocr_dpi)
+    if use_cache:
+        cached = get_cached_text(key)
+        record_cache("text", cached is not None)
+        if cached is not None:
+            return cached
+
+    failed_pages = []
+    with EXTRACTION_SECONDS.time(format=file_format):
+        if file_format == "docx":
+            text = extract_text_from_docx(io.BytesIO(data))
+        else:
+            try:
+                text = _extract_pdf(
+                    path=source_path,
+                    data=data,
+                    ocr=ocr,
+                    ocr_dpi=ocr_dpi,
+                    parallel_threshold=parallel_threshold,
+                    deadline=deadline,
+                    failed_pages=failed_pages
+                )
+            except Exception as e:
+                print(f"Error extracting PDF text: {str(e)}", file=sys.stderr)
+                print(traceback.format_exc(), file=sys.stderr)
+                text = ""
+    RESUME_CHARACTERS.observe(len(text))
+
+    # Never cache failed, partly failed or cut-short extractions, the next attempt may succeed
+    complete = not failed_pages and not (deadline is not None and "ocr" in deadline.skipped)
+    if use_cache and text.strip() and complete:
+        store_cached_text(key, text)
+
+    return text
+
+def extract_resume_text(resume_path, ocr=True, ocr_dpi=DEFAULT_OCR_DPI, use_cache=True,
+                        parallel_threshold=PARALLEL_PAGE_THRESHOLD):
+    """Extract normalized text from a resume file (PDF or DOCX)"""
+    with open(resume_path, "rb") as f:
+        data = f.read()
+    return extract_document_text(
+        data,
+        ocr=ocr,
+        ocr_dpi=ocr_dpi,
+        use_cache=use_cache,
+        parallel_threshold=parallel_threshold,
+        source_path=resume_path
+    )
@@ -0,0 +1,430 @@
+import os
+import sys
+import json
+import time
+import queue
+import itertools
+import signal
+import argparse
+import threading
+import traceback
+import contextlib
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local imports
+from deadline import Deadline
+from metrics import METRICS, FAILURES
+from protocol import ProtocolError, read_request, write_frame
+
+# Persistent analyzer worker with self-recycling.
+#
+# A long-lived spaCy process grows as its vocab and string store absorb every
+# new token, so analyzer processes are recycled: each child process tracks its
+# resident memory and handled-request count, and after finishing a request
+# that takes it past --max-requests or --max-rss-mb it reports that it is
+# retiring and exits. Its slot starts a replacement; queued requests wait for
+# it and no request that was already handed to a child is dropped.
+#
+# Requests are read from stdin in the framed form of protocol.py, one after
+# another. Header fields: "id" (echoed back), "command" ("analyze", the
+# default, or "stats"), "job_description", "original_filename", "ocr",
+# "generate_report", "report_format", "budget_seconds", "user_id". A stats or
+# metrics request carries an empty resume frame. Each response is one frame holding a JSON object:
+# {"id", "result", "queue_seconds"} (the time the request waited for an
+# analyzer process), {"id", "stats"} or {"id", "metrics"} (the Prometheus text
+# exposition, also served over HTTP with --metrics-port). Responses are written
+# as they complete, so with several slots they can arrive out of order.
+#
+# Queued requests are served smallest resume file first, which cuts
+# the mean latency when short and long resumes arrive together. A request's
+# budget counts from when it is read, so time spent queued is included; a
+# request whose budget runs out gets a partial result (see deadline.py).
+
+# Defaults, tunable from the command line
+DEFAULT_MAX_REQUESTS = 500
+DEFAULT_MAX_RSS_MB = 1024
+
+# Service metrics, next to the analyzer metrics the children send back
+QUEUE_DEPTH = METRICS.gauge("resume_matcher_queue_depth", "Requests waiting for an analyzer process")
+BUSY_WORKERS = METRICS.gauge("resume_matcher_busy_workers", "Analyzer processes handling a request")
+REQUEST_SECONDS = METRICS.histogram(
+    "resume_matcher_request_seconds", "Time from reading a request to writing its response, queueing included"
+)
+RECYCLES = METRICS.counter("resume_matcher_worker_recycles_total", "Analyzer process restarts by reason", ("reason",))
+
+def current_rss_bytes():
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not Linux: fall back to the peak RSS (KB on Linux, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def _child_main(conn, max_requests, max_rss_bytes, options):
+    """Analyzer child process: load spaCy once and serve requests until a limit is reached"""
+    # stdout belongs to the parent's response stream
+    sys.stdout = sys.stderr
+    from enhanced_analyzer import analyze_resume
+    from snapshot import load_pipeline
+
+    # From the warm-start snapshot when one has been built
+    nlp = load_pipeline()
+    handled = 0
+    started = time.time()
+    conn.send({"type": "ready", "pid": os.getpid(), "rss_bytes": current_rss_bytes()})
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+
+        try:
+            result = analyze_resume(
+                None,
+                request.get("job_description"),
+                nlp,
+                request.get("original_filename"),
+                ocr=request.get("ocr", options.get("ocr", True)),
+                resume_bytes=request["resume_bytes"],
+                use_cache=options.get("use_cache", True),
+                generate_report=request.get("generate_report", True),
+                deadline=Deadline(expires_at=request["expires_at"]) if request.get("expires_at") else None,
+                user_id=request.get("user_id"),
+                report_format=request.get("report_format", "pdf")
+            )
+        except Exception as e:
+            result = {"error": f"Error analyzing resume: {str(e)}", "success": False}
+        handled += 1
+
+        rss = current_rss_bytes()
+        reason = None
+        if max_requests and handled >= max_requests:
+            reason = "requests"
+        elif max_rss_bytes and rss >= max_rss_bytes:
+            reason = "rss"
+        conn.send({
+            "type": "result",
+            "result": result,
+            "metrics": METRICS.snapshot(reset=True),
+            "handled": handled,
+            "rss_bytes": rss,
+            "uptime_seconds": round(time.time() - started, 1),
+            "recycle": reason
+        })
+        if reason:
+            # The reply is out, the slot will start a replacement
+            return
+
+class WorkerSlot:
+    """One analyzer child process and the thread that feeds it requests"""
+
+    def __init__(self, supervisor, index):
+        self.supervisor = supervisor
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.pid = None
+        self.handled = 0
+        self.rss_bytes = 0
+        self.started_at = None
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name=f"worker-slot-{index}", daemon=True)
+
+    def _start_child(self):
+        context = self.supervisor.context
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_child_main,
+            args=(child_conn, self.supervisor.max_requests, self.supervisor.max_rss_bytes, self.supervisor.options),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        ready = self.conn.recv()
+        self.pid = ready["pid"]
+        self.rss_bytes = ready["rss_bytes"]
+        self.handled = 0
+        self.started_at = time.time()
+        print(f"Worker slot {self.index}: started analyzer process {self.pid}", file=sys.stderr)
+
+    def _stop_child(self):
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.conn.close()
+            self.conn = None
+        if self.process is not None:
+            self.process.join(timeout=10)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+
+    def _run(self):
+        supervisor = self.supervisor
+        while True:
+            _, _, item = supervisor.requests.get()
+            if item is None:
+                supervisor.requests.task_done()
+                self._stop_child()
+                return
+            request_id, request, received_at = item
+            queue_seconds = round(time.time() - received_at, 4)
+            self.busy = True
+            try:
+                if self.process is None:
+                    self._start_child()
+                self.conn.send(request)
+                reply = self.conn.recv()
+            except (EOFError, OSError) as e:
+                # The child died mid-request; answer with an error and start over
+                print(f"Worker slot {self.index}: analyzer process {self.pid} failed: {str(e)}", file=sys.stderr)
+                supervisor.record_recycle("crash")
+                FAILURES.inc(type="process_crash")
+                self.process = None
+                self.conn = None
+                supervisor.respond({
+                    "id": request_id,
+                    "result": {"error": "Analyzer process failed", "success": False},
+                    "queue_seconds": queue_seconds
+                })
+            except Exception as e:
+                FAILURES.inc(type=type(e).__name__)
+                supervisor.respond({
+                    "id": request_id, "result": {"error": str(e), "success": False}, "queue_seconds": queue_seconds
+                })
+            else:
+                self.handled = reply["handled"]
+                self.rss_bytes = reply["rss_bytes"]
+                METRICS.merge(reply["metrics"])
+                supervisor.record_request(partial=reply["result"].get("partial", False))
+                supervisor.respond({"id": request_id, "result": reply["result"], "queue_seconds": queue_seconds})
+                if reply["recycle"]:
+                    print(
+                        f"Worker slot {self.index}: recycling process {self.pid} after {self.handled} requests "
+                        f"({self.rss_bytes // (1024 * 1024)} MB RSS, limit hit: {reply['recycle']})",
+                        file=sys.stderr
+                    )
+                    supervisor.record_recycle(reply["recycle"])
+                    self._stop_child()
+                    # Start the replacement before taking the next request
+                    # (not when shutting down, one would start lazily if needed)
+                    if supervisor.draining:
+                        continue
+                    try:
+                        self._start_child()
+                    except (EOFError, OSError) as e:
+                        # Retried when the next request arrives
+                        print(f"Worker slot {self.index}: could not start analyzer process: {str(e)}", file=sys.stderr)
+                        self.process = None
+                        self.conn = None
+            finally:
+                REQUEST_SECONDS.observe(time.time() - received_at)
+                self.busy = False
+                supervisor.requests.task_done()
+
+    def stats(self):
+        return {
+            "slot": self.index,
+            "pid": self.pid,
+            "alive": self.process is not None and self.process.is_alive(),
+            "busy": self.busy,
+            "handled": self.handled,
+            "rss_bytes": self.rss_bytes,
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0
+        }
+
+class WorkerSupervisor:
+    """Queue requests across a fixed number of self-recycling analyzer processes"""
+
+    def __init__(self, workers=1, max_requests=DEFAULT_MAX_REQUESTS, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                 output=None, options=None):
+        self.max_requests = max_requests
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else 0
+        self.options = options or {}
+        self.output = output or sys.stdout.buffer
+        # Children are spawned, not forked, since the supervisor runs threads
+        self.context = multiprocessing.get_context("spawn")
+        # (resume size in bytes, arrival order, request), smallest first
+        self.requests = queue.PriorityQueue()
+        self._arrivals = itertools.count()
+        self.started_at = time.time()
+        self.completed = 0
+        self.partial = 0
+        self.recycles = {}
+        self.draining = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.slots = [WorkerSlot(self, index) for index in range(workers)]
+
+    def start(self):
+        for slot in self.slots:
+            slot.thread.start()
+
+    def submit(self, request_id, request):
+        budget_seconds = request.pop("budget_seconds", None) or self.options.get("budget_seconds")
+        if budget_seconds:
+            request["expires_at"] = time.time() + float(budget_seconds)
+        # The size is known without parsing anything, so the stdin reader is never held up;
+        # scanned pages, the slowest to process, are also the largest
+        priority = len(request["resume_bytes"])
+        self.requests.put((priority, next(self._arrivals), (request_id, request, time.time())))
+
+    def respond(self, response):
+        payload = json.dumps(response, ensure_ascii=True).encode("utf-8")
+        with self._write_lock:
+            write_frame(self.output, payload)
+            self.output.flush()
+
+    def record_request(self, partial=False):
+        with self._lock:
+            self.completed += 1
+            self.partial += bool(partial)
+
+    def record_recycle(self, reason):
+        RECYCLES.inc(reason=reason)
+        with self._lock:
+            self.recycles[reason] = self.recycles.get(reason, 0) + 1
+
+    def stats(self):
+        """Counters for tuning the recycling limits"""
+        with self._lock:
+            completed = self.completed
+            partial = self.partial
+            recycles = dict(self.recycles)
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "completed": completed,
+            "partial": partial,
+            "queued": self.requests.qsize(),
+            "recycles": recycles,
+            "max_requests": self.max_requests,
+            "max_rss_bytes": self.max_rss_bytes,
+            "workers": [slot.stats() for slot in self.slots]
+        }
+
+    def render_metrics(self):
+        """Prometheus text exposition of the service and analyzer metrics"""
+        QUEUE_DEPTH.set(self.requests.qsize())
+        BUSY_WORKERS.set(sum(1 for slot in self.slots if slot.busy))
+        return METRICS.render()
+
+    def drain(self):
+        """Finish every queued and in-flight request, then stop the analyzer processes"""
+        self.draining = True
+        # Sentinels sort after every queued request
+        for _ in self.slots:
+            self.requests.put((float("inf"), next(self._arrivals), None))
+        for slot in self.slots:
+            slot.thread.join()
+
+class _Shutdown(Exception):
+    pass
+
+def start_metrics_server(supervisor, port, host="127.0.0.1"):
+    """Serve GET /metrics on a background thread; returns the server"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = supervisor.render_metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes are too frequent to log
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Serving metrics at http://{host}:{server.server_port}/metrics", file=sys.stderr)
+    return server
+
+def _handle_sigterm(signum, frame):
+    raise _Shutdown()
+
+def serve(supervisor, stream):
+    """Read framed requests from a binary stream until it ends, then drain"""
+    supervisor.start()
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    next_id = 0
+    try:
+        while True:
+            try:
+                request = read_request(stream)
+            except ProtocolError as e:
+                # The stream cannot be resynchronized after a bad frame
+                supervisor.respond({"id": None, "result": {"error": f"Invalid request: {str(e)}", "success": False}})
+                break
+            if request is None:
+                break
+            next_id += 1
+            request_id = request.pop("id", next_id)
+            command = request.get("command", "analyze")
+            if command == "stats":
+                supervisor.respond({"id": request_id, "stats": supervisor.stats()})
+                continue
+            if command == "metrics":
+                supervisor.respond({"id": request_id, "metrics": supervisor.render_metrics()})
+                continue
+            supervisor.submit(request_id, request)
+    except (_Shutdown, KeyboardInterrupt):
+        print("Shutting down, finishing queued requests", file=sys.stderr)
+    finally:
+        with contextlib.suppress(_Shutdown, KeyboardInterrupt):
+            supervisor.drain()
+    print(f"Worker stats: {json.dumps(supervisor.stats())}", file=sys.stderr)
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description="Persistent resume analyzer with self-recycling worker processes")
+        parser.add_argument("--workers", type=int, default=1, help="Number of analyzer processes")
+        parser.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS,
+                            help="Recycle an analyzer process after this many requests (0 disables)")
+        parser.add_argument("--max-rss-mb", type=int, default=DEFAULT_MAX_RSS_MB,
+                            help="Recycle an analyzer process once its resident memory exceeds this (0 disables)")
+        parser.add_argument("--no-ocr", action="store_true", help="Disable OCR of image-only pages")
+        parser.add_argument("--no-cache", action="store_true", help="Always re-run the analysis instead of using cached results")
+        parser.add_argument("--budget-seconds", type=float,
+                            help="Default time budget of a request that does not set budget_seconds, queueing included")
+        parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics at http://<host>:<port>/metrics")
+        parser.add_argument("--metrics-host", default="127.0.0.1", help="Address the metrics endpoint listens on")
+
+        args = parser.parse_args()
+
+        supervisor = WorkerSupervisor(
+            workers=max(1, args.workers),
+            max_requests=args.max_requests,
+            max_rss_mb=args.max_rss_mb,
+            output=sys.stdout.buffer,
+            options={"ocr": not args.no_ocr, "use_cache": not args.no_cache, "budget_seconds": args.budget_seconds}
+        )
+        # Only response frames go to stdout
+        sys.stdout = sys.stderr
+        if args.metrics_port is not None:
+            start_metrics_server(supervisor, args.metrics_port, host=args.metrics_host)
+        serve(supervisor, sys.stdin.buffer)
+        return 0
+
+    except Exception as e:
+        print(f"ERROR: {str(e)}", file=sys.stderr)
+        print(traceback.format_exc(), file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())